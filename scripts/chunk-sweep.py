@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Chunking sweep for the Headset Support Agent knowledge base.
+
+Re-chunks the local knowledge-base/ tree with each candidate ingestion config,
+indexes it with the offline BM25 scorer from scripts/local_kb.py and scores
+the golden questions (tests/retrieval/golden.json) against it, so a chunking
+change can be compared before it is made on HeadsetKbDataSource in
+infrastructure/template.yaml.
+
+Strategies (--strategies):
+  fixed         FIXED_SIZE: --sizes max tokens x --overlaps overlap percent
+                (production today is 300 tokens / 20%).
+  hierarchical  HIERARCHICAL: --sizes child max tokens, parents of
+                --parent-multiplier x child tokens, overlap tokens derived
+                from --overlaps percent of the child size.
+  semantic      SEMANTIC: --sizes max tokens x --breakpoints percentile,
+                --buffer-size neighbouring sentences (default 1: with the
+                lexical similarity used offline, single short markdown lines
+                rarely share terms and buffer 0 almost never breaks).
+
+For every config the report gives the chunk count, indexed tokens (the words
+the KB would embed, overlap included), hit rate and MRR at --top-k, and hits
+per 1k indexed tokens. Configs are ranked by hit rate, then hits per token;
+the winner is printed as a ChunkingConfiguration block for the template.
+
+Scores are lexical, so compare configs with each other rather than reading
+the hit rate as the live number.
+
+Usage:
+  python scripts/chunk-sweep.py
+  python scripts/chunk-sweep.py --strategies fixed --sizes 200,300,500 --overlaps 0,20
+"""
+
+import argparse
+import json
+import sys
+
+import local_kb
+
+DEFAULT_GOLDEN = "tests/retrieval/golden.json"
+DEFAULT_TOP_K = 3
+STRATEGIES = ("fixed", "hierarchical", "semantic")
+DEFAULT_STRATEGIES = ",".join(STRATEGIES)
+DEFAULT_SIZES = "150,300,500"
+DEFAULT_OVERLAPS = "0,10,20"
+DEFAULT_BREAKPOINTS = "90,95"
+DEFAULT_PARENT_MULTIPLIER = 5
+DEFAULT_BUFFER_SIZE = 1
+
+
+def first_hit_rank(item: dict, results: list):
+    """1-based rank of the first result matching the item's target, or None."""
+    for rank, r in enumerate(results, start=1):
+        if "expect_tree_id" in item:
+            if r["metadata"].get("tree_id") == item["expect_tree_id"]:
+                return rank
+        elif item["expect_source"] in r["location"]["s3Location"]["uri"]:
+            return rank
+    return None
+
+
+def candidate_configs(args) -> list:
+    """Return [(strategy, params, chunker, ChunkingConfiguration)] to sweep."""
+    sizes = local_kb.parse_int_list(args.sizes, "--sizes")
+    overlaps = local_kb.parse_int_list(args.overlaps, "--overlaps", minimum=0)
+    breakpoints = local_kb.parse_int_list(args.breakpoints, "--breakpoints", minimum=50)
+    if any(o >= 100 for o in overlaps):
+        sys.exit(f"ERROR: --overlaps values must be < 100, got {args.overlaps!r}")
+    if any(b > 99 for b in breakpoints):
+        sys.exit(f"ERROR: --breakpoints values must be in 50..99, got {args.breakpoints!r}")
+
+    configs = []
+    for strategy in args.strategies.split(","):
+        strategy = strategy.strip()
+        if strategy not in STRATEGIES:
+            sys.exit(f"ERROR: unknown strategy {strategy!r}; choose from {', '.join(STRATEGIES)}")
+        for size in sizes:
+            if strategy == "fixed":
+                for overlap in overlaps:
+                    configs.append((
+                        strategy, f"max={size} overlap={overlap}%",
+                        lambda t, s=size, o=overlap: local_kb.chunk_fixed(t, s, o),
+                        {"ChunkingStrategy": "FIXED_SIZE",
+                         "FixedSizeChunkingConfiguration": {
+                             "MaxTokens": size, "OverlapPercentage": overlap}},
+                    ))
+            elif strategy == "hierarchical":
+                parent = size * args.parent_multiplier
+                for overlap in overlaps:
+                    tokens = size * overlap // 100
+                    configs.append((
+                        strategy, f"parent={parent} child={size} overlap={tokens}",
+                        lambda t, p=parent, s=size, o=tokens: local_kb.chunk_hierarchical(t, p, s, o),
+                        {"ChunkingStrategy": "HIERARCHICAL",
+                         "HierarchicalChunkingConfiguration": {
+                             "LevelConfigurations": [{"MaxTokens": parent}, {"MaxTokens": size}],
+                             "OverlapTokens": tokens}},
+                    ))
+            else:
+                for bp in breakpoints:
+                    configs.append((
+                        strategy, f"max={size} breakpoint={bp} buffer={args.buffer_size}",
+                        lambda t, s=size, b=bp: local_kb.chunk_semantic(t, s, args.buffer_size, b),
+                        {"ChunkingStrategy": "SEMANTIC",
+                         "SemanticChunkingConfiguration": {
+                             "MaxTokens": size, "BufferSize": args.buffer_size,
+                             "BreakpointPercentileThreshold": bp}},
+                    ))
+    return configs
+
+
+def score_config(docs: list, golden: list, chunker, top_k: int) -> dict:
+    """Chunk, index and score one config; return its report row."""
+    chunks = local_kb.build_chunks(docs, chunker)
+    index = local_kb.BM25Index(chunks)
+    ranks = [
+        first_hit_rank(item, index.search(
+            item["q"], top_k, local_kb.build_retrieval_filter(item.get("filter"))))
+        for item in golden
+    ]
+    hits = sum(1 for r in ranks if r)
+    tokens = sum(len(c["text"].split()) for c in chunks)
+    return {
+        "chunks": len(chunks),
+        "indexed_tokens": tokens,
+        "hit_rate": hits / len(golden),
+        "mrr": sum(1.0 / r for r in ranks if r) / len(golden),
+        "hits_per_1k_tokens": hits * 1000.0 / tokens if tokens else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Sweep KB chunking configs offline and score them against the golden questions."
+    )
+    parser.add_argument("--strategies", default=DEFAULT_STRATEGIES,
+                        help=f"Comma-separated strategies to sweep (default: {DEFAULT_STRATEGIES})")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES,
+                        help=f"Comma-separated max/child token sizes (default: {DEFAULT_SIZES})")
+    parser.add_argument("--overlaps", default=DEFAULT_OVERLAPS,
+                        help=f"Comma-separated overlap percentages for fixed/hierarchical (default: {DEFAULT_OVERLAPS})")
+    parser.add_argument("--breakpoints", default=DEFAULT_BREAKPOINTS,
+                        help=f"Comma-separated semantic breakpoint percentiles (default: {DEFAULT_BREAKPOINTS})")
+    parser.add_argument("--buffer-size", type=int, default=DEFAULT_BUFFER_SIZE,
+                        help=f"Semantic buffer size, 0 or 1 (default: {DEFAULT_BUFFER_SIZE})")
+    parser.add_argument("--parent-multiplier", type=int, default=DEFAULT_PARENT_MULTIPLIER,
+                        help=f"Hierarchical parent size as a multiple of the child size (default: {DEFAULT_PARENT_MULTIPLIER})")
+    parser.add_argument("--top-k", type=int, default=DEFAULT_TOP_K,
+                        help=f"Results per question (default: {DEFAULT_TOP_K})")
+    parser.add_argument("--kb-dir", default=local_kb.DEFAULT_KB_DIR,
+                        help=f"Local knowledge-base directory (default: {local_kb.DEFAULT_KB_DIR})")
+    parser.add_argument("--golden", default=DEFAULT_GOLDEN,
+                        help=f"Path to golden question JSON file (default: {DEFAULT_GOLDEN})")
+    parser.add_argument("--json", default=None,
+                        help="Also write the full report to this JSON file")
+    args = parser.parse_args()
+
+    if args.top_k < 1:
+        sys.exit(f"ERROR: --top-k must be >= 1, got {args.top_k}")
+    if not (0 <= args.buffer_size <= 1):
+        sys.exit(f"ERROR: --buffer-size must be 0 or 1, got {args.buffer_size}")
+    if args.parent_multiplier < 1:
+        sys.exit(f"ERROR: --parent-multiplier must be >= 1, got {args.parent_multiplier}")
+
+    try:
+        docs = local_kb.load_documents(args.kb_dir)
+    except FileNotFoundError as exc:
+        sys.exit(f"ERROR: {exc}")
+    # Score the eval gate's population; "gate": false entries are report-only.
+    golden = [item for item in local_kb.load_golden(args.golden) if item.get("gate", True)]
+    configs = candidate_configs(args)
+    print(f"Sweeping {len(configs)} chunking configs over {len(docs)} docs, "
+          f"{len(golden)} golden questions, top_k={args.top_k}")
+
+    report = []
+    for strategy, params, chunker, chunking_configuration in configs:
+        row = {"strategy": strategy, "params": params,
+               **score_config(docs, golden, chunker, args.top_k),
+               "chunking_configuration": chunking_configuration}
+        report.append(row)
+    report.sort(key=lambda r: (-r["hit_rate"], -r["hits_per_1k_tokens"], -r["mrr"]))
+
+    print(f"\n{'strategy':<13} {'params':<38} {'chunks':>6} {'tokens':>7} "
+          f"{'hit@' + str(args.top_k):>6} {'MRR':>6} {'hit/1k':>7}")
+    for row in report:
+        print(f"{row['strategy']:<13} {row['params']:<38} {row['chunks']:>6} "
+              f"{row['indexed_tokens']:>7} {row['hit_rate']:>6.3f} {row['mrr']:>6.3f} "
+              f"{row['hits_per_1k_tokens']:>7.3f}")
+
+    best = report[0]
+    print(f"\nBest: {best['strategy']} {best['params']} — ChunkingConfiguration:")
+    print(json.dumps(best["chunking_configuration"], indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as fh:
+            json.dump({"top_k": args.top_k, "questions": len(golden), "configs": report}, fh, indent=2)
+        print(f"\nReport written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
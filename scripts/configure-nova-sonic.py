@@ -7,9 +7,10 @@ Enables speech-to-speech capabilities with Nova Sonic voices
 import argparse
 import boto3
 import json
-import time
 from botocore.exceptions import ClientError
 
+import waiters
+
 # Nova Sonic voice mappings for personas
 PERSONA_VOICES = {
     "tangerine": {
@@ -115,34 +116,34 @@ def build_bot_locale(client, bot_id, locale_id='en_US'):
         return False
 
 
+def bot_locale_waiter(client, bot_id, locale_id='en_US', timeout=300):
+    """Waiter for the DRAFT bot locale finishing its build (Failed is terminal)."""
+    def probe():
+        response = client.describe_bot_locale(
+            botId=bot_id,
+            botVersion='DRAFT',
+            localeId=locale_id
+        )
+        status = response['botLocaleStatus']
+        print(f"  Bot locale status: {status}")
+        if status == 'Failed':
+            print(f"  Build failed: {response.get('failureReasons', 'Unknown')}")
+        return status
+
+    return waiters.Waiter(
+        f"bot locale {locale_id}", probe,
+        done=lambda status: status in ('Built', 'ReadyExpressTesting'),
+        failed=lambda status: status == 'Failed',
+        timeout=timeout, delay=5, max_delay=30, retry_on=(ClientError,))
+
+
 def wait_for_bot_locale(client, bot_id, locale_id='en_US', timeout=300):
     """Wait for bot locale to be built"""
     print(f"Waiting for bot locale {locale_id} to be ready...")
-    start_time = time.time()
-
-    while time.time() - start_time < timeout:
-        try:
-            response = client.describe_bot_locale(
-                botId=bot_id,
-                botVersion='DRAFT',
-                localeId=locale_id
-            )
-            status = response['botLocaleStatus']
-            print(f"  Bot locale status: {status}")
-
-            if status in ['Built', 'ReadyExpressTesting']:
-                return True
-            elif status == 'Failed':
-                print(f"  Build failed: {response.get('failureReasons', 'Unknown')}")
-                return False
-
-        except ClientError as e:
-            print(f"  Error checking status: {e}")
-
-        time.sleep(10)
-
-    print("Timeout waiting for bot locale")
-    return False
+    result = bot_locale_waiter(client, bot_id, locale_id, timeout).wait()
+    if result.outcome == waiters.TIMEOUT:
+        print("Timeout waiting for bot locale")
+    return result.outcome == waiters.DONE
 
 
 def configure_nova_sonic_for_connect(connect_client, instance_id, bot_id, bot_alias_id):
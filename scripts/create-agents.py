@@ -19,14 +19,30 @@ invoked the supervisor. This script now:
      and that the orphans are gone.
 
 Idempotent: find-before-create everywhere; running twice creates no dupes.
+Before mutating anything the deployed agent, KB association and alias are
+diffed against the desired state (plan_agent); update_agent, prepare and the
+alias publish only run when something they cover changed, so a no-change run
+publishes no new version. --plan prints that diff and exits; --force restores
+the unconditional update/prepare/publish.
+
+--targets env:region,... provisions several targets concurrently (e.g. a DR
+region alongside us-east-1), each with its own boto3 session, with output
+lines prefixed by target and a result table at the end. Any failed target
+fails the run. Target regions are limited to TARGET_REGIONS, the regions the
+OIDC deploy role may provision agents in.
 """
 
 import argparse
 import boto3
+import contextvars
 import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from botocore.exceptions import ClientError
 
+import waiters
+
 # The single agent this system uses. The Lambda answers primarily via direct
 # knowledge-base RetrieveAndGenerate (A-08); this agent is the legacy/backup
 # conversational path and is grounded in the same knowledge base.
@@ -46,10 +62,19 @@ sentences. Adapt your communication style based on the persona configuration
 provided in session attributes. Never ask for or accept payment or card details.""",
 }
 
+AGENT_IDLE_SESSION_TTL = 600
+
 # Orphaned sub-agent base names from the old multi-agent topology. They are
 # deleted if found (idempotent: absent == already done).
 ORPHANED_AGENT_NAMES = ["DiagnosticAgent", "PlatformAgent", "EscalationAgent"]
 
+ENVIRONMENTS = ['prod']
+
+# Regions --targets accepts: the primary region and the DR region. The OIDC
+# deploy role (infrastructure/oidc-bootstrap.yaml) only grants Bedrock and SSM
+# in these, so any other region would fail with AccessDenied part-way through.
+TARGET_REGIONS = ['us-east-1', 'us-west-2']
+
 # Model configurations (supervisor only — sub-agents no longer exist).
 MODELS = {
     "anthropic": {
@@ -64,19 +89,19 @@ MODELS = {
 }
 
 
-def get_bedrock_client(region):
+def get_bedrock_client(region, session=None):
     """Create Bedrock agent (control plane) client"""
-    return boto3.client('bedrock-agent', region_name=region)
+    return (session or boto3).client('bedrock-agent', region_name=region)
 
 
-def get_ssm_client(region):
+def get_ssm_client(region, session=None):
     """Create SSM client"""
-    return boto3.client('ssm', region_name=region)
+    return (session or boto3).client('ssm', region_name=region)
 
 
-def get_iam_client(region):
+def get_iam_client(region, session=None):
     """Create IAM client"""
-    return boto3.client('iam', region_name=region)
+    return (session or boto3).client('iam', region_name=region)
 
 
 def get_agent_role_arn(iam_client, environment):
@@ -136,98 +161,348 @@ def get_guardrail_config(ssm_client, environment):
         return None, None
 
 
-def check_agent_exists(client, agent_name):
+def list_agents_by_name(client):
+    """Return {agentName: agentId} for every agent in one paginated listing.
+
+    Raises ClientError if the listing fails.
+    """
+    agents = {}
+    paginator = client.get_paginator('list_agents')
+    for page in paginator.paginate():
+        for agent in page.get('agentSummaries', []):
+            agents[agent['agentName']] = agent['agentId']
+    return agents
+
+
+class AgentInventory:
+    """Cached control-plane listings: agents, aliases and DRAFT KB associations.
+
+    Each listing is read once and then served from memory. Code that mutates
+    one of them calls the matching invalidate_* so the next lookup re-reads
+    it. A failed listing raises ClientError and caches nothing.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        self.listings = 0
+        self._agents = None
+        self._aliases = {}
+        self._knowledge_bases = {}
+
+    def agents(self, refresh=False):
+        """Return {agentName: agentId}."""
+        if self._agents is None or refresh:
+            self.listings += 1
+            self._agents = list_agents_by_name(self.client)
+        return self._agents
+
+    def aliases(self, agent_id):
+        """Return {agentAliasName: alias summary} for the agent."""
+        if agent_id not in self._aliases:
+            self.listings += 1
+            aliases = {}
+            paginator = self.client.get_paginator('list_agent_aliases')
+            for page in paginator.paginate(agentId=agent_id):
+                for alias in page.get('agentAliasSummaries', []):
+                    aliases[alias['agentAliasName']] = alias
+            self._aliases[agent_id] = aliases
+        return self._aliases[agent_id]
+
+    def knowledge_bases(self, agent_id):
+        """Return {knowledgeBaseId: knowledgeBaseState} for the agent's DRAFT."""
+        if agent_id not in self._knowledge_bases:
+            self.listings += 1
+            kbs = {}
+            paginator = self.client.get_paginator('list_agent_knowledge_bases')
+            for page in paginator.paginate(agentId=agent_id, agentVersion='DRAFT'):
+                for kb in page.get('agentKnowledgeBaseSummaries', []):
+                    kbs[kb['knowledgeBaseId']] = kb.get('knowledgeBaseState', 'ENABLED')
+            self._knowledge_bases[agent_id] = kbs
+        return self._knowledge_bases[agent_id]
+
+    def invalidate_agents(self):
+        self._agents = None
+
+    def invalidate_aliases(self, agent_id):
+        self._aliases.pop(agent_id, None)
+
+    def invalidate_knowledge_bases(self, agent_id):
+        self._knowledge_bases.pop(agent_id, None)
+
+
+def resolve_inventory(client, inventory):
+    """The shared inventory, or a private one when the caller has none."""
+    return inventory if inventory is not None else AgentInventory(client)
+
+
+def check_agent_exists(client, agent_name, inventory=None):
     """Check if an agent with the given name exists; return its ID or None"""
     try:
-        paginator = client.get_paginator('list_agents')
-        for page in paginator.paginate():
-            for agent in page.get('agentSummaries', []):
-                if agent['agentName'] == agent_name:
-                    return agent['agentId']
+        return resolve_inventory(client, inventory).agents().get(agent_name)
     except ClientError as e:
         print(f"Error listing agents: {e}")
     return None
 
 
-def delete_orphaned_agents(client, environment):
+def delete_orphaned_agents(client, environment, inventory=None):
     """Delete the legacy sub-agents from the old multi-agent topology.
 
-    Idempotent: agents that are already gone are skipped. Returns the list of
-    orphan names that still exist after the deletion attempts (empty = clean).
+    Agents are listed once, every orphan found is deleted concurrently, and
+    the deletions are awaited together with one listing per poll. Idempotent:
+    agents that are already gone are skipped. Returns the list of orphan
+    names that still exist after the deletion attempts (empty = clean).
     """
-    remaining = []
+    inventory = resolve_inventory(client, inventory)
+    try:
+        agents = inventory.agents()
+    except ClientError as e:
+        print(f"Error listing agents: {e}")
+        agents = {}
+
+    targets = {}
     for base_name in ORPHANED_AGENT_NAMES:
         agent_name = f"{base_name}-{environment}"
-        agent_id = check_agent_exists(client, agent_name)
-        if not agent_id:
+        if agent_name in agents:
+            targets[agent_name] = agents[agent_name]
+        else:
             print(f"Orphaned agent {agent_name}: not found (already deleted)")
-            continue
-        print(f"Deleting orphaned agent {agent_name} (ID: {agent_id})...")
+    if not targets:
+        return []
+
+    def delete(agent_name):
         try:
-            client.delete_agent(agentId=agent_id, skipResourceInUseCheck=True)
+            client.delete_agent(agentId=targets[agent_name], skipResourceInUseCheck=True)
+            return None
         except ClientError as e:
-            print(f"  Error deleting {agent_name}: {e}")
+            return e
+
+    for agent_name, agent_id in targets.items():
+        print(f"Deleting orphaned agent {agent_name} (ID: {agent_id})...")
+    remaining = []
+    with ThreadPoolExecutor(max_workers=len(targets)) as pool:
+        futures = [pool.submit(contextvars.copy_context().run, delete, agent_name)
+                   for agent_name in targets]
+        errors = dict(zip(targets, (future.result() for future in futures)))
+    inventory.invalidate_agents()
+    for agent_name, error in errors.items():
+        if error is not None:
+            print(f"  Error deleting {agent_name}: {error}")
             remaining.append(agent_name)
-            continue
-        # Wait for the deletion to complete so the final assertion is accurate.
-        deadline = time.time() + 120
-        while time.time() < deadline:
-            if check_agent_exists(client, agent_name) is None:
-                print(f"  Deleted {agent_name}")
-                break
-            time.sleep(5)
-        else:
+    pending = [name for name in targets if name not in remaining]
+    if not pending:
+        return remaining
+
+    def still_listed():
+        listed = inventory.agents(refresh=True)
+        return [name for name in pending if name in listed]
+
+    # Wait for the deletions to complete so the final assertion is accurate.
+    result = waiters.Waiter(
+        "orphan deletion", still_listed,
+        done=lambda still_present: not still_present,
+        retry_on=(ClientError,),
+    ).wait()
+    still_present = pending if result.state is None else result.state
+    for agent_name in pending:
+        if agent_name in still_present:
             print(f"  Timeout waiting for {agent_name} deletion")
             remaining.append(agent_name)
+        else:
+            print(f"  Deleted {agent_name}")
     return remaining
 
 
+def desired_agent_fields(agent_config, role_arn, model_id, environment,
+                         guardrail_id=None, guardrail_version=None):
+    """The agent fields create_agent/update_agent are called with.
+
+    guardrailConfiguration is only included when both guardrail values are
+    present.
+    """
+    fields = {
+        'agentName': f"{agent_config['name']}-{environment}",
+        'agentResourceRoleArn': role_arn,
+        'description': agent_config['description'],
+        'instruction': agent_config['instruction'],
+        'foundationModel': model_id,
+        'idleSessionTTLInSeconds': AGENT_IDLE_SESSION_TTL,
+    }
+    if guardrail_id and guardrail_version:
+        fields['guardrailConfiguration'] = {
+            'guardrailIdentifier': guardrail_id,
+            'guardrailVersion': guardrail_version,
+        }
+    return fields
+
+
+def agent_field_diff(agent, desired):
+    """Return {field: (deployed, desired)} for every field that differs.
+
+    The guardrail identifier may come back from get_agent as an ARN; it
+    matches when it ends with the configured ID.
+    """
+    changes = {}
+    for field, want in desired.items():
+        have = agent.get(field)
+        if field == 'guardrailConfiguration' and have:
+            have_id = have.get('guardrailIdentifier', '')
+            same_id = have_id == want['guardrailIdentifier'] or \
+                have_id.endswith(f"/{want['guardrailIdentifier']}")
+            if same_id and have.get('guardrailVersion') == want['guardrailVersion']:
+                continue
+        elif have == want:
+            continue
+        changes[field] = (have, want)
+    return changes
+
+
+def find_alias(client, agent_id, full_alias_name, inventory=None):
+    """Return the summary of the named alias, or None."""
+    try:
+        return resolve_inventory(client, inventory).aliases(agent_id).get(full_alias_name)
+    except ClientError as e:
+        print(f"Error listing aliases: {e}")
+    return None
+
+
+def plan_agent(client, desired, kb_id, alias_name, environment, inventory=None):
+    """Compare the deployed agent with the desired one; return the plan.
+
+    The plan records what differs and which steps are needed:
+      update_agent  agent missing or any field in agent_changes differs
+      update_kb     the KB is not associated+ENABLED, or stale KBs are attached
+      prepare       any of the above, or the agent is not PREPARED
+      publish       prepare, or the alias is missing, not PREPARED, or was last
+                    updated before the agent was last prepared
+    Anything that cannot be read is planned as a change.
+    """
+    inventory = resolve_inventory(client, inventory)
+    plan = {
+        'agent_name': desired['agentName'],
+        'agent_id': check_agent_exists(client, desired['agentName'], inventory),
+        'agent_changes': {},
+        'agent_status': None,
+        'kb_id': kb_id,
+        'kb_state': None,
+        'stale_kb_ids': [],
+        'alias_name': f"{alias_name}-{environment}",
+        'alias_id': None,
+        'alias_status': None,
+    }
+    if not plan['agent_id']:
+        plan['agent_changes'] = {field: (None, want) for field, want in desired.items()}
+        plan.update(update_agent=True, update_kb=True, prepare=True, publish=True)
+        return plan
+
+    agent_id = plan['agent_id']
+    prepared_at = None
+    try:
+        agent = client.get_agent(agentId=agent_id)['agent']
+        plan['agent_changes'] = agent_field_diff(agent, desired)
+        plan['agent_status'] = agent['agentStatus']
+        prepared_at = agent.get('preparedAt')
+    except ClientError as e:
+        print(f"Error reading agent {agent_id}: {e}")
+        plan['agent_changes'] = {field: (None, want) for field, want in desired.items()}
+
+    plan['kb_state'] = kb_association_state(client, agent_id, kb_id, inventory)
+    plan['stale_kb_ids'] = [
+        i for i in list_associated_kb_ids(client, agent_id, inventory) if i != kb_id]
+
+    alias_updated_at = None
+    alias = find_alias(client, agent_id, plan['alias_name'], inventory)
+    if alias:
+        plan['alias_id'] = alias['agentAliasId']
+        plan['alias_status'] = alias.get('agentAliasStatus')
+        alias_updated_at = alias.get('updatedAt')
+
+    plan['update_agent'] = bool(plan['agent_changes'])
+    plan['update_kb'] = plan['kb_state'] != 'ENABLED' or bool(plan['stale_kb_ids'])
+    plan['prepare'] = (plan['update_agent'] or plan['update_kb']
+                       or plan['agent_status'] != 'PREPARED')
+    plan['publish'] = (plan['prepare'] or plan['alias_status'] != 'PREPARED'
+                       or not prepared_at or not alias_updated_at
+                       or alias_updated_at < prepared_at)
+    return plan
+
+
+def print_plan(plan):
+    """Print the plan as a human-readable diff."""
+    def short(value):
+        text = str(value)
+        return text if len(text) <= 60 else f"{text[:57]}... ({len(text)} chars)"
+
+    print(f"\n=== Plan for {plan['agent_name']} ===")
+    if not plan['agent_id']:
+        print("  agent: create")
+    elif plan['agent_changes']:
+        print(f"  agent {plan['agent_id']}: update")
+        for field, (have, want) in sorted(plan['agent_changes'].items()):
+            print(f"    {field}: {short(have)} -> {short(want)}")
+    else:
+        print(f"  agent {plan['agent_id']}: no change")
+
+    if plan['stale_kb_ids']:
+        print(f"  knowledge base: disassociate stale {plan['stale_kb_ids']}")
+    if plan['kb_state'] == 'ENABLED':
+        print(f"  knowledge base {plan['kb_id']}: no change")
+    elif plan['kb_state']:
+        print(f"  knowledge base {plan['kb_id']}: re-enable ({plan['kb_state']})")
+    else:
+        print(f"  knowledge base {plan['kb_id']}: associate")
+
+    if plan['prepare']:
+        print(f"  prepare: yes (status {plan['agent_status']})")
+    else:
+        print("  prepare: no (PREPARED and unchanged)")
+
+    if not plan['alias_id']:
+        print(f"  alias {plan['alias_name']}: create")
+    elif plan['publish']:
+        print(f"  alias {plan['alias_name']}: publish new version (status {plan['alias_status']})")
+    else:
+        print(f"  alias {plan['alias_name']}: no change")
+
+
 def create_or_update_agent(client, agent_config, role_arn, model_id, environment,
-                           guardrail_id=None, guardrail_version=None):
+                           guardrail_id=None, guardrail_version=None, plan=None,
+                           inventory=None):
     """Create the supervisor agent, or update it in place if it exists.
 
     When guardrail_id and guardrail_version are both provided, the guardrail is
     attached to the agent (belt-and-suspenders alongside the RetrieveAndGenerate
     guardrail). When absent the kwarg is omitted entirely so existing behaviour
     is unchanged. A guardrail-attach failure prints a warning but does not crash.
+
+    With a plan (see plan_agent) whose agent exists and is unchanged, no
+    update is made.
     """
     agent_name = f"{agent_config['name']}-{environment}"
-    existing_id = check_agent_exists(client, agent_name)
+    inventory = resolve_inventory(client, inventory)
+    if plan is not None:
+        existing_id = plan['agent_id']
+        if existing_id and not plan['update_agent']:
+            print(f"Agent {agent_name} is up to date (ID: {existing_id})")
+            return existing_id
+    else:
+        existing_id = check_agent_exists(client, agent_name, inventory)
 
-    # Build optional guardrail kwarg only when both values are present.
-    guardrail_kwargs = {}
-    if guardrail_id and guardrail_version:
-        guardrail_kwargs['guardrailConfiguration'] = {
-            'guardrailIdentifier': guardrail_id,
-            'guardrailVersion': guardrail_version,
-        }
+    fields = desired_agent_fields(agent_config, role_arn, model_id, environment,
+                                  guardrail_id, guardrail_version)
+    # The guardrail kwarg is only present when both values are; without it the
+    # call is retried if the guardrail attach fails.
+    fallback = {k: v for k, v in fields.items() if k != 'guardrailConfiguration'}
+    with_guardrail = fallback != fields
 
     if existing_id:
         print(f"Agent {agent_name} already exists (ID: {existing_id}), updating...")
         try:
-            client.update_agent(
-                agentId=existing_id,
-                agentName=agent_name,
-                agentResourceRoleArn=role_arn,
-                description=agent_config['description'],
-                instruction=agent_config['instruction'],
-                foundationModel=model_id,
-                idleSessionTTLInSeconds=600,
-                **guardrail_kwargs
-            )
+            client.update_agent(agentId=existing_id, **fields)
         except ClientError as e:
-            if guardrail_kwargs:
+            if with_guardrail:
                 print(f"WARNING: failed to attach guardrail during update — continuing without it: {e}")
                 try:
-                    client.update_agent(
-                        agentId=existing_id,
-                        agentName=agent_name,
-                        agentResourceRoleArn=role_arn,
-                        description=agent_config['description'],
-                        instruction=agent_config['instruction'],
-                        foundationModel=model_id,
-                        idleSessionTTLInSeconds=600
-                    )
+                    client.update_agent(agentId=existing_id, **fallback)
                 except ClientError as e2:
                     print(f"Error updating agent: {e2}")
             else:
@@ -235,29 +510,15 @@ def create_or_update_agent(client, agent_config, role_arn, model_id, environment
         return existing_id
 
     print(f"Creating agent: {agent_name}")
+    inventory.invalidate_agents()
     try:
-        response = client.create_agent(
-            agentName=agent_name,
-            agentResourceRoleArn=role_arn,
-            description=agent_config['description'],
-            instruction=agent_config['instruction'],
-            foundationModel=model_id,
-            idleSessionTTLInSeconds=600,
-            **guardrail_kwargs
-        )
+        response = client.create_agent(**fields)
         return response['agent']['agentId']
     except ClientError as e:
-        if guardrail_kwargs:
+        if with_guardrail:
             print(f"WARNING: failed to attach guardrail during create — retrying without it: {e}")
             try:
-                response = client.create_agent(
-                    agentName=agent_name,
-                    agentResourceRoleArn=role_arn,
-                    description=agent_config['description'],
-                    instruction=agent_config['instruction'],
-                    foundationModel=model_id,
-                    idleSessionTTLInSeconds=600
-                )
+                response = client.create_agent(**fallback)
                 return response['agent']['agentId']
             except ClientError as e2:
                 print(f"Error creating agent {agent_name}: {e2}")
@@ -266,59 +527,55 @@ def create_or_update_agent(client, agent_config, role_arn, model_id, environment
         return None
 
 
-def wait_for_agent_ready(client, agent_id, target_states, timeout=120):
-    """Wait for agent to reach one of the target states"""
-    print(f"Waiting for agent {agent_id} to reach state: {target_states}...")
-    start_time = time.time()
-
-    while time.time() - start_time < timeout:
-        try:
-            response = client.get_agent(agentId=agent_id)
-            status = response['agent']['agentStatus']
-            print(f"  Agent status: {status}")
+def agent_waiter(client, agent_id, target_states, timeout=120):
+    """Waiter for the agent reaching one of target_states (FAILED is terminal)."""
+    def probe():
+        agent = client.get_agent(agentId=agent_id)['agent']
+        status = agent['agentStatus']
+        print(f"  Agent status: {status}")
+        if status == 'FAILED':
+            print(f"  Agent failed: {agent.get('failureReasons', 'Unknown')}")
+        return status
 
-            if status in target_states:
-                return status
-            elif status == 'FAILED':
-                print(f"  Agent failed: {response['agent'].get('failureReasons', 'Unknown')}")
-                return status
+    return waiters.Waiter(
+        f"agent {agent_id}", probe,
+        done=lambda status: status in target_states,
+        failed=lambda status: status == 'FAILED',
+        timeout=timeout, retry_on=(ClientError,))
 
-        except ClientError as e:
-            print(f"  Error checking agent status: {e}")
 
-        time.sleep(5)
+def wait_for_agent_ready(client, agent_id, target_states, timeout=120):
+    """Wait for agent to reach one of the target states.
 
-    print(f"Timeout waiting for agent {agent_id}")
-    return None
+    Returns the status reached (FAILED included), or None on timeout.
+    """
+    print(f"Waiting for agent {agent_id} to reach state: {target_states}...")
+    result = agent_waiter(client, agent_id, target_states, timeout).wait()
+    if result.outcome == waiters.TIMEOUT:
+        print(f"Timeout waiting for agent {agent_id}")
+        return None
+    return result.state
 
 
-def kb_association_state(client, agent_id, kb_id):
+def kb_association_state(client, agent_id, kb_id, inventory=None):
     """Return the knowledgeBaseState of the DRAFT association, or None."""
     try:
-        paginator = client.get_paginator('list_agent_knowledge_bases')
-        for page in paginator.paginate(agentId=agent_id, agentVersion='DRAFT'):
-            for kb in page.get('agentKnowledgeBaseSummaries', []):
-                if kb['knowledgeBaseId'] == kb_id:
-                    return kb.get('knowledgeBaseState', 'ENABLED')
+        return resolve_inventory(client, inventory).knowledge_bases(agent_id).get(kb_id)
     except ClientError as e:
         print(f"Error listing agent knowledge bases: {e}")
     return None
 
 
-def list_associated_kb_ids(client, agent_id):
+def list_associated_kb_ids(client, agent_id, inventory=None):
     """Return the list of knowledgeBaseIds currently associated with DRAFT."""
-    ids = []
     try:
-        paginator = client.get_paginator('list_agent_knowledge_bases')
-        for page in paginator.paginate(agentId=agent_id, agentVersion='DRAFT'):
-            for kb in page.get('agentKnowledgeBaseSummaries', []):
-                ids.append(kb['knowledgeBaseId'])
+        return list(resolve_inventory(client, inventory).knowledge_bases(agent_id))
     except ClientError as e:
         print(f"Error listing agent knowledge bases: {e}")
-    return ids
+    return []
 
 
-def disassociate_stale_knowledge_bases(client, agent_id, kb_id):
+def disassociate_stale_knowledge_bases(client, agent_id, kb_id, inventory=None):
     """Remove any DRAFT association whose KB id is not the current kb_id.
 
     When the knowledge base is recreated with a new id, the agent keeps a
@@ -326,10 +583,12 @@ def disassociate_stale_knowledge_bases(client, agent_id, kb_id):
     AssociateAgentKnowledgeBase with a name-conflict ConflictException, so the
     stale association must be removed before associating the current KB.
     """
-    for stale_id in list_associated_kb_ids(client, agent_id):
+    inventory = resolve_inventory(client, inventory)
+    for stale_id in list_associated_kb_ids(client, agent_id, inventory):
         if stale_id == kb_id:
             continue
         print(f"Disassociating stale knowledge base {stale_id} from agent {agent_id}...")
+        inventory.invalidate_knowledge_bases(agent_id)
         try:
             client.disassociate_agent_knowledge_base(
                 agentId=agent_id,
@@ -340,7 +599,7 @@ def disassociate_stale_knowledge_bases(client, agent_id, kb_id):
             print(f"Warning: could not disassociate stale knowledge base {stale_id}: {e}")
 
 
-def associate_knowledge_base(client, agent_id, kb_id):
+def associate_knowledge_base(client, agent_id, kb_id, inventory=None):
     """Associate (or re-enable) the knowledge base on the agent's DRAFT version.
 
     Idempotent: an existing ENABLED association is left alone; a DISABLED one
@@ -352,11 +611,13 @@ def associate_knowledge_base(client, agent_id, kb_id):
                    "Search it before answering any troubleshooting question.")
     # Drop associations to any other (stale/recreated) KB first, otherwise the
     # associate call below fails with a name-conflict ConflictException.
-    disassociate_stale_knowledge_bases(client, agent_id, kb_id)
-    state = kb_association_state(client, agent_id, kb_id)
+    inventory = resolve_inventory(client, inventory)
+    disassociate_stale_knowledge_bases(client, agent_id, kb_id, inventory)
+    state = kb_association_state(client, agent_id, kb_id, inventory)
     if state == 'ENABLED':
         print(f"Knowledge base {kb_id} already associated and ENABLED")
         return True
+    inventory.invalidate_knowledge_bases(agent_id)
     if state is not None:
         print(f"Knowledge base {kb_id} associated but {state}; re-enabling...")
         try:
@@ -392,8 +653,12 @@ def associate_knowledge_base(client, agent_id, kb_id):
         return False
 
 
-def prepare_agent(client, agent_id):
-    """Prepare the agent so the DRAFT changes (instruction + KB) take effect."""
+def prepare_agent(client, agent_id, force=True):
+    """Prepare the agent so the DRAFT changes (instruction + KB) take effect.
+
+    With force=False an agent that is already PREPARED is left as is (the
+    caller has established that DRAFT is unchanged).
+    """
     print(f"Waiting for agent {agent_id} to finish creating...")
     ready_status = wait_for_agent_ready(
         client, agent_id, ['NOT_PREPARED', 'PREPARED', 'FAILED'], timeout=120)
@@ -405,8 +670,12 @@ def prepare_agent(client, agent_id):
         print(f"Timeout waiting for agent {agent_id} to finish creating")
         return None
 
-    # Always (re-)prepare: the instruction and/or KB association may have
-    # changed on DRAFT even when the status still says PREPARED.
+    if not force and ready_status == 'PREPARED':
+        print(f"Agent {agent_id} is PREPARED and DRAFT is unchanged; not re-preparing")
+        return ready_status
+
+    # (Re-)prepare: the instruction and/or KB association may have changed on
+    # DRAFT even when the status still says PREPARED.
     print(f"Preparing agent {agent_id}...")
     try:
         client.prepare_agent(agentId=agent_id)
@@ -416,22 +685,59 @@ def prepare_agent(client, agent_id):
         return None
 
 
-def ensure_agent_alias(client, agent_id, alias_name, environment):
+def alias_waiter(client, agent_id, alias_id, timeout=120):
+    """Waiter for the alias settling in PREPARED (FAILED is terminal)."""
+    def probe():
+        alias = client.get_agent_alias(agentId=agent_id, agentAliasId=alias_id)['agentAlias']
+        status = alias['agentAliasStatus']
+        print(f"  Alias status: {status}")
+        if status == 'FAILED':
+            print(f"  Alias failed: {alias.get('failureReasons', 'Unknown')}")
+        return status
+
+    return waiters.Waiter(
+        f"alias {alias_id}", probe,
+        done=lambda status: status == 'PREPARED',
+        failed=lambda status: status == 'FAILED',
+        timeout=timeout, retry_on=(ClientError,))
+
+
+def kb_association_waiter(client, agent_id, kb_id, inventory=None, timeout=120):
+    """Waiter for the DRAFT knowledge-base association reading ENABLED."""
+    inventory = resolve_inventory(client, inventory)
+
+    def probe():
+        inventory.invalidate_knowledge_bases(agent_id)
+        state = inventory.knowledge_bases(agent_id).get(kb_id)
+        print(f"  Knowledge base {kb_id} association: {state}")
+        return state
+
+    return waiters.Waiter(
+        f"knowledge base {kb_id}", probe,
+        done=lambda state: state == 'ENABLED',
+        failed=lambda state: state == 'DISABLED',
+        timeout=timeout, retry_on=(ClientError,))
+
+
+def publish_agent_alias(client, agent_id, alias_name, environment, publish=True,
+                        inventory=None):
     """Create the live alias, or update it so a new version is published from
     the freshly prepared DRAFT (update_agent_alias without an explicit routing
-    configuration publishes a new version). Returns the alias ID or None."""
+    configuration publishes a new version). Does not wait for the alias.
+
+    Returns (alias_id, published): alias_id is None when the alias could not
+    be created; published is False when an existing alias was left as is
+    (publish=False), so there is nothing to wait for."""
     full_alias_name = f"{alias_name}-{environment}"
+    inventory = resolve_inventory(client, inventory)
 
-    alias_id = None
-    try:
-        response = client.list_agent_aliases(agentId=agent_id)
-        for alias in response.get('agentAliasSummaries', []):
-            if alias['agentAliasName'] == full_alias_name:
-                alias_id = alias['agentAliasId']
-                break
-    except ClientError as e:
-        print(f"Error listing aliases: {e}")
+    alias = find_alias(client, agent_id, full_alias_name, inventory)
+    alias_id = alias['agentAliasId'] if alias else None
 
+    if alias_id and not publish:
+        print(f"Alias {full_alias_name} ({alias_id}) already serves the prepared agent")
+        return alias_id, False
+    inventory.invalidate_aliases(agent_id)
     if alias_id:
         print(f"Alias {full_alias_name} exists ({alias_id}); publishing new version...")
         try:
@@ -452,26 +758,25 @@ def ensure_agent_alias(client, agent_id, alias_name, environment):
             alias_id = response['agentAlias']['agentAliasId']
         except ClientError as e:
             print(f"Error creating alias: {e}")
-            return None
+            return None, False
+    return alias_id, True
 
-    # Wait for the alias to finish updating/creating.
-    deadline = time.time() + 120
-    while time.time() < deadline:
-        try:
-            response = client.get_agent_alias(agentId=agent_id, agentAliasId=alias_id)
-            status = response['agentAlias']['agentAliasStatus']
-            print(f"  Alias status: {status}")
-            if status == 'PREPARED':
-                return alias_id
-            if status == 'FAILED':
-                print(f"  Alias failed: {response['agentAlias'].get('failureReasons', 'Unknown')}")
-                return alias_id
-        except ClientError as e:
-            print(f"  Error checking alias status: {e}")
-        time.sleep(5)
 
-    print(f"Timeout waiting for alias {alias_id}")
-    return alias_id
+def wait_for_alias_and_knowledge_base(client, agent_id, alias_id, kb_id, published=True,
+                                      inventory=None):
+    """Wait for a just-published alias and the KB association together.
+
+    The alias is only waited on when it was published; the association is
+    always re-read until it is ENABLED. Returns {waiter name: WaitResult}.
+    """
+    pending = [kb_association_waiter(client, agent_id, kb_id, inventory)]
+    if published:
+        pending.append(alias_waiter(client, agent_id, alias_id))
+    results = waiters.wait_all(pending)
+    for name, result in results.items():
+        if result.outcome == waiters.TIMEOUT:
+            print(f"Timeout waiting for {name}")
+    return results
 
 
 def store_ssm_parameter(ssm_client, name, value, description):
@@ -489,9 +794,11 @@ def store_ssm_parameter(ssm_client, name, value, description):
         print(f"Error storing SSM parameter {name}: {e}")
 
 
-def assert_single_prepared_agent(client, agent_id, kb_id, environment, orphans_remaining):
+def assert_single_prepared_agent(client, agent_id, kb_id, environment, orphans_remaining,
+                                 inventory=None):
     """Final invariant check: exactly one prepared headset agent, KB attached,
     orphans gone. Returns True when everything holds."""
+    inventory = resolve_inventory(client, inventory)
     ok = True
 
     try:
@@ -505,7 +812,7 @@ def assert_single_prepared_agent(client, agent_id, kb_id, environment, orphans_r
     else:
         print(f"ASSERT OK: supervisor agent {agent_id} is PREPARED")
 
-    state = kb_association_state(client, agent_id, kb_id)
+    state = kb_association_state(client, agent_id, kb_id, inventory)
     if state != 'ENABLED':
         print(f"ASSERT FAIL: knowledge base {kb_id} association state is {state}, want ENABLED")
         ok = False
@@ -518,7 +825,7 @@ def assert_single_prepared_agent(client, agent_id, kb_id, environment, orphans_r
     else:
         for base_name in ORPHANED_AGENT_NAMES:
             agent_name = f"{base_name}-{environment}"
-            if check_agent_exists(client, agent_name):
+            if check_agent_exists(client, agent_name, inventory):
                 print(f"ASSERT FAIL: orphaned agent {agent_name} still exists")
                 ok = False
         if ok:
@@ -527,67 +834,78 @@ def assert_single_prepared_agent(client, agent_id, kb_id, environment, orphans_r
     return ok
 
 
-def main():
-    parser = argparse.ArgumentParser(description='Create the Bedrock supervisor agent for Headset Support')
-    parser.add_argument('--environment', '-e', default='prod', choices=['prod'],
-                        help='Deployment environment')
-    parser.add_argument('--region', '-r', default='us-east-1', help='AWS region')
-    parser.add_argument('--model-provider', '-m', default='anthropic', choices=['anthropic', 'llama'],
-                        help='Model provider (anthropic or llama)')
-    parser.add_argument('--dry-run', action='store_true', help='Print what would be done without making changes')
-
-    args = parser.parse_args()
+def provision(args, environment, region):
+    """Provision the supervisor agent for one (environment, region) target.
 
+    Returns a summary dict ({'result', 'agent_id', 'alias_id'}); failures
+    exit via sys.exit(1) as before.
+    """
     model_id = MODELS[args.model_provider]['supervisor']
 
-    print(f"Configuring Bedrock supervisor agent for environment: {args.environment}")
-    print(f"Region: {args.region}")
+    print(f"Configuring Bedrock supervisor agent for environment: {environment}")
+    print(f"Region: {region}")
     print(f"Model provider: {args.model_provider} ({model_id})")
 
     if args.dry_run:
         print("\n*** DRY RUN - No changes will be made ***\n")
         print(f"Would delete orphaned sub-agents (if present): "
-              f"{[f'{n}-{args.environment}' for n in ORPHANED_AGENT_NAMES]}")
-        print(f"Would create/update agent: {SUPERVISOR_AGENT['name']}-{args.environment}")
+              f"{[f'{n}-{environment}' for n in ORPHANED_AGENT_NAMES]}")
+        print(f"Would create/update agent: {SUPERVISOR_AGENT['name']}-{environment}")
         print(f"  Model: {model_id}")
         print(f"  Description: {SUPERVISOR_AGENT['description'][:60]}...")
-        print(f"Would associate knowledge base from SSM /headset-agent/{args.environment}/kb-id")
+        print(f"Would associate knowledge base from SSM /headset-agent/{environment}/kb-id")
         print("Would prepare the agent, publish the live alias, and update SSM parameters")
-        return
+        return {'result': 'DRY-RUN'}
 
-    # Initialize clients
-    bedrock_client = get_bedrock_client(args.region)
-    ssm_client = get_ssm_client(args.region)
-    iam_client = get_iam_client(args.region)
+    # Initialize clients (from a session of this target's own).
+    session = boto3.session.Session()
+    bedrock_client = get_bedrock_client(region, session)
+    ssm_client = get_ssm_client(region, session)
+    iam_client = get_iam_client(region, session)
 
     # Get agent role ARN
-    role_arn = get_agent_role_arn(iam_client, args.environment)
+    role_arn = get_agent_role_arn(iam_client, environment)
     if not role_arn:
         print("ERROR: Could not find Bedrock agent role. Deploy infrastructure first.")
         sys.exit(1)
     print(f"Using role: {role_arn}")
 
     # Knowledge base ID is mandatory: the agent must be KB-grounded (A-07).
-    kb_id = get_kb_id(ssm_client, args.environment)
+    kb_id = get_kb_id(ssm_client, environment)
     if not kb_id:
         print("ERROR: Knowledge base ID not available. Deploy infrastructure (KB stack) first.")
         sys.exit(1)
     print(f"Using knowledge base: {kb_id}")
 
     # A-09: guardrail is optional — absence is non-fatal, agent runs without it.
-    guardrail_id, guardrail_version = get_guardrail_config(ssm_client, args.environment)
+    guardrail_id, guardrail_version = get_guardrail_config(ssm_client, environment)
     if guardrail_id and guardrail_version:
         print(f"Using guardrail: {guardrail_id} (version {guardrail_version})")
     else:
         print("Guardrail not configured — agent will be created/updated without one")
 
+    desired = desired_agent_fields(SUPERVISOR_AGENT, role_arn, model_id, environment,
+                                   guardrail_id, guardrail_version)
+    # One inventory for the whole run: every lookup below is served from it.
+    inventory = AgentInventory(bedrock_client)
+    plan = plan_agent(bedrock_client, desired, kb_id, "live", environment, inventory)
+    if args.force:
+        plan.update(update_agent=True, prepare=True, publish=True)
+    print_plan(plan)
+    if args.plan:
+        orphans = [n for n in (f"{b}-{environment}" for b in ORPHANED_AGENT_NAMES)
+                   if check_agent_exists(bedrock_client, n, inventory)]
+        print(f"  orphaned sub-agents: {'delete ' + str(orphans) if orphans else 'none'}")
+        return {'result': 'PLANNED', 'agent_id': plan['agent_id'], 'alias_id': plan['alias_id']}
+
     # 1. Remove the orphaned sub-agents from the old multi-agent topology.
-    orphans_remaining = delete_orphaned_agents(bedrock_client, args.environment)
+    orphans_remaining = delete_orphaned_agents(bedrock_client, environment, inventory)
 
     # 2. Create/update the single supervisor agent.
     agent_id = create_or_update_agent(
-        bedrock_client, SUPERVISOR_AGENT, role_arn, model_id, args.environment,
-        guardrail_id=guardrail_id, guardrail_version=guardrail_version)
+        bedrock_client, SUPERVISOR_AGENT, role_arn, model_id, environment,
+        guardrail_id=guardrail_id, guardrail_version=guardrail_version, plan=plan,
+        inventory=inventory)
     if not agent_id:
         print("ERROR: Could not create or update the supervisor agent.")
         sys.exit(1)
@@ -600,29 +918,35 @@ def main():
 
     # 3. Associate the knowledge base with DRAFT before preparing so the
     #    prepared version serves it.
-    if not associate_knowledge_base(bedrock_client, agent_id, kb_id):
+    if not associate_knowledge_base(bedrock_client, agent_id, kb_id, inventory):
         print("ERROR: Could not associate the knowledge base with the agent.")
         sys.exit(1)
 
     # 4. Prepare and publish via the live alias.
-    status = prepare_agent(bedrock_client, agent_id)
+    status = prepare_agent(bedrock_client, agent_id, force=plan['prepare'])
     if status != 'PREPARED':
         print(f"ERROR: Supervisor agent is not prepared (status: {status})")
         sys.exit(1)
 
-    alias_id = ensure_agent_alias(bedrock_client, agent_id, "live", args.environment)
+    # The alias publish and the KB association (read back for the final
+    # assertion) are waited on together rather than one after the other.
+    alias_id, published = publish_agent_alias(bedrock_client, agent_id, "live", environment,
+                                              publish=plan['publish'], inventory=inventory)
+    if alias_id:
+        wait_for_alias_and_knowledge_base(bedrock_client, agent_id, alias_id, kb_id,
+                                          published, inventory)
 
     # 5. Store the parameters the lex-lambda reads.
     store_ssm_parameter(
         ssm_client,
-        f"/headset-agent/{args.environment}/supervisor-agent-id",
+        f"/headset-agent/{environment}/supervisor-agent-id",
         agent_id,
         "Bedrock Supervisor Agent ID"
     )
     if alias_id:
         store_ssm_parameter(
             ssm_client,
-            f"/headset-agent/{args.environment}/supervisor-agent-alias",
+            f"/headset-agent/{environment}/supervisor-agent-alias",
             alias_id,
             "Bedrock Supervisor Agent Alias ID"
         )
@@ -633,12 +957,169 @@ def main():
     # 6. Assert the final topology: one prepared agent, KB attached, no orphans.
     print("\n=== Verifying final topology ===")
     if not assert_single_prepared_agent(bedrock_client, agent_id, kb_id,
-                                        args.environment, orphans_remaining):
+                                        environment, orphans_remaining, inventory):
         print("ERROR: Final topology assertion failed.")
         sys.exit(1)
 
     print("\n=== Agent Configuration Complete ===")
     print(f"  supervisor: {agent_id} (alias: {alias_id}, knowledge base: {kb_id})")
+    print(f"  control-plane listings: {inventory.listings}")
+    return {'result': 'OK', 'agent_id': agent_id, 'alias_id': alias_id}
+
+
+# The target prefix for output written from the current context. A context
+# variable rather than a thread-local so that threads started with a copy of
+# the context (waiters.wait_all, the orphan-delete pool) inherit it.
+OUTPUT_PREFIX = contextvars.ContextVar('output_prefix', default=None)
+
+
+class PrefixedOutput:
+    """sys.stdout stand-in that prefixes each line with its context's target.
+
+    Lines are buffered per thread and written whole, so concurrent targets
+    interleave by line and never mid-line. Output without a prefix is written
+    through unchanged.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+        self.lock = threading.Lock()
+
+    def set_prefix(self, prefix):
+        OUTPUT_PREFIX.set(prefix)
+        self.local.buffer = ''
+
+    def write(self, text):
+        prefix = OUTPUT_PREFIX.get()
+        if prefix is None:
+            with self.lock:
+                return self.stream.write(text)
+        self.local.buffer = getattr(self.local, 'buffer', '') + text
+        *lines, self.local.buffer = self.local.buffer.split('\n')
+        if lines:
+            with self.lock:
+                self.stream.write(''.join(f"[{prefix}] {line}\n" for line in lines))
+        return len(text)
+
+    def flush(self):
+        if OUTPUT_PREFIX.get() is not None and getattr(self.local, 'buffer', ''):
+            self.write('\n')
+        with self.lock:
+            self.stream.flush()
+
+
+def parse_targets(value):
+    """Parse 'env:region,env:region' into a list of (environment, region)."""
+    targets = []
+    for item in value.split(','):
+        item = item.strip()
+        if not item:
+            continue
+        environment, sep, region = item.partition(':')
+        if not sep or not region or environment not in ENVIRONMENTS:
+            print(f"ERROR: invalid target {item!r}: want <environment>:<region> "
+                  f"with environment one of {ENVIRONMENTS}")
+            sys.exit(1)
+        if region not in TARGET_REGIONS:
+            print(f"ERROR: invalid target {item!r}: region must be one of {TARGET_REGIONS}")
+            sys.exit(1)
+        if (environment, region) in targets:
+            print(f"ERROR: duplicate target {item!r}")
+            sys.exit(1)
+        targets.append((environment, region))
+    if not targets:
+        print("ERROR: --targets is empty")
+        sys.exit(1)
+    return targets
+
+
+def provision_all(args, targets):
+    """Provision every target concurrently; return {target: summary}.
+
+    Each target runs in its own thread with its own boto3 session and
+    clients, and its output is prefixed with 'environment/region'. A target
+    that exits or raises is recorded as FAILED without stopping the others.
+    """
+    output = PrefixedOutput(sys.stdout)
+
+    def run(target):
+        environment, region = target
+        output.set_prefix(f"{environment}/{region}")
+        started = time.monotonic()
+        try:
+            summary = provision(args, environment, region)
+        except SystemExit as e:
+            summary = {'result': 'FAILED', 'error': f"exit {e.code}"}
+        except Exception as e:
+            print(f"ERROR: {type(e).__name__}: {e}")
+            summary = {'result': 'FAILED', 'error': type(e).__name__}
+        finally:
+            output.flush()
+        summary['elapsed'] = time.monotonic() - started
+        return summary
+
+    sys.stdout = output
+    try:
+        with ThreadPoolExecutor(max_workers=min(args.max_parallel, len(targets))) as pool:
+            # A fresh context per target, so the prefix one target sets never
+            # leaks into the next target run on the same worker thread.
+            futures = [pool.submit(contextvars.copy_context().run, run, target)
+                       for target in targets]
+            summaries = [future.result() for future in futures]
+    finally:
+        sys.stdout = output.stream
+    return dict(zip(targets, summaries))
+
+
+def print_results(results):
+    """Print the consolidated per-target result table."""
+    print("\n=== Provisioning results ===")
+    print(f"  {'target':<24} {'result':<8} {'agent':<12} {'alias':<12} {'time':>7}")
+    for (environment, region), summary in results.items():
+        print(f"  {environment + '/' + region:<24} {summary['result']:<8} "
+              f"{summary.get('agent_id') or '-':<12} {summary.get('alias_id') or '-':<12} "
+              f"{summary['elapsed']:>6.1f}s"
+              + (f"  ({summary['error']})" if summary.get('error') else ''))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Create the Bedrock supervisor agent for Headset Support')
+    parser.add_argument('--environment', '-e', default='prod', choices=ENVIRONMENTS,
+                        help='Deployment environment')
+    parser.add_argument('--region', '-r', default='us-east-1', help='AWS region')
+    parser.add_argument('--targets', default=None,
+                        help='Comma-separated environment:region pairs to provision concurrently, '
+                             'e.g. prod:us-east-1,prod:us-west-2 (overrides --environment/--region); '
+                             f'regions must be one of {TARGET_REGIONS}')
+    parser.add_argument('--max-parallel', type=int, default=4,
+                        help='Targets provisioned at once with --targets (default: 4)')
+    parser.add_argument('--model-provider', '-m', default='anthropic', choices=['anthropic', 'llama'],
+                        help='Model provider (anthropic or llama)')
+    parser.add_argument('--dry-run', action='store_true', help='Print what would be done without making changes')
+    parser.add_argument('--plan', action='store_true',
+                        help='Read the deployed agent, print the changes a run would make, and exit')
+    parser.add_argument('--force', action='store_true',
+                        help='Update, re-prepare and publish even when nothing has changed')
+
+    args = parser.parse_args()
+    if args.max_parallel < 1:
+        print(f"ERROR: --max-parallel must be >= 1, got {args.max_parallel}")
+        sys.exit(1)
+
+    if not args.targets:
+        provision(args, args.environment, args.region)
+        return
+
+    targets = parse_targets(args.targets)
+    print(f"Provisioning {len(targets)} target(s), up to {args.max_parallel} at a time: "
+          f"{', '.join(f'{e}/{r}' for e, r in targets)}")
+    results = provision_all(args, targets)
+    print_results(results)
+    failed = [t for t, summary in results.items() if summary['result'] == 'FAILED']
+    if failed:
+        print(f"ERROR: {len(failed)} of {len(targets)} target(s) failed")
+        sys.exit(1)
 
 
 if __name__ == '__main__':
@@ -5,32 +5,192 @@ A-10: Retrieval evaluation gate for the Headset Support Agent knowledge base.
 Runs a golden-question suite against the live Bedrock Knowledge Base and
 asserts that the hit rate meets a minimum threshold (default 90%).
 
+Retriever backends (--backend):
+  bedrock  (default) bedrock-agent-runtime.retrieve against the deployed KB.
+  local    offline BM25 over the local knowledge-base/ tree (scripts/local_kb.py),
+           chunked like the data source and honouring the sidecar metadata.
+           Needs no AWS credentials or network; use it to check a KB edit
+           before deploying. Local scores are lexical, so treat the hit rate
+           as a regression signal rather than a prediction of the live number.
+  vector   offline dense retrieval (scripts/local_vectors.py): the same chunks
+           embedded with a deterministic local model, cached on disk under
+           --vector-cache-dir so only changed chunks are re-embedded, and
+           searched with a NumPy top-k. Needs numpy.
+
+Questions are retrieved concurrently (--concurrency workers) and scored in
+golden-file order, so the report is identical run to run. Bedrock calls go
+through a shared token bucket capped at --max-tps; a throttled call halves
+the bucket rate (recovering additively on success) and is retried with
+jittered exponential backoff instead of failing the gate.
+
 A question PASSES when any of the top-K retrieved results matches the
 expected target:
   - expect_tree_id: metadata['tree_id'] == expected value
   - expect_source:  location.s3Location.uri contains the expected substring
 
+Metadata filters: an entry may carry a "filter" object over the sidecar
+attributes brand, platform and connection_type. A string value is an exact
+match and a list is an any-of match, and the RetrievalFilter is built the same
+way buildRetrievalFilter (internal/agents/bedrock.go) builds it — equals
+conditions first, then in, keys sorted, andAll when there is more than one.
+Write {"brand": ["any", "jabra"]} to mirror what kbFilters
+(cmd/lex-lambda/main.go) sends once the caller's brand is known. Filtered
+entries are also retrieved without the filter and the report compares the
+two, along with the share of local chunks the filter leaves as candidates.
+
+Report-only entries: an entry with "gate": false is retrieved, ranked and
+shown in the report (including the filter comparison) but is left out of the
+gate population and the ranked metrics. The filtered variants of existing
+questions are marked this way so they do not count the same question twice.
+
+Ranked metrics: every question is retrieved once at --top-k and the report
+gives each question's first-relevant rank plus MRR, recall@k (the hit rate
+at k) and nDCG@k for every k in 1..top-k. --gate-metric / --gate-k choose
+which of these the threshold applies to (default: hit rate at --top-k, the
+original gate).
+
+Benchmark mode (--benchmark): instead of gating, time every retrieval with
+time.perf_counter across a sweep of --bench-top-k values and
+--bench-concurrency levels and report p50/p90/p99/max latency per config,
+overall and per query-length bucket, as a table plus JSON (--bench-json).
+For the Bedrock backend only the service call is timed (rate-limiter waits
+and backoff sleeps are excluded). Use it to choose kbNumberOfResults in
+internal/agents/bedrock.go against the voice-turn latency budget.
+
+Response cache (--cache): Retrieve responses can be recorded on disk under
+--cache-dir, one JSON file per (kb_id, corpus id, query, top_k, filter) key.
+The corpus id defaults to a hash of the local knowledge-base/ tree (override
+with --corpus-id, e.g. an ingestion job id), so a KB edit never replays stale
+responses. Modes:
+  off      (default) always call the retriever;
+  record   serve hits from the cache, call and store on a miss;
+  replay   cache only — a miss fails; needs no AWS access (pass --kb-id or
+           KB_ID so no SSM lookup is made);
+  refresh  always call and overwrite the cached response.
+Re-scoring after a change to golden expectations or metrics is then instant.
+
+Incremental re-evaluation: every run records each retrieval's results (keyed
+by question, filter and top_k) in --run-record. Given the documents changed
+since that run — --changed-since <git ref>, --changed-files <list file or ->
+or --change-set <sync change set JSON from sync-knowledge-base.py
+--change-set-out> — only the affected shard is retrieved again; everything
+else is scored from the record. A question is affected when a changed doc (or
+its sidecar) is one of its expected targets (docs with the expected tree_id or
+whose key contains expect_source) or was among its recorded results.
+Questions that are new, edited or missing from the record always run. A
+changed doc that never surfaced for a question cannot trigger it, so keep a
+full run (no change flags) on a schedule to catch newly competing docs.
+
 Exit codes:
-  0 — hit rate >= threshold (gate passes)
-  1 — hit rate < threshold OR any unrecoverable error (gate fails)
+  0 — gate metric >= threshold (gate passes)
+  1 — gate metric < threshold OR any unrecoverable error (gate fails)
 
 Usage in CI:
   python scripts/eval-retrieval.py --region us-east-1
+
+Usage offline:
+  python scripts/eval-retrieval.py --backend local
 """
 
 import argparse
+import hashlib
 import json
+import math
 import os
+import random
+import subprocess
 import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 
 import boto3
-from botocore.exceptions import ClientError
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError, HTTPClientError
+from botocore.exceptions import ConnectionError as BotoConnectionError
+
+import local_kb
+import local_vectors
 
 # Default golden-question file path relative to the repo root.
 DEFAULT_GOLDEN = "tests/retrieval/golden.json"
 DEFAULT_THRESHOLD = 0.90
 DEFAULT_TOP_K = 3
 DEFAULT_REGION = "us-east-1"
+BACKENDS = ("bedrock", "local", "vector")
+GATE_METRICS = ("hit_rate", "recall", "mrr", "ndcg")
+
+# Retrieve response cache (see module docstring).
+CACHE_MODES = ("off", "record", "replay", "refresh")
+DEFAULT_CACHE_DIR = ".retrieval-cache"
+
+# Per-retrieval results of the last run, for incremental re-evaluation.
+DEFAULT_RUN_RECORD = os.path.join(DEFAULT_CACHE_DIR, "last-run.json")
+
+# Benchmark sweep defaults; 6 is the production kbNumberOfResults.
+DEFAULT_BENCH_TOP_K = "1,3,6,10"
+DEFAULT_BENCH_CONCURRENCY = "1,4"
+DEFAULT_BENCH_REPEAT = 1
+# Query-length buckets (inclusive word-count upper bounds) for latency splits.
+QUERY_LENGTH_BUCKETS = ((4, "1-4 words"), (7, "5-7 words"), (None, "8+ words"))
+
+# Concurrency and rate limiting for bedrock-agent-runtime.retrieve. Keep
+# DEFAULT_MAX_TPS under the account's Retrieve requests-per-second quota.
+DEFAULT_CONCURRENCY = 4
+DEFAULT_MAX_TPS = 5.0
+MIN_TPS = 0.5
+RETRIEVE_MAX_ATTEMPTS = 6
+RETRIEVE_BACKOFF_BASE_SECONDS = 0.5
+RETRYABLE_ERROR_CODES = {
+    "ThrottlingException",
+    "TooManyRequestsException",
+    "ServiceUnavailableException",
+    "InternalServerException",
+}
+# Connection failures and read timeouts. botocore's own retries are off (see
+# the client Config), so retrieve() retries these itself.
+RETRYABLE_TRANSPORT_ERRORS = (BotoConnectionError, HTTPClientError)
+
+
+class TokenBucket:
+    """Thread-safe token bucket whose rate adapts to throttling (AIMD).
+
+    acquire() blocks until a request may be sent. throttled() halves the
+    current rate (floored at MIN_TPS); succeeded() raises it additively back
+    towards the configured maximum.
+    """
+
+    def __init__(self, max_rate: float):
+        self.max_rate = max_rate
+        self.rate = max_rate
+        self.capacity = max(1.0, max_rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(
+                    self.capacity, self.tokens + (now - self.updated) * self.rate
+                )
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+    def throttled(self):
+        with self.lock:
+            self.rate = max(MIN_TPS, self.rate / 2)
+
+    def succeeded(self):
+        with self.lock:
+            self.rate = min(self.max_rate, self.rate + self.max_rate / 20)
+
+
 SSM_KB_ID_PARAM = "/headset-agent/prod/kb-id"
 
 
@@ -65,116 +225,681 @@ def resolve_kb_id(args, region: str) -> str:
     )
 
 
-def load_golden(path: str) -> list:
-    """Load and validate the golden-question file."""
-    try:
-        with open(path, encoding="utf-8") as fh:
-            data = json.load(fh)
-    except FileNotFoundError:
-        sys.exit(f"ERROR: golden file not found: {path}")
-    except json.JSONDecodeError as exc:
-        sys.exit(f"ERROR: invalid JSON in {path}: {exc}")
-
-    if not isinstance(data, list) or not data:
-        sys.exit(f"ERROR: {path} must be a non-empty JSON array.")
-
-    for i, item in enumerate(data):
-        has_tree = "expect_tree_id" in item
-        has_src = "expect_source" in item
-        if not item.get("q"):
-            sys.exit(f"ERROR: entry {i} is missing 'q'.")
-        if has_tree == has_src:  # both present or neither present
+def retrieve(client, kb_id: str, query: str, top_k: int, limiter=None,
+             timings=None, retrieval_filter=None) -> list:
+    """Call Bedrock retrieve; return list of result dicts (metadata + uri).
+
+    retrieval_filter, when given, is sent as the vector search filter.
+
+    Throttling and transient service errors are retried with jittered
+    exponential backoff (and slow the shared limiter down), as are connection
+    errors and read timeouts; anything else, or running out of attempts,
+    exits non-zero. When timings is a list, the
+    (milliseconds, query) of the successful service call is appended to it.
+    """
+    search = {"numberOfResults": top_k}
+    if retrieval_filter:
+        search["filter"] = retrieval_filter
+    for attempt in range(1, RETRIEVE_MAX_ATTEMPTS + 1):
+        if limiter:
+            limiter.acquire()
+        started = time.perf_counter()
+        try:
+            resp = client.retrieve(
+                knowledgeBaseId=kb_id,
+                retrievalQuery={"text": query},
+                retrievalConfiguration={"vectorSearchConfiguration": search},
+            )
+        except (ClientError, BotoCoreError) as exc:
+            if isinstance(exc, ClientError):
+                code = exc.response.get("Error", {}).get("Code")
+                retryable = code in RETRYABLE_ERROR_CODES
+            else:
+                code = type(exc).__name__
+                retryable = isinstance(exc, RETRYABLE_TRANSPORT_ERRORS)
+            if retryable and attempt < RETRIEVE_MAX_ATTEMPTS:
+                if limiter and isinstance(exc, ClientError):
+                    limiter.throttled()
+                delay = random.uniform(0, RETRIEVE_BACKOFF_BASE_SECONDS * 2 ** attempt)
+                print(f"  {code} on {query!r}; retry {attempt} in {delay:.2f}s")
+                time.sleep(delay)
+                continue
             sys.exit(
-                f"ERROR: entry {i} must have exactly one of "
-                f"'expect_tree_id' or 'expect_source', not both/neither."
+                f"ERROR: bedrock-agent-runtime.retrieve failed: {exc}\n"
+                f"  Query: {query!r}\n"
+                f"  Make sure AWS credentials are configured and the KB id is correct."
             )
+        if timings is not None:
+            timings.append(((time.perf_counter() - started) * 1000.0, query))
+        if limiter:
+            limiter.succeeded()
+        return resp.get("retrievalResults", [])
+
+
+def bedrock_retriever(client, kb_id: str, max_tps: float = DEFAULT_MAX_TPS,
+                      timings=None):
+    """Return a retriever(query, top_k, retrieval_filter=None) backed by the live Bedrock KB.
+
+    All calls made through the returned retriever share one TokenBucket;
+    timings is passed through to retrieve().
+    """
+    limiter = TokenBucket(max_tps)
+
+    def retriever(query: str, top_k: int, retrieval_filter=None) -> list:
+        return retrieve(client, kb_id, query, top_k, limiter, timings,
+                        retrieval_filter)
+    return retriever
+
+
+def timed_retriever(retriever, timings: list):
+    """Wrap a retriever so each call's (milliseconds, query) goes to timings."""
+    def timed(query: str, top_k: int, retrieval_filter=None) -> list:
+        started = time.perf_counter()
+        results = retriever(query, top_k, retrieval_filter)
+        timings.append(((time.perf_counter() - started) * 1000.0, query))
+        return results
+    return timed
+
+
+class ResponseCache:
+    """On-disk Retrieve response cache; one JSON file per request key.
+
+    Files are written atomically (temp file + rename), so concurrent workers
+    and interrupted runs never leave a partial entry behind.
+    """
+
+    def __init__(self, cache_dir: str, kb_id: str, corpus_id: str):
+        self.cache_dir = cache_dir
+        self.kb_id = kb_id
+        self.corpus_id = corpus_id
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
 
-    return data
+    def key(self, query: str, top_k: int, retrieval_filter=None) -> dict:
+        return {
+            "kb_id": self.kb_id,
+            "corpus_id": self.corpus_id,
+            "query": query,
+            "top_k": top_k,
+            "filter": retrieval_filter,
+        }
 
+    def path(self, key: dict) -> str:
+        digest = hashlib.sha256(
+            json.dumps(key, sort_keys=True).encode("utf-8")
+        ).hexdigest()
+        return os.path.join(self.cache_dir, f"{digest}.json")
 
-def retrieve(client, kb_id: str, query: str, top_k: int) -> list:
-    """Call Bedrock retrieve; return list of result dicts (metadata + uri)."""
+    def get(self, key: dict):
+        """Return the cached results for key, or None on a miss."""
+        try:
+            with open(self.path(key), encoding="utf-8") as fh:
+                entry = json.load(fh)
+        except (FileNotFoundError, json.JSONDecodeError):
+            with self.lock:
+                self.misses += 1
+            return None
+        with self.lock:
+            self.hits += 1
+        return entry["results"]
+
+    def put(self, key: dict, results: list):
+        path = self.path(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump({"key": key, "results": results}, fh, indent=1, default=str)
+        os.replace(tmp, path)
+
+
+def cached_retriever(retriever, cache: ResponseCache, mode: str):
+    """Wrap retriever with the response cache in the given mode.
+
+    retriever may be None in replay mode (nothing is ever fetched).
+    """
+    def wrapped(query: str, top_k: int, retrieval_filter=None) -> list:
+        key = cache.key(query, top_k, retrieval_filter)
+        if mode != "refresh":
+            results = cache.get(key)
+            if results is not None:
+                return results
+            if mode == "replay":
+                sys.exit(
+                    f"ERROR: no cached response for {query!r} (top_k={top_k}) in "
+                    f"{cache.cache_dir} — record it first with --cache record."
+                )
+        results = retriever(query, top_k, retrieval_filter)
+        cache.put(key, results)
+        return results
+    return wrapped
+
+
+def record_key(query: str, top_k: int, retrieval_filter=None) -> str:
+    """Key of one retrieval in the run record."""
+    return hashlib.sha256(
+        json.dumps([query, top_k, retrieval_filter], sort_keys=True).encode("utf-8")
+    ).hexdigest()
+
+
+def uri_to_doc_key(uri: str) -> str:
+    """Return the KB key (path under the bucket) of an s3:// result URI."""
+    if uri.startswith("s3://"):
+        return uri[len("s3://"):].partition("/")[2]
+    return uri
+
+
+def load_run_record(path: str, kb_id: str) -> dict:
+    """Return {record_key: {"results", "docs"}} from the last run, or {}.
+
+    A record written for a different KB id is ignored.
+    """
     try:
-        resp = client.retrieve(
-            knowledgeBaseId=kb_id,
-            retrievalQuery={"text": query},
-            retrievalConfiguration={
-                "vectorSearchConfiguration": {"numberOfResults": top_k}
-            },
-        )
-    except ClientError as exc:
-        sys.exit(
-            f"ERROR: bedrock-agent-runtime.retrieve failed: {exc}\n"
-            f"  Query: {query!r}\n"
-            f"  Make sure AWS credentials are configured and the KB id is correct."
-        )
-    return resp.get("retrievalResults", [])
+        with open(path, encoding="utf-8") as fh:
+            record = json.load(fh)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+    if record.get("kb_id") != kb_id:
+        return {}
+    return record.get("retrievals", {})
 
 
-def evaluate(client, kb_id: str, golden: list, top_k: int, threshold: float):
-    """Run the full eval suite; return (passes, total, failures)."""
-    passes = 0
-    failures = []
+def save_run_record(path: str, kb_id: str, retrievals: dict) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump({"kb_id": kb_id, "retrievals": retrievals}, fh, indent=1, default=str)
+    os.replace(tmp, path)
 
-    for item in golden:
-        q = item["q"]
-        results = retrieve(client, kb_id, q, top_k)
 
-        tree_ids = [r.get("metadata", {}).get("tree_id", "") for r in results]
-        uris = [
-            r.get("location", {}).get("s3Location", {}).get("uri", "")
-            for r in results
-        ]
+def recording_retriever(retriever, previous: dict, reusable: set, recorded: dict):
+    """Wrap retriever to reuse and record results by record_key().
 
-        passed = False
-        if "expect_tree_id" in item:
-            expected = item["expect_tree_id"]
-            if expected in tree_ids:
-                passed = True
+    Keys in reusable are answered from previous without calling retriever.
+    Every result served (reused or fresh) is stored in recorded, together with
+    the doc keys it returned. retriever may be None when everything is reusable.
+    """
+    lock = threading.Lock()
+
+    def wrapped(query: str, top_k: int, retrieval_filter=None) -> list:
+        key = record_key(query, top_k, retrieval_filter)
+        if key in reusable:
+            results = previous[key]["results"]
         else:
-            expected = item["expect_source"]
-            if any(expected in uri for uri in uris):
-                passed = True
+            results = retriever(query, top_k, retrieval_filter)
+        docs = sorted({
+            uri_to_doc_key(r.get("location", {}).get("s3Location", {}).get("uri", ""))
+            for r in results
+        })
+        with lock:
+            recorded[key] = {"results": results, "docs": docs}
+        return results
+    return wrapped
+
+
+def changed_doc_keys(paths, kb_dir: str) -> set:
+    """Map changed file paths to KB doc keys.
+
+    Paths may be repo-relative (git, prefixed with kb_dir) or already
+    KB-relative (a sync change set); sidecars map to their doc. Paths outside
+    the KB simply match no question.
+    """
+    prefix = os.path.normpath(kb_dir).replace(os.sep, "/") + "/"
+    keys = set()
+    for path in paths:
+        path = path.strip().replace(os.sep, "/")
+        if not path:
+            continue
+        if path.startswith(prefix):
+            path = path[len(prefix):]
+        if path.endswith(local_kb.METADATA_SUFFIX):
+            path = path[: -len(local_kb.METADATA_SUFFIX)]
+        keys.add(path)
+    return keys
+
+
+def read_changed_paths(args) -> list:
+    """Return the changed file list named by --changed-since/-files/--change-set."""
+    if args.changed_since:
+        try:
+            diff = subprocess.run(
+                ["git", "diff", "--name-only", args.changed_since, "--", args.kb_dir],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            untracked = subprocess.run(
+                ["git", "ls-files", "--others", "--exclude-standard", "--", args.kb_dir],
+                check=True, capture_output=True, text=True,
+            ).stdout
+        except (OSError, subprocess.CalledProcessError) as exc:
+            sys.exit(f"ERROR: git could not list changes since {args.changed_since}: {exc}")
+        return (diff + untracked).splitlines()
+    if args.changed_files:
+        if args.changed_files == "-":
+            return sys.stdin.read().splitlines()
+        try:
+            with open(args.changed_files, encoding="utf-8") as fh:
+                return fh.read().splitlines()
+        except OSError as exc:
+            sys.exit(f"ERROR: cannot read --changed-files: {exc}")
+    try:
+        with open(args.change_set, encoding="utf-8") as fh:
+            change_set = json.load(fh)
+    except (OSError, json.JSONDecodeError) as exc:
+        sys.exit(f"ERROR: cannot read --change-set: {exc}")
+    return [
+        key for kind in ("added", "modified", "deleted") for key in change_set.get(kind, [])
+    ]
+
+
+def target_doc_keys(item: dict, docs: list) -> set:
+    """Doc keys a golden question's expectation points at."""
+    if "expect_tree_id" in item:
+        return {d["key"] for d in docs if d["metadata"].get("tree_id") == item["expect_tree_id"]}
+    return {d["key"] for d in docs if item["expect_source"] in d["key"]}
+
+
+def retrieval_keys(item: dict, top_k: int) -> list:
+    """Record keys of a question's retrievals in evaluate().
+
+    The filtered retrieval and, for filtered questions, the unfiltered
+    comparison retrieval.
+    """
+    retrieval_filter = local_kb.build_retrieval_filter(item.get("filter"))
+    keys = [record_key(item["q"], top_k, retrieval_filter)]
+    if retrieval_filter:
+        keys.append(record_key(item["q"], top_k))
+    return keys
+
+
+def reusable_retrievals(golden: list, top_k: int, previous: dict,
+                        changed: set, docs: list) -> set:
+    """Return the record keys that can be reused given the changed doc keys.
+
+    A question's retrievals (see retrieval_keys) are dropped together when
+    its targets or any of their recorded result lists touch a changed doc.
+    """
+    reusable = set()
+    for item in golden:
+        keys = retrieval_keys(item, top_k)
+        if not all(k in previous for k in keys):
+            continue
+        depends_on = target_doc_keys(item, docs)
+        for k in keys:
+            depends_on.update(previous[k]["docs"])
+        if not depends_on & changed:
+            reusable.update(keys)
+    return reusable
+
+
+def local_retriever(kb_dir: str):
+    """Return a retriever(query, top_k, retrieval_filter=None) backed by the offline BM25 index."""
+    try:
+        index = local_kb.build_index(kb_dir)
+    except FileNotFoundError as exc:
+        sys.exit(f"ERROR: {exc}")
+    print(f"Built local BM25 index: {len(index.chunks)} chunks from {kb_dir}")
+
+    def retriever(query: str, top_k: int, retrieval_filter=None) -> list:
+        return index.search(query, top_k, retrieval_filter)
+    return retriever
 
-        if passed:
-            passes += 1
+
+def vector_retriever(kb_dir: str, cache_dir: str):
+    """Return a retriever(query, top_k, retrieval_filter=None) backed by the local vector index."""
+    started = time.perf_counter()
+    try:
+        index = local_vectors.build_vector_index(kb_dir, cache_dir)
+    except (FileNotFoundError, RuntimeError) as exc:
+        sys.exit(f"ERROR: {exc}")
+    print(
+        f"Built local vector index: {len(index.chunks)} chunks from {kb_dir}, "
+        f"{index.store.embedded} embedded, {len(index.chunks) - index.store.embedded} "
+        f"from cache ({time.perf_counter() - started:.2f}s)"
+    )
+
+    def retriever(query: str, top_k: int, retrieval_filter=None) -> list:
+        return index.search(query, top_k, retrieval_filter)
+    return retriever
+
+
+def filter_selectivity(kb_dir: str, golden: list) -> dict:
+    """Return {entry index: (matching chunks, total chunks)} for filtered entries.
+
+    Counted over the local chunking of kb_dir, as a proxy for how much of the
+    live index each filter leaves for the vector search to scan. Returns {}
+    when kb_dir is not available (e.g. a replay run outside the repo).
+    """
+    try:
+        chunks = local_kb.build_chunks(local_kb.load_documents(kb_dir))
+    except FileNotFoundError:
+        return {}
+    counts = {}
+    for i, item in enumerate(golden):
+        retrieval_filter = local_kb.build_retrieval_filter(item.get("filter"))
+        if retrieval_filter:
+            matching = sum(
+                1 for c in chunks if local_kb.matches_filter(c["metadata"], retrieval_filter)
+            )
+            counts[i] = (matching, len(chunks))
+    return counts
+
+
+def score_question(item: dict, results: list) -> dict:
+    """Grade one question's ranked results against its expected target.
+
+    Returns {"relevance": [0/1 per result], "rank": 1-based rank of the first
+    relevant result or None, "tree_ids": [...], "uris": [...]}.
+    """
+    tree_ids = [r.get("metadata", {}).get("tree_id", "") for r in results]
+    uris = [
+        r.get("location", {}).get("s3Location", {}).get("uri", "")
+        for r in results
+    ]
+    if "expect_tree_id" in item:
+        expected = item["expect_tree_id"]
+        relevance = [1 if t == expected else 0 for t in tree_ids]
+    else:
+        expected = item["expect_source"]
+        relevance = [1 if expected in uri else 0 for uri in uris]
+    rank = relevance.index(1) + 1 if 1 in relevance else None
+    return {"relevance": relevance, "rank": rank, "tree_ids": tree_ids, "uris": uris}
+
+
+def ranked_metrics(scored: list, max_k: int) -> dict:
+    """Aggregate MRR and per-k recall/hit rate and nDCG over scored questions.
+
+    Each question has exactly one target (a tree or a source doc), so
+    recall@k is the fraction of questions whose target appears in the top k
+    (the original binary hit rate is recall@top_k). nDCG@k uses binary
+    relevance per retrieved chunk; the ideal ranking places every relevant
+    chunk found in the top max_k first. MRR is computed over the top max_k.
+    Returns {"mrr": float, "recall": {k: float}, "ndcg": {k: float}}.
+    """
+    total = len(scored)
+    metrics = {"mrr": 0.0, "recall": {}, "ndcg": {}}
+    if not total:
+        return metrics
+    metrics["mrr"] = sum(1.0 / q["rank"] for q in scored if q["rank"]) / total
+    for k in range(1, max_k + 1):
+        metrics["recall"][k] = sum(
+            1 for q in scored if q["rank"] and q["rank"] <= k
+        ) / total
+        ndcg_sum = 0.0
+        for q in scored:
+            rel = q["relevance"][:k]
+            dcg = sum(r / math.log2(i + 2) for i, r in enumerate(rel))
+            ideal_hits = min(k, sum(q["relevance"]))
+            idcg = sum(1 / math.log2(i + 2) for i in range(ideal_hits))
+            ndcg_sum += dcg / idcg if idcg else 0.0
+        metrics["ndcg"][k] = ndcg_sum / total
+    return metrics
+
+
+def gate_value(metrics: dict, gate_metric: str, gate_k: int) -> float:
+    """Return the metric value the gate compares against the threshold."""
+    if gate_metric == "mrr":
+        return metrics["mrr"]
+    if gate_metric == "ndcg":
+        return metrics["ndcg"][gate_k]
+    return metrics["recall"][gate_k]  # hit_rate and recall are the same number
+
+
+def compare_filtered(golden: list, scored: list, unfiltered: dict,
+                     selectivity: dict, top_k: int) -> None:
+    """Print filtered vs unfiltered ranks and metrics for filtered entries.
+
+    unfiltered maps entry index -> score_question() of the unfiltered
+    retrieval; selectivity is filter_selectivity() output (may be empty).
+    """
+    indexes = sorted(unfiltered)
+    print(f"\nMetadata filters: {len(indexes)} filtered question(s)")
+    print("Filt  Unf  Candidates  Question")
+    for i in indexes:
+        if i in selectivity:
+            matching, total = selectivity[i]
+            candidates = f"{matching}/{total}"
         else:
-            failures.append((q, tree_ids, uris, item))
+            candidates = "?"
+        print(
+            f"{scored[i]['rank'] or '-':>4}  {unfiltered[i]['rank'] or '-':>3}  "
+            f"{candidates:>10}  {golden[i]['q']}"
+        )
+    filtered_metrics = ranked_metrics([scored[i] for i in indexes], top_k)
+    unfiltered_metrics = ranked_metrics([unfiltered[i] for i in indexes], top_k)
+    print(f"            hit@{top_k}    MRR")
+    for label, m in (("filtered", filtered_metrics), ("unfiltered", unfiltered_metrics)):
+        print(f"{label:>10}  {m['recall'][top_k]:>6.3f}  {m['mrr']:>5.3f}")
+
 
-    total = len(golden)
-    hit_rate = passes / total if total else 0.0
+def evaluate(retriever, golden: list, top_k: int, threshold: float,
+             concurrency: int = 1, gate_metric: str = "hit_rate",
+             gate_k: int = None, selectivity: dict = None):
+    """Run the full eval suite; return True when the gate metric meets threshold.
 
-    # Print failures.
-    for (q, tree_ids, uris, item) in failures:
+    retriever is a callable(query, top_k, retrieval_filter=None) -> list of
+    retrievalResults, from bedrock_retriever() or local_retriever(). Questions
+    are retrieved once at depth top_k (with their metadata filter, if any) on a
+    pool of `concurrency` workers and scored in golden order; every metric for
+    k=1..top_k is derived from that single retrieval. Filtered questions are
+    also retrieved without their filter for the comparison report. The gate
+    checks gate_metric@gate_k (gate_k defaults to top_k) over the entries not
+    marked "gate": false.
+    """
+    gate_k = gate_k or top_k
+    filtered = [i for i, item in enumerate(golden) if item.get("filter")]
+
+    def fetch(request):
+        item, use_filter = request
+        retrieval_filter = local_kb.build_retrieval_filter(item.get("filter")) if use_filter else None
+        return retriever(item["q"], top_k, retrieval_filter)
+
+    requests = [(item, True) for item in golden] + [(golden[i], False) for i in filtered]
+    started = time.monotonic()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        fetched = list(pool.map(fetch, requests))
+    all_results = fetched[:len(golden)]
+    print(
+        f"Retrieved {len(golden)} questions ({len(filtered)} also unfiltered) in "
+        f"{time.monotonic() - started:.2f}s (concurrency={concurrency})"
+    )
+
+    scored = [score_question(item, results) for item, results in zip(golden, all_results)]
+    gated = [i for i, item in enumerate(golden) if item.get("gate", True)]
+    total = len(gated)
+
+    # Per-question rank positions ('-' = target not in the top top_k).
+    print("\nRank  Question")
+    for item, q in zip(golden, scored):
+        note = "" if item.get("gate", True) else "  (report only)"
+        print(f"{q['rank'] or '-':>4}  {item['q']}{note}")
+
+    # Print failures (target not within the gate depth) among gated questions.
+    failures = [
+        (golden[i], scored[i]) for i in gated
+        if not scored[i]["rank"] or scored[i]["rank"] > gate_k
+    ]
+    for item, q in failures:
         if "expect_tree_id" in item:
             print(
-                f"FAIL: {q!r}\n"
+                f"FAIL: {item['q']!r}\n"
                 f"  expected tree_id={item['expect_tree_id']!r}, "
-                f"got tree_ids={tree_ids}"
+                f"got tree_ids={q['tree_ids'][:gate_k]}"
             )
         else:
             print(
-                f"FAIL: {q!r}\n"
+                f"FAIL: {item['q']!r}\n"
                 f"  expected source containing {item['expect_source']!r}, "
-                f"got uris={uris}"
+                f"got uris={q['uris'][:gate_k]}"
             )
 
+    if filtered:
+        unfiltered = {
+            i: score_question(golden[i], results)
+            for i, results in zip(filtered, fetched[len(golden):])
+        }
+        compare_filtered(golden, scored, unfiltered, selectivity or {}, top_k)
+
+    metrics = ranked_metrics([scored[i] for i in gated], top_k)
+    print(f"\nMRR@{top_k}: {metrics['mrr']:.3f}")
+    print("   k  recall@k  nDCG@k")
+    for k in range(1, top_k + 1):
+        print(f"{k:>4}  {metrics['recall'][k]:>8.3f}  {metrics['ndcg'][k]:>6.3f}")
+
+    passes = total - len(failures)
+    report_only = len(golden) - total
     print(
         f"\nRetrieval eval: {passes}/{total} passed "
-        f"({hit_rate * 100:.1f}%) threshold {threshold * 100:.1f}%"
+        f"({metrics['recall'][gate_k] * 100:.1f}% hit rate @{gate_k})"
+        + (f"; {report_only} report-only question(s) not gated" if report_only else "")
     )
 
-    if hit_rate < threshold:
+    label = "MRR" if gate_metric == "mrr" else f"{gate_metric}@{gate_k}"
+    value = gate_value(metrics, gate_metric, gate_k)
+    if value < threshold:
         print(
-            f"GATE FAILED: hit rate {hit_rate * 100:.1f}% is below "
+            f"GATE FAILED: {label} {value * 100:.1f}% is below "
             f"the {threshold * 100:.1f}% threshold."
         )
         return False
 
-    print(f"GATE PASSED: hit rate {hit_rate * 100:.1f}% meets the threshold.")
+    print(f"GATE PASSED: {label} {value * 100:.1f}% meets the {threshold * 100:.1f}% threshold.")
     return True
 
 
+def percentile(sorted_values: list, pct: float) -> float:
+    """Nearest-rank percentile of an ascending list (0.0 when empty)."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100.0 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def latency_summary(samples_ms: list) -> dict:
+    """Return calls, mean and p50/p90/p99/max (ms) for a list of latencies."""
+    ordered = sorted(samples_ms)
+    return {
+        "calls": len(ordered),
+        "mean_ms": round(sum(ordered) / len(ordered), 2) if ordered else 0.0,
+        "p50_ms": round(percentile(ordered, 50), 2),
+        "p90_ms": round(percentile(ordered, 90), 2),
+        "p99_ms": round(percentile(ordered, 99), 2),
+        "max_ms": round(ordered[-1], 2) if ordered else 0.0,
+    }
+
+
+def query_length_bucket(query: str) -> str:
+    """Label the QUERY_LENGTH_BUCKETS bucket a query's word count falls in."""
+    words = len(query.split())
+    for upper, label in QUERY_LENGTH_BUCKETS:
+        if upper is None or words <= upper:
+            return label
+    return QUERY_LENGTH_BUCKETS[-1][1]
+
+
+def run_benchmark(make_retriever, golden: list, top_ks: list,
+                  concurrencies: list, repeat: int) -> list:
+    """Time every golden query for each (top_k, concurrency) config.
+
+    make_retriever(timings) must return a retriever that appends
+    (milliseconds, query) to timings for every call. Returns one dict per
+    config with the latency summary, wall time, throughput and per
+    query-length-bucket summaries.
+    """
+    queries = [
+        (item["q"], local_kb.build_retrieval_filter(item.get("filter"))) for item in golden
+    ] * repeat
+    report = []
+    print(f"\n{'top_k':>5} {'conc':>4} {'calls':>5} {'p50':>8} {'p90':>8} "
+          f"{'p99':>8} {'max':>8} {'qps':>7}")
+    for top_k in top_ks:
+        for concurrency in concurrencies:
+            timings = []
+            retriever = make_retriever(timings)
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as pool:
+                list(pool.map(lambda q: retriever(q[0], top_k, q[1]), queries))
+            wall = time.perf_counter() - started
+
+            by_bucket = {}
+            for _, label in QUERY_LENGTH_BUCKETS:
+                samples = [ms for ms, q in timings if query_length_bucket(q) == label]
+                if samples:
+                    by_bucket[label] = latency_summary(samples)
+            row = {
+                "top_k": top_k,
+                "concurrency": concurrency,
+                **latency_summary([ms for ms, _ in timings]),
+                "wall_s": round(wall, 3),
+                "throughput_qps": round(len(timings) / wall, 2) if wall > 0 else 0.0,
+                "by_query_length": by_bucket,
+            }
+            report.append(row)
+            print(f"{top_k:>5} {concurrency:>4} {row['calls']:>5} "
+                  f"{row['p50_ms']:>6.1f}ms {row['p90_ms']:>6.1f}ms "
+                  f"{row['p99_ms']:>6.1f}ms {row['max_ms']:>6.1f}ms "
+                  f"{row['throughput_qps']:>7.1f}")
+    return report
+
+
+def add_gate_arguments(parser):
+    """Add the golden-set and gate flags to parser (also used by kb-pipeline.py)."""
+    parser.add_argument(
+        "--golden",
+        default=DEFAULT_GOLDEN,
+        help=f"Path to golden question JSON file (default: {DEFAULT_GOLDEN})",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help=f"Minimum required gate metric 0.0-1.0 (default: {DEFAULT_THRESHOLD})",
+    )
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        default=DEFAULT_TOP_K,
+        help=f"Number of results to retrieve per question (default: {DEFAULT_TOP_K})",
+    )
+    parser.add_argument(
+        "--gate-metric",
+        choices=GATE_METRICS,
+        default="hit_rate",
+        help="Metric the threshold applies to (default: hit_rate)",
+    )
+    parser.add_argument(
+        "--gate-k",
+        type=int,
+        default=None,
+        help="Cut-off k for recall/nDCG/hit-rate gating (default: --top-k)",
+    )
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=DEFAULT_CONCURRENCY,
+        help=f"Questions retrieved in parallel (default: {DEFAULT_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--max-tps",
+        type=float,
+        default=DEFAULT_MAX_TPS,
+        help=f"Ceiling on Bedrock Retrieve calls per second (default: {DEFAULT_MAX_TPS})",
+    )
+
+
+def check_gate_arguments(args):
+    """Exit non-zero when a parsed gate flag is out of range."""
+    if not (0.0 < args.threshold <= 1.0):
+        sys.exit(f"ERROR: --threshold must be in range (0, 1], got {args.threshold}")
+    if args.gate_k is not None and not (1 <= args.gate_k <= args.top_k):
+        sys.exit(f"ERROR: --gate-k must be in range [1, --top-k], got {args.gate_k}")
+    if args.concurrency < 1:
+        sys.exit(f"ERROR: --concurrency must be >= 1, got {args.concurrency}")
+    if args.max_tps < MIN_TPS:
+        sys.exit(f"ERROR: --max-tps must be >= {MIN_TPS}, got {args.max_tps}")
+
+
 def main():
     parser = argparse.ArgumentParser(
         description=(
@@ -195,41 +920,204 @@ def main():
         default=DEFAULT_REGION,
         help=f"AWS region (default: {DEFAULT_REGION})",
     )
+    add_gate_arguments(parser)
     parser.add_argument(
-        "--threshold",
-        type=float,
-        default=DEFAULT_THRESHOLD,
-        help=f"Minimum required hit rate 0.0-1.0 (default: {DEFAULT_THRESHOLD})",
+        "--cache",
+        choices=CACHE_MODES,
+        default="off",
+        help="Retrieve response cache mode (default: off)",
     )
     parser.add_argument(
-        "--top-k",
+        "--cache-dir",
+        default=DEFAULT_CACHE_DIR,
+        help=f"Directory holding cached Retrieve responses (default: {DEFAULT_CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--corpus-id",
+        default=None,
+        help="Corpus identity for cache keys (default: hash of the local --kb-dir tree)",
+    )
+    parser.add_argument(
+        "--run-record",
+        default=DEFAULT_RUN_RECORD,
+        help=f"File recording this run's retrievals for incremental re-runs; '' disables (default: {DEFAULT_RUN_RECORD})",
+    )
+    changes = parser.add_mutually_exclusive_group()
+    changes.add_argument(
+        "--changed-since",
+        default=None,
+        help="Re-run only questions affected by KB files changed since this git ref",
+    )
+    changes.add_argument(
+        "--changed-files",
+        default=None,
+        help="Re-run only questions affected by the files listed (one per line) in this file, or - for stdin",
+    )
+    changes.add_argument(
+        "--change-set",
+        default=None,
+        help="Re-run only questions affected by a sync-knowledge-base.py --change-set-out file",
+    )
+    parser.add_argument(
+        "--benchmark",
+        action="store_true",
+        help="Run the latency benchmark sweep instead of the eval gate",
+    )
+    parser.add_argument(
+        "--bench-top-k",
+        default=DEFAULT_BENCH_TOP_K,
+        help=f"Comma-separated top-k values to sweep (default: {DEFAULT_BENCH_TOP_K})",
+    )
+    parser.add_argument(
+        "--bench-concurrency",
+        default=DEFAULT_BENCH_CONCURRENCY,
+        help=f"Comma-separated concurrency levels to sweep (default: {DEFAULT_BENCH_CONCURRENCY})",
+    )
+    parser.add_argument(
+        "--bench-repeat",
         type=int,
-        default=DEFAULT_TOP_K,
-        help=f"Number of results to retrieve per question (default: {DEFAULT_TOP_K})",
+        default=DEFAULT_BENCH_REPEAT,
+        help=f"Times each golden question is issued per config (default: {DEFAULT_BENCH_REPEAT})",
     )
     parser.add_argument(
-        "--golden",
-        default=DEFAULT_GOLDEN,
-        help=f"Path to golden question JSON file (default: {DEFAULT_GOLDEN})",
+        "--bench-json",
+        default=None,
+        help="Write the benchmark report to this JSON file (default: print to stdout)",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=BACKENDS,
+        default="bedrock",
+        help="Retriever backend: live Bedrock KB, offline local BM25 or offline local vectors (default: bedrock)",
+    )
+    parser.add_argument(
+        "--vector-cache-dir",
+        default=local_vectors.DEFAULT_CACHE_DIR,
+        help=f"Embedding cache for --backend vector (default: {local_vectors.DEFAULT_CACHE_DIR})",
+    )
+    parser.add_argument(
+        "--kb-dir",
+        default=local_kb.DEFAULT_KB_DIR,
+        help=f"Local knowledge-base directory for --backend local (default: {local_kb.DEFAULT_KB_DIR})",
     )
     args = parser.parse_args()
-
-    if not (0.0 < args.threshold <= 1.0):
-        sys.exit(f"ERROR: --threshold must be in range (0, 1], got {args.threshold}")
+    check_gate_arguments(args)
 
     print(
-        f"A-10 retrieval eval — region={args.region} "
+        f"A-10 retrieval eval — backend={args.backend} region={args.region} "
         f"top_k={args.top_k} threshold={args.threshold * 100:.1f}%"
     )
 
-    golden = load_golden(args.golden)
+    golden = local_kb.load_golden(args.golden)
     print(f"Loaded {len(golden)} golden questions from {args.golden}")
 
-    kb_id = resolve_kb_id(args, args.region)
+    if args.benchmark:
+        top_ks = local_kb.parse_int_list(args.bench_top_k, "--bench-top-k")
+        concurrencies = local_kb.parse_int_list(args.bench_concurrency, "--bench-concurrency")
+        if args.bench_repeat < 1:
+            sys.exit(f"ERROR: --bench-repeat must be >= 1, got {args.bench_repeat}")
+        if args.backend in ("local", "vector"):
+            if args.backend == "local":
+                base = local_retriever(args.kb_dir)
+            else:
+                base = vector_retriever(args.kb_dir, args.vector_cache_dir)
+
+            def make_retriever(timings):
+                return timed_retriever(base, timings)
+        else:
+            kb_id = resolve_kb_id(args, args.region)
+            client = boto3.client(
+                "bedrock-agent-runtime",
+                region_name=args.region,
+                config=Config(
+                    max_pool_connections=max(10, max(concurrencies)),
+                    retries={"mode": "standard", "max_attempts": 1},
+                ),
+            )
+
+            def make_retriever(timings):
+                return bedrock_retriever(client, kb_id, args.max_tps, timings)
+        report = {
+            "backend": args.backend,
+            "region": args.region,
+            "queries": len(golden),
+            "repeat": args.bench_repeat,
+            "configs": run_benchmark(
+                make_retriever, golden, top_ks, concurrencies, args.bench_repeat
+            ),
+        }
+        if args.bench_json:
+            with open(args.bench_json, "w", encoding="utf-8") as fh:
+                json.dump(report, fh, indent=2)
+            print(f"\nBenchmark report written to {args.bench_json}")
+        else:
+            print(json.dumps(report, indent=2))
+        sys.exit(0)
+
+    if args.backend == "local":
+        kb_id = "local"
+        retriever = local_retriever(args.kb_dir)
+    elif args.backend == "vector":
+        kb_id = f"local-vector:{local_vectors.HashingEmbedder.model_id}"
+        retriever = vector_retriever(args.kb_dir, args.vector_cache_dir)
+    elif args.cache == "replay":
+        # Offline: never touch SSM or create a client.
+        kb_id = args.kb_id or os.environ.get("KB_ID", "")
+        if not kb_id:
+            sys.exit("ERROR: --cache replay needs --kb-id or KB_ID (no SSM lookup offline).")
+        retriever = None
+    else:
+        kb_id = resolve_kb_id(args, args.region)
+        # Throttling and transport errors are retried by retrieve()/TokenBucket,
+        # so botocore's own retry loop is limited to one attempt to keep
+        # backoff in one place.
+        client = boto3.client(
+            "bedrock-agent-runtime",
+            region_name=args.region,
+            config=Config(
+                max_pool_connections=max(10, args.concurrency),
+                retries={"mode": "standard", "max_attempts": 1},
+            ),
+        )
+        retriever = bedrock_retriever(client, kb_id, args.max_tps)
+
+    previous, reusable, recorded = {}, set(), {}
+    if args.changed_since or args.changed_files or args.change_set:
+        previous = load_run_record(args.run_record, kb_id)
+        changed = changed_doc_keys(read_changed_paths(args), args.kb_dir)
+        try:
+            docs = local_kb.load_documents(args.kb_dir)
+        except FileNotFoundError as exc:
+            sys.exit(f"ERROR: incremental eval needs the local KB tree: {exc}")
+        reusable = reusable_retrievals(golden, args.top_k, previous, changed, docs)
+        total = len({k for item in golden for k in retrieval_keys(item, args.top_k)})
+        print(
+            f"Incremental: {len(changed)} changed doc(s); reusing {len(reusable)} of "
+            f"{total} retrievals from {args.run_record}"
+        )
 
-    client = boto3.client("bedrock-agent-runtime", region_name=args.region)
+    cache = None
+    if args.cache != "off":
+        corpus_id = args.corpus_id or local_kb.corpus_hash(args.kb_dir)
+        cache = ResponseCache(args.cache_dir, kb_id, corpus_id)
+        retriever = cached_retriever(retriever, cache, args.cache)
+        print(f"Response cache: mode={args.cache} dir={args.cache_dir} corpus={corpus_id[:12]}")
+    retriever = recording_retriever(retriever, previous, reusable, recorded)
 
-    passed = evaluate(client, kb_id, golden, args.top_k, args.threshold)
+    passed = evaluate(
+        retriever,
+        golden,
+        args.top_k,
+        args.threshold,
+        concurrency=args.concurrency,
+        gate_metric=args.gate_metric,
+        gate_k=args.gate_k,
+        selectivity=filter_selectivity(args.kb_dir, golden),
+    )
+    if cache:
+        print(f"Response cache: {cache.hits} hit(s), {cache.misses} miss(es)")
+    if args.run_record:
+        save_run_record(args.run_record, kb_id, recorded)
     sys.exit(0 if passed else 1)
 
 
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Knowledge base deploy pipeline: content checks → S3 sync → ingestion → eval gate.
+
+One entry point for what used to be two CI jobs (sync-knowledge-base.py, then
+eval-retrieval.py). The stages are the functions of those scripts, loaded with
+importlib, but they share:
+  - one boto3 Session and one client per service, with the S3 and
+    bedrock-agent-runtime connection pools sized for their worker pools;
+  - one resolved config: bucket, kb-id and data-source-id are looked up once
+    (SSM + get_data_source) and the eval uses the same kb-id.
+The flags and their validation are the scripts' own (add_arguments /
+check_arguments from sync-knowledge-base.py, add_gate_arguments /
+check_gate_arguments from eval-retrieval.py) plus the few pipeline flags.
+
+While ingestion is running, the golden questions are evaluated against the
+local index (--preview-backend: BM25, or the cached vector index) as an early,
+non-gating signal; once ingestion completes the same questions run against the
+live KB and that result is the gate. Set --preview-backend off to skip it.
+
+Failure semantics are those of the two scripts: any check, sync, ingestion or
+gate failure exits non-zero.
+
+Usage in CI:
+  python scripts/kb-pipeline.py --region us-east-1 --bucket headset-kb-<acct>-prod
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import boto3
+from botocore.config import Config
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+PREVIEW_BACKENDS = ("local", "vector", "off")
+
+
+def load_script(filename: str, name: str):
+    """Import a hyphenated script from scripts/ as a module."""
+    spec = importlib.util.spec_from_file_location(name, os.path.join(SCRIPTS_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+sync = load_script("sync-knowledge-base.py", "sync_knowledge_base")
+evalr = load_script("eval-retrieval.py", "eval_retrieval")
+
+
+def make_clients(region: str, max_workers: int, concurrency: int) -> dict:
+    """Create every client the pipeline needs from one Session."""
+    session = boto3.session.Session(region_name=region)
+    return {
+        "ssm": session.client("ssm"),
+        "s3": session.client(
+            "s3", config=Config(max_pool_connections=max(10, max_workers))
+        ),
+        "bedrock-agent": session.client("bedrock-agent"),
+        # Throttling and transport errors are retried by eval-retrieval's
+        # retrieve()/TokenBucket.
+        "bedrock-agent-runtime": session.client(
+            "bedrock-agent-runtime",
+            config=Config(
+                max_pool_connections=max(10, concurrency),
+                retries={"mode": "standard", "max_attempts": 1},
+            ),
+        ),
+    }
+
+
+def preview(args, golden: list, selectivity: dict) -> None:
+    """Evaluate the golden set against the local index; informational only."""
+    label = "vector" if args.preview_backend == "vector" else "BM25"
+    print(f"\n=== Preview: golden set vs local {label} index (not gating) ===")
+    if args.preview_backend == "vector":
+        retriever = evalr.vector_retriever(args.local_dir, args.vector_cache_dir)
+    else:
+        retriever = evalr.local_retriever(args.local_dir)
+    evalr.evaluate(
+        retriever, golden, args.top_k, args.threshold,
+        concurrency=args.concurrency, gate_metric=args.gate_metric,
+        gate_k=args.gate_k, selectivity=selectivity,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Check, sync and ingest the KB, then run the retrieval eval gate."
+    )
+    sync.add_arguments(parser)
+    evalr.add_gate_arguments(parser)
+    parser.add_argument("--skip-eval", action="store_true", help="Stop after ingestion")
+    parser.add_argument("--preview-backend", choices=PREVIEW_BACKENDS, default="local",
+                        help="Local index evaluated while ingestion runs (default: local)")
+    parser.add_argument("--vector-cache-dir", default=evalr.local_vectors.DEFAULT_CACHE_DIR,
+                        help=f"Embedding cache for --preview-backend vector (default: {evalr.local_vectors.DEFAULT_CACHE_DIR})")
+    args = parser.parse_args()
+    sync.check_arguments(args)
+    evalr.check_gate_arguments(args)
+
+    started = time.monotonic()
+    print(f"KB pipeline — env={args.environment} region={args.region}")
+    golden = None if args.skip_eval else evalr.local_kb.load_golden(args.golden)
+
+    if not args.skip_sync:
+        print("\n=== Stage 1: content checks ===")
+        sync.check_content(args)
+
+    clients = make_clients(args.region, args.max_workers, args.concurrency)
+    bucket, kb_id, ds_id = sync.resolve_config(args, clients["ssm"], clients["bedrock-agent"])
+    manifest_bucket = sync.resolve_manifest_bucket(args, clients["ssm"], bucket)
+    print(f"Resolved: bucket={bucket} kb_id={kb_id} data_source_id={ds_id} "
+          f"manifest_bucket={manifest_bucket}")
+
+    change_set = None
+    if args.skip_sync:
+        print("Skipping S3 sync (--skip-sync).")
+    else:
+        print("\n=== Stage 2: S3 sync ===")
+        change_set = sync.sync_docs(
+            clients["s3"], bucket, args.local_dir, manifest_bucket=manifest_bucket,
+            use_manifest=not args.full_listing, max_workers=args.max_workers,
+        )
+        if args.change_set_out:
+            sync.write_change_set(args.change_set_out, change_set)
+
+    print("\n=== Stage 3: ingestion ===")
+    selectivity = evalr.filter_selectivity(args.local_dir, golden) if golden else {}
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        ingestion = pool.submit(
+            sync.run_ingestion, clients["bedrock-agent"], kb_id, ds_id, bucket, args, change_set
+        )
+        if golden and args.preview_backend != "off":
+            preview(args, golden, selectivity)
+        # Re-raises the stage's SystemExit/exception here on failure.
+        ingestion.result()
+    if manifest_bucket and change_set and any(change_set[k] for k in ("added", "modified", "deleted")):
+        sync.mark_ingested(clients["s3"], manifest_bucket)
+    print(f"Ingestion finished at +{time.monotonic() - started:.1f}s")
+
+    if args.skip_eval:
+        print("=== KB pipeline succeeded (eval skipped) ===")
+        return
+
+    print("\n=== Stage 4: retrieval eval gate (live KB) ===")
+    retriever = evalr.bedrock_retriever(clients["bedrock-agent-runtime"], kb_id, args.max_tps)
+    passed = evalr.evaluate(
+        retriever, golden, args.top_k, args.threshold,
+        concurrency=args.concurrency, gate_metric=args.gate_metric,
+        gate_k=args.gate_k, selectivity=selectivity,
+    )
+    print(f"KB pipeline finished in {time.monotonic() - started:.1f}s")
+    if not passed:
+        sys.exit(1)
+    print("=== KB pipeline succeeded ===")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,285 @@
+"""
+Pre-ingestion content checks for the local knowledge base.
+
+Sidecar validation: every <doc>.md must have a <doc>.md.metadata.json whose
+metadataAttributes holds exactly the SIDECAR_VOCABULARY keys, each with one
+of the enumerated values. The symptom values are triage.AllSymptomClasses
+(internal/triage/types.go) plus "general" for docs outside the trees; the
+connection_type and brand values are the Lambda's allowedConnectionTypes /
+allowedBrands (cmd/lex-lambda/main.go) plus "any". A typo here would silently
+drop the doc from every metadata-filtered retrieval, so it fails the sync.
+Keep the sets in step with the Go code when a class or slot value is added.
+
+Filter selectivity: the validated sidecars are also indexed (attribute ->
+value -> docs) to report, for each value a caller can supply, how many docs
+the Lambda's IN-with-"any" filter (kbFilters) still leaves in the search
+space — i.e. which filters actually prune.
+
+Near-duplicate chunks: every doc is chunked like the data source
+(local_kb.build_chunks) and each chunk is reduced to the set of its
+SHINGLE_WORDS-word shingles. A MinHash signature of MINHASH_PERMUTATIONS
+values estimates the Jaccard similarity of two shingle sets; the signature is
+split into LSH_BANDS bands of LSH_ROWS values and only chunks sharing a whole
+band become candidate pairs, so the scan is roughly linear in the number of
+chunks instead of comparing every pair. Candidates from different docs are
+confirmed with their exact shingle Jaccard. With 16 bands of 4 rows a pair at
+Jaccard 0.8 is a candidate with probability ~1.0 and one at 0.3 with ~0.12.
+
+Near-duplicates waste top-k slots (the same text retrieved twice) and
+ingestion tokens.
+
+sync-knowledge-base.py runs both checks before uploading (--sidecars and
+--near-duplicates, each warn|fail|off); run this module directly to see the
+full report.
+
+Usage:
+  python scripts/kb_checks.py [--local-dir knowledge-base] [--threshold 0.8]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import re
+import sys
+from collections import defaultdict
+
+import local_kb
+
+# Allowed metadataAttributes values per key (see module docstring).
+SIDECAR_VOCABULARY = {
+    "symptom": (
+        "no_audio_output", "mic_not_working", "not_detected", "one_sided_audio",
+        "distorted_audio", "volume_sidetone", "mute_call_control", "intermittent_drops",
+        "general",
+    ),
+    "connection_type": ("usb", "bluetooth", "dect", "wireless_dongle", "any"),
+    "brand": ("jabra", "poly", "logitech", "epos", "yealink", "any"),
+    "platform": ("windows", "genesys", "any"),
+    "tree_id": (
+        "tree-1", "tree-2", "tree-3", "tree-4", "tree-5", "tree-6", "tree-7", "tree-8",
+        "preflight", "escalation", "none",
+    ),
+}
+# Attributes the Lambda filters with IN [value, "any"] (kbFilters).
+ANY_OF_ATTRIBUTES = ("connection_type", "brand")
+
+DEFAULT_DUPLICATE_THRESHOLD = 0.8
+SHINGLE_WORDS = 5
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16
+LSH_ROWS = MINHASH_PERMUTATIONS // LSH_BANDS
+# Shingle hashes are 61-bit; permutations are a*x + b mod a Mersenne prime.
+_MERSENNE_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 61) - 1
+# Fixed seed: signatures (and so the report) are identical run to run.
+_rng = random.Random(0x4B42)
+_PERMUTATIONS = [
+    (_rng.randrange(1, _MERSENNE_PRIME), _rng.randrange(0, _MERSENNE_PRIME))
+    for _ in range(MINHASH_PERMUTATIONS)
+]
+_WORD_RE = re.compile(r"[a-z0-9]+")
+
+
+def load_sidecars(root):
+    """Return ({doc key: parsed sidecar or None}, [orphan sidecar keys], [errors]).
+
+    Walks root once; a doc without a sidecar maps to None, a sidecar that is
+    not valid JSON is reported in errors.
+    """
+    if not os.path.isdir(root):
+        raise FileNotFoundError(f"knowledge-base directory not found: {root}")
+    docs, sidecars, errors = set(), {}, []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d != ".git")
+        for name in sorted(filenames):
+            key = os.path.relpath(os.path.join(dirpath, name), root).replace(os.sep, "/")
+            if name.endswith(local_kb.METADATA_SUFFIX):
+                try:
+                    with open(os.path.join(dirpath, name), encoding="utf-8") as fh:
+                        sidecars[key[: -len(local_kb.METADATA_SUFFIX)]] = json.load(fh)
+                except json.JSONDecodeError as exc:
+                    errors.append(f"{key}: invalid JSON: {exc}")
+            elif name.endswith(local_kb.DOC_SUFFIX):
+                docs.add(key)
+    orphans = sorted(k + local_kb.METADATA_SUFFIX for k in sidecars if k not in docs)
+    return {k: sidecars.get(k) for k in sorted(docs)}, orphans, errors
+
+
+def validate_sidecars(root):
+    """Validate every sidecar under root against SIDECAR_VOCABULARY.
+
+    Returns (errors, index) where errors is a list of messages and index is
+    {attribute: {value: set(doc keys)}} over the docs whose sidecar is valid.
+    """
+    sidecars, orphans, errors = load_sidecars(root)
+    errors += [f"{key}: sidecar has no matching {local_kb.DOC_SUFFIX} doc" for key in orphans]
+    index = {attr: defaultdict(set) for attr in SIDECAR_VOCABULARY}
+    for key, sidecar in sidecars.items():
+        sidecar_key = key + local_kb.METADATA_SUFFIX
+        if sidecar is None:
+            if not any(e.startswith(sidecar_key + ":") for e in errors):
+                errors.append(f"{key}: missing {local_kb.METADATA_SUFFIX} sidecar")
+            continue
+        attrs = sidecar.get("metadataAttributes") if isinstance(sidecar, dict) else None
+        if not isinstance(attrs, dict):
+            errors.append(f"{sidecar_key}: 'metadataAttributes' must be an object")
+            continue
+        problems = [f"unknown attribute {k!r}" for k in sorted(attrs) if k not in SIDECAR_VOCABULARY]
+        for attr, allowed in SIDECAR_VOCABULARY.items():
+            if attr not in attrs:
+                problems.append(f"missing {attr!r}")
+            elif attrs[attr] not in allowed:
+                problems.append(f"{attr}={attrs[attr]!r} not in {', '.join(allowed)}")
+        if problems:
+            errors.extend(f"{sidecar_key}: {p}" for p in problems)
+            continue
+        for attr in SIDECAR_VOCABULARY:
+            index[attr][attrs[attr]].add(key)
+    return errors, index
+
+
+def filter_selectivity(index):
+    """Return [(attribute, value, exact docs, candidate docs, total docs)].
+
+    candidate docs is what a filter on that value leaves to search: value or
+    "any" for ANY_OF_ATTRIBUTES, the exact value otherwise. "any"/"none"/
+    "general" rows are omitted — callers never filter on them.
+    """
+    total = len(set().union(*index["tree_id"].values())) if index["tree_id"] else 0
+    rows = []
+    for attr, values in index.items():
+        for value in SIDECAR_VOCABULARY[attr]:
+            if value in ("any", "none", "general"):
+                continue
+            exact = len(values.get(value, ()))
+            candidates = exact
+            if attr in ANY_OF_ATTRIBUTES:
+                candidates += len(values.get("any", ()))
+            rows.append((attr, value, exact, candidates, total))
+    return rows
+
+
+def check_sidecars(root):
+    """Validate sidecars under root, print errors and selectivity; return errors."""
+    errors, index = validate_sidecars(root)
+    if errors:
+        print(f"Sidecar validation: {len(errors)} problem(s)")
+        for error in errors:
+            print(f"  {error}")
+    else:
+        print("Sidecar validation: all sidecars valid")
+    print("Filter selectivity (docs left to search / total; any-of adds 'any' docs):")
+    for attr, value, exact, candidates, total in filter_selectivity(index):
+        pruned = 1 - candidates / total if total else 0.0
+        print(f"  {attr:<15} {value:<18} {exact:>3} exact  {candidates:>3}/{total:<3} "
+              f"({pruned * 100:4.0f}% pruned)")
+    return errors
+
+
+def shingles(text):
+    """Return the set of hashed SHINGLE_WORDS-word shingles of text."""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < SHINGLE_WORDS:
+        grams = [" ".join(words)] if words else []
+    else:
+        grams = (" ".join(words[i : i + SHINGLE_WORDS]) for i in range(len(words) - SHINGLE_WORDS + 1))
+    return {
+        int.from_bytes(hashlib.blake2b(g.encode("utf-8"), digest_size=8).digest(), "big") & _MAX_HASH
+        for g in grams
+    }
+
+
+def minhash(shingle_set):
+    """MinHash signature (tuple of MINHASH_PERMUTATIONS ints) of a shingle set."""
+    return tuple(
+        min((a * x + b) % _MERSENNE_PRIME for x in shingle_set)
+        for a, b in _PERMUTATIONS
+    )
+
+
+def jaccard(a, b):
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def find_near_duplicates(chunks, threshold=DEFAULT_DUPLICATE_THRESHOLD):
+    """Return near-duplicate chunk pairs from different docs, most similar first.
+
+    chunks are local_kb.build_chunks() dicts. Each pair is
+    {"jaccard", "a", "b"} where a/b are {"id", "key", "metadata"}.
+    """
+    sets = [shingles(c["text"]) for c in chunks]
+    buckets = defaultdict(list)
+    for i, shingle_set in enumerate(sets):
+        if not shingle_set:
+            continue
+        signature = minhash(shingle_set)
+        for band in range(LSH_BANDS):
+            rows = signature[band * LSH_ROWS : (band + 1) * LSH_ROWS]
+            buckets[(band, rows)].append(i)
+
+    candidates = set()
+    for members in buckets.values():
+        for x in range(len(members)):
+            for y in range(x + 1, len(members)):
+                i, j = members[x], members[y]
+                if chunks[i]["key"] != chunks[j]["key"]:
+                    candidates.add((i, j))
+
+    pairs = []
+    for i, j in sorted(candidates):
+        similarity = jaccard(sets[i], sets[j])
+        if similarity >= threshold:
+            pairs.append({
+                "jaccard": round(similarity, 3),
+                "a": {k: chunks[i][k] for k in ("id", "key", "metadata")},
+                "b": {k: chunks[j][k] for k in ("id", "key", "metadata")},
+            })
+    pairs.sort(key=lambda p: (-p["jaccard"], p["a"]["id"], p["b"]["id"]))
+    return pairs
+
+
+def format_duplicate(pair):
+    """One report line for a near-duplicate pair."""
+    def side(c):
+        m = c["metadata"]
+        return f"{c['id']} [symptom={m.get('symptom', '?')} tree_id={m.get('tree_id', '?')}]"
+    return f"  {pair['jaccard']:.2f}  {side(pair['a'])}  ~  {side(pair['b'])}"
+
+
+def check_near_duplicates(root, threshold=DEFAULT_DUPLICATE_THRESHOLD):
+    """Chunk the KB under root, print any near-duplicate pairs and return them."""
+    chunks = local_kb.build_chunks(local_kb.load_documents(root))
+    pairs = find_near_duplicates(chunks, threshold)
+    if pairs:
+        print(f"Near-duplicate chunks (Jaccard >= {threshold}): {len(pairs)} pair(s) "
+              f"across {len(chunks)} chunks")
+        for pair in pairs:
+            print(format_duplicate(pair))
+    else:
+        print(f"No near-duplicate chunks (Jaccard >= {threshold}) across {len(chunks)} chunks")
+    return pairs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the local knowledge base before ingestion.")
+    parser.add_argument("--local-dir", default=local_kb.DEFAULT_KB_DIR,
+                        help=f"Local knowledge-base directory (default: {local_kb.DEFAULT_KB_DIR})")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_DUPLICATE_THRESHOLD,
+                        help=f"Jaccard similarity that counts as a near-duplicate (default: {DEFAULT_DUPLICATE_THRESHOLD})")
+    args = parser.parse_args()
+    if not (0.0 < args.threshold <= 1.0):
+        sys.exit(f"ERROR: --threshold must be in range (0, 1], got {args.threshold}")
+    try:
+        errors = check_sidecars(args.local_dir)
+        pairs = check_near_duplicates(args.local_dir, args.threshold)
+    except FileNotFoundError as exc:
+        sys.exit(f"ERROR: {exc}")
+    sys.exit(1 if errors or pairs else 0)
+
+
+if __name__ == "__main__":
+    main()
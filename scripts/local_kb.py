@@ -0,0 +1,421 @@
+"""
+Offline stand-in for the Bedrock Knowledge Base, shared by the KB scripts.
+
+Loads knowledge-base/**/*.md together with their <doc>.md.metadata.json
+sidecars, splits every doc into chunks the way the data source does
+(FIXED_SIZE, 300 tokens, 20% overlap — see HeadsetKbDataSource in
+infrastructure/template.yaml) and answers queries from an in-memory BM25
+inverted index.
+
+Search results have the same shape as bedrock-agent-runtime.retrieve
+retrievalResults (content.text, location.s3Location.uri, metadata, score), and
+metadata filters use the same RetrievalFilter structure the Lambda builds in
+buildRetrievalFilter (internal/agents/bedrock.go), so callers such as
+eval-retrieval.py do not care which backend produced the results.
+
+Besides the production FIXED_SIZE chunker, chunk_hierarchical and
+chunk_semantic approximate Bedrock's HIERARCHICAL and SEMANTIC strategies so
+scripts/chunk-sweep.py can compare ingestion configs offline. Semantic
+breakpoints use lexical (term-vector) similarity between neighbouring
+sentences instead of embeddings.
+
+Token counts are approximated by whitespace-separated words; Bedrock counts
+model tokens, so local chunks are slightly larger than the real ones.
+"""
+
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+from collections import Counter, defaultdict
+
+DEFAULT_KB_DIR = "knowledge-base"
+DOC_SUFFIX = ".md"
+METADATA_SUFFIX = ".metadata.json"
+
+# Mirrors HeadsetKbDataSource.VectorIngestionConfiguration.
+CHUNK_MAX_TOKENS = 300
+CHUNK_OVERLAP_PERCENT = 20
+
+# Bedrock defaults for the HIERARCHICAL and SEMANTIC strategies.
+HIERARCHICAL_PARENT_MAX_TOKENS = 1500
+HIERARCHICAL_CHILD_MAX_TOKENS = 300
+HIERARCHICAL_OVERLAP_TOKENS = 60
+SEMANTIC_MAX_TOKENS = 300
+SEMANTIC_BUFFER_SIZE = 0
+SEMANTIC_BREAKPOINT_PERCENTILE = 95
+
+# Local results point at this pseudo-bucket so expect_source substring checks
+# behave exactly as they do against the real s3://headset-kb-... URIs.
+LOCAL_URI_PREFIX = "s3://local-kb/"
+
+# Sidecar attributes a golden entry's "filter" may constrain.
+FILTER_KEYS = ("brand", "platform", "connection_type")
+
+# Standard Okapi BM25 parameters.
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+# Sentence ends: terminal punctuation followed by whitespace. Markdown lines
+# (headings, list items, table rows) are split on first.
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?])\s+")
+_STOPWORDS = frozenset(
+    "a an and are as at be but by can do does for from has have how i if in "
+    "into is it its me my no not of on or so that the their then there these "
+    "this to too was what when where which will with you your".split()
+)
+
+
+def corpus_hash(root=DEFAULT_KB_DIR):
+    """SHA-256 over every file under root (key + content), order-independent.
+
+    Identifies a KB revision without AWS: any doc or sidecar edit changes it.
+    """
+    entries = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if d != ".git"]
+        for name in filenames:
+            if name == ".DS_Store":
+                continue
+            path = os.path.join(dirpath, name)
+            with open(path, "rb") as fh:
+                digest = hashlib.sha256(fh.read()).hexdigest()
+            entries.append(f"{os.path.relpath(path, root).replace(os.sep, '/')}:{digest}")
+    return hashlib.sha256("\n".join(sorted(entries)).encode("utf-8")).hexdigest()
+
+
+def tokenize(text):
+    """Lowercase word tokens with common English stopwords removed."""
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in _STOPWORDS]
+
+
+def load_documents(root=DEFAULT_KB_DIR):
+    """Return [{"key", "text", "metadata"}] for every .md doc under root.
+
+    key is the S3 key the sync step uploads the doc under; metadata is the
+    sidecar's metadataAttributes ({} when the doc has no sidecar).
+    """
+    if not os.path.isdir(root):
+        raise FileNotFoundError(f"knowledge-base directory not found: {root}")
+    docs = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = sorted(d for d in dirnames if d != ".git")
+        for name in sorted(filenames):
+            if not name.endswith(DOC_SUFFIX):
+                continue
+            path = os.path.join(dirpath, name)
+            key = os.path.relpath(path, root).replace(os.sep, "/")
+            with open(path, encoding="utf-8") as fh:
+                text = fh.read()
+            metadata = {}
+            sidecar = path + METADATA_SUFFIX
+            if os.path.isfile(sidecar):
+                with open(sidecar, encoding="utf-8") as fh:
+                    metadata = json.load(fh).get("metadataAttributes", {})
+            docs.append({"key": key, "text": text, "metadata": metadata})
+    return docs
+
+
+def chunk_fixed(text, max_tokens=CHUNK_MAX_TOKENS, overlap_percent=CHUNK_OVERLAP_PERCENT):
+    """Split text into windows of max_tokens words overlapping by overlap_percent."""
+    words = text.split()
+    if not words:
+        return []
+    step = max(1, max_tokens - (max_tokens * overlap_percent) // 100)
+    chunks = []
+    for start in range(0, len(words), step):
+        chunks.append(" ".join(words[start : start + max_tokens]))
+        if start + max_tokens >= len(words):
+            break
+    return chunks
+
+
+def chunk_hierarchical(text, parent_max_tokens=HIERARCHICAL_PARENT_MAX_TOKENS,
+                       child_max_tokens=HIERARCHICAL_CHILD_MAX_TOKENS,
+                       overlap_tokens=HIERARCHICAL_OVERLAP_TOKENS):
+    """Split text into parent windows, then each parent into child windows.
+
+    Returns the child chunks, which are what Bedrock embeds and searches;
+    at query time Bedrock swaps a matched child for its parent's text, which
+    changes what the model sees but not which document was hit. overlap_tokens
+    applies between children of the same parent; parents do not overlap.
+    """
+    words = text.split()
+    children = []
+    step = max(1, child_max_tokens - overlap_tokens)
+    for p in range(0, len(words), parent_max_tokens):
+        parent = words[p : p + parent_max_tokens]
+        for start in range(0, len(parent), step):
+            children.append(" ".join(parent[start : start + child_max_tokens]))
+            if start + child_max_tokens >= len(parent):
+                break
+    return children
+
+
+def split_sentences(text):
+    """Split markdown text into sentences (non-empty lines, then sentence ends)."""
+    sentences = []
+    for line in text.splitlines():
+        line = line.strip()
+        if line:
+            sentences.extend(s for s in _SENTENCE_END_RE.split(line) if s)
+    return sentences
+
+
+def _cosine(a, b):
+    dot = sum(tf * b.get(term, 0) for term, tf in a.items())
+    if not dot:
+        return 0.0
+    norm = math.sqrt(sum(v * v for v in a.values())) * math.sqrt(sum(v * v for v in b.values()))
+    return dot / norm
+
+
+def chunk_semantic(text, max_tokens=SEMANTIC_MAX_TOKENS, buffer_size=SEMANTIC_BUFFER_SIZE,
+                   breakpoint_percentile=SEMANTIC_BREAKPOINT_PERCENTILE):
+    """Group sentences into chunks, breaking where the topic shifts.
+
+    Each sentence is compared with the next, each widened by buffer_size
+    neighbouring sentences on both sides; a chunk ends where the distance
+    (1 - cosine of term vectors) is above the breakpoint_percentile of all
+    distances in the doc (strictly above, as Bedrock does), or where the next sentence would exceed max_tokens.
+    A single sentence longer than max_tokens is split with chunk_fixed.
+    """
+    sentences = split_sentences(text)
+    if not sentences:
+        return []
+    vectors = []
+    for i in range(len(sentences)):
+        window = sentences[max(0, i - buffer_size) : i + buffer_size + 1]
+        vectors.append(Counter(tokenize(" ".join(window))))
+    distances = [1 - _cosine(vectors[i], vectors[i + 1]) for i in range(len(vectors) - 1)]
+    if distances:
+        ordered = sorted(distances)
+        cut = ordered[min(len(ordered) - 1, int(len(ordered) * breakpoint_percentile / 100))]
+    else:
+        cut = 1.0
+
+    chunks, current, size = [], [], 0
+    for i, sentence in enumerate(sentences):
+        n = len(sentence.split())
+        if current and size + n > max_tokens:
+            chunks.append(" ".join(current))
+            current, size = [], 0
+        if n > max_tokens:
+            chunks.extend(chunk_fixed(sentence, max_tokens, 0))
+            continue
+        current.append(sentence)
+        size += n
+        if i < len(distances) and distances[i] > cut:
+            chunks.append(" ".join(current))
+            current, size = [], 0
+    if current:
+        chunks.append(" ".join(current))
+    return chunks
+
+
+def build_chunks(docs, chunker=chunk_fixed):
+    """Return [{"id", "key", "text", "metadata"}] for every chunk of every doc.
+
+    chunker is any callable text -> [chunk_text]; chunk ids are "<key>#<n>".
+    """
+    chunks = []
+    for doc in docs:
+        for n, text in enumerate(chunker(doc["text"])):
+            chunks.append(
+                {
+                    "id": f"{doc['key']}#{n}",
+                    "key": doc["key"],
+                    "text": text,
+                    "metadata": doc["metadata"],
+                }
+            )
+    return chunks
+
+
+def matches_filter(metadata, retrieval_filter):
+    """Evaluate a Bedrock RetrievalFilter dict against a chunk's metadata.
+
+    Supports equals, notEquals, in, notIn, andAll and orAll — the operators
+    the Lambda and the eval tooling use. None matches everything.
+    """
+    if not retrieval_filter:
+        return True
+    if len(retrieval_filter) != 1:
+        raise ValueError(f"retrieval filter must have exactly one operator: {retrieval_filter}")
+    op, arg = next(iter(retrieval_filter.items()))
+    if op == "andAll":
+        return all(matches_filter(metadata, f) for f in arg)
+    if op == "orAll":
+        return any(matches_filter(metadata, f) for f in arg)
+    value = metadata.get(arg["key"])
+    if op == "equals":
+        return value == arg["value"]
+    if op == "notEquals":
+        return value != arg["value"]
+    if op == "in":
+        return value in arg["value"]
+    if op == "notIn":
+        return value not in arg["value"]
+    raise ValueError(f"unsupported retrieval filter operator: {op}")
+
+
+def build_retrieval_filter(clauses):
+    """Convert a golden entry's filter clauses into a Bedrock RetrievalFilter.
+
+    Mirrors buildRetrievalFilter in internal/agents/bedrock.go: None when there
+    are no clauses, the bare condition when there is one, andAll otherwise,
+    with equals conditions (string values) before in conditions (list values)
+    and keys sorted within each group.
+    """
+    if not clauses:
+        return None
+    exact = sorted(k for k, v in clauses.items() if isinstance(v, str))
+    any_of = sorted(k for k, v in clauses.items() if not isinstance(v, str))
+    conds = [{"equals": {"key": k, "value": clauses[k]}} for k in exact]
+    conds += [{"in": {"key": k, "value": list(clauses[k])}} for k in any_of]
+    if len(conds) == 1:
+        return conds[0]
+    return {"andAll": conds}
+
+
+def to_retrieval_result(chunk, score):
+    """Shape a chunk like a bedrock-agent-runtime.retrieve retrievalResult."""
+    uri = LOCAL_URI_PREFIX + chunk["key"]
+    metadata = dict(chunk["metadata"])
+    metadata["x-amz-bedrock-kb-source-uri"] = uri
+    metadata["x-amz-bedrock-kb-chunk-id"] = chunk["id"]
+    return {
+        "content": {"text": chunk["text"]},
+        "location": {"type": "S3", "s3Location": {"uri": uri}},
+        "metadata": metadata,
+        "score": score,
+    }
+
+
+class BM25Index:
+    """In-memory Okapi BM25 inverted index over KB chunks."""
+
+    def __init__(self, chunks, k1=BM25_K1, b=BM25_B):
+        self.chunks = chunks
+        self.k1 = k1
+        self.b = b
+        # term -> [(chunk_index, term_frequency)]
+        self.postings = defaultdict(list)
+        self.lengths = []
+        for i, chunk in enumerate(chunks):
+            counts = Counter(tokenize(chunk["text"]))
+            self.lengths.append(sum(counts.values()))
+            for term, tf in counts.items():
+                self.postings[term].append((i, tf))
+        n = len(chunks)
+        self.avg_length = (sum(self.lengths) / n) if n else 0.0
+        self.idf = {
+            term: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5))
+            for term, p in self.postings.items()
+        }
+
+    def scores(self, query):
+        """Return {chunk_index: BM25 score} for chunks sharing a query term."""
+        scores = defaultdict(float)
+        for term in set(tokenize(query)):
+            idf = self.idf.get(term)
+            if idf is None:
+                continue
+            for i, tf in self.postings[term]:
+                norm = 1 - self.b + self.b * self.lengths[i] / self.avg_length
+                scores[i] += idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+        return scores
+
+    def search(self, query, top_k, retrieval_filter=None):
+        """Return the top_k Retrieve-shaped results for query.
+
+        Ties are broken by chunk order so results are deterministic.
+        """
+        ranked = sorted(self.scores(query).items(), key=lambda kv: (-kv[1], kv[0]))
+        results = []
+        for i, score in ranked:
+            chunk = self.chunks[i]
+            if not matches_filter(chunk["metadata"], retrieval_filter):
+                continue
+            results.append(to_retrieval_result(chunk, score))
+            if len(results) == top_k:
+                break
+        return results
+
+
+def build_index(root=DEFAULT_KB_DIR, chunker=chunk_fixed):
+    """Load, chunk and index the local knowledge base in one call."""
+    return BM25Index(build_chunks(load_documents(root), chunker))
+
+
+# Golden questions and CLI parsing shared by eval-retrieval.py and
+# chunk-sweep.py. These are command-line helpers: bad input exits with an
+# ERROR message rather than raising.
+
+
+def load_golden(path):
+    """Load and validate the golden-question file."""
+    try:
+        with open(path, encoding="utf-8") as fh:
+            data = json.load(fh)
+    except FileNotFoundError:
+        sys.exit(f"ERROR: golden file not found: {path}")
+    except json.JSONDecodeError as exc:
+        sys.exit(f"ERROR: invalid JSON in {path}: {exc}")
+
+    if not isinstance(data, list) or not data:
+        sys.exit(f"ERROR: {path} must be a non-empty JSON array.")
+
+    for i, item in enumerate(data):
+        has_tree = "expect_tree_id" in item
+        has_src = "expect_source" in item
+        if not item.get("q"):
+            sys.exit(f"ERROR: entry {i} is missing 'q'.")
+        if has_tree == has_src:  # both present or neither present
+            sys.exit(
+                f"ERROR: entry {i} must have exactly one of "
+                f"'expect_tree_id' or 'expect_source', not both/neither."
+            )
+        if "filter" in item:
+            validate_filter_clauses(i, item["filter"])
+        if not isinstance(item.get("gate", True), bool):
+            sys.exit(f"ERROR: entry {i} 'gate' must be true or false.")
+    if not any(item.get("gate", True) for item in data):
+        sys.exit(f"ERROR: {path} has no entries counted by the gate (all \"gate\": false).")
+
+    return data
+
+
+def validate_filter_clauses(i, clauses):
+    """Exit unless clauses is a non-empty {FILTER_KEYS attr: str | [str]} dict."""
+    if not isinstance(clauses, dict) or not clauses:
+        sys.exit(f"ERROR: entry {i} 'filter' must be a non-empty object.")
+    for key, value in clauses.items():
+        if key not in FILTER_KEYS:
+            sys.exit(
+                f"ERROR: entry {i} filter key {key!r} is not one of "
+                f"{', '.join(FILTER_KEYS)}."
+            )
+        if isinstance(value, str) and value:
+            continue
+        if (isinstance(value, list) and value
+                and all(isinstance(v, str) and v for v in value)):
+            continue
+        sys.exit(
+            f"ERROR: entry {i} filter {key!r} must be a string (equals) "
+            f"or a non-empty list of strings (any-of)."
+        )
+
+
+def parse_int_list(value, flag, minimum=1):
+    """Parse a comma-separated list of ints >= minimum for a CLI flag."""
+    try:
+        items = [int(v) for v in value.split(",") if v.strip()]
+    except ValueError:
+        sys.exit(f"ERROR: {flag} must be a comma-separated list of integers, got {value!r}")
+    if not items or any(v < minimum for v in items):
+        sys.exit(f"ERROR: {flag} values must be >= {minimum}, got {value!r}")
+    return items
@@ -0,0 +1,221 @@
+"""
+Dense retrieval over the local knowledge base, with an on-disk embedding cache.
+
+Chunks come from local_kb (same chunking, metadata and result shape as the
+BM25 index). Each chunk is embedded once with a deterministic local model and
+the vector is stored in a content-addressed cache:
+
+  <cache_dir>/<model id>/vectors.f32   float32 rows, appended, memory-mapped
+  <cache_dir>/<model id>/rows.json     {chunk hash: row number}
+
+The chunk hash covers the model id and the chunk text, so an edited chunk gets
+a new row and an unchanged one is never embedded again. Rows no longer
+referenced by the corpus are dropped by compact().
+
+The local model (HashingEmbedder) is feature hashing of word unigrams and
+bigrams into EMBEDDING_DIM signed buckets with sublinear tf and L2
+normalisation — no network, no weights, identical on every machine. It is a
+stand-in with dense-retrieval mechanics, not a prediction of Titan's ranking.
+
+NumPy is optional for the rest of the KB tooling (CI installs only boto3);
+constructing a VectorStore without it raises RuntimeError.
+"""
+
+import hashlib
+import json
+import math
+import os
+from functools import lru_cache
+
+import local_kb
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency, checked in VectorStore
+    np = None
+
+DEFAULT_CACHE_DIR = os.path.join(".retrieval-cache", "vectors")
+EMBEDDING_DIM = 4096
+VECTORS_FILE = "vectors.f32"
+ROWS_FILE = "rows.json"
+
+
+@lru_cache(maxsize=65536)
+def _bucket(feature):
+    """Return (dimension, sign) for a hashed feature."""
+    h = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+    return h % EMBEDDING_DIM, 1.0 if (h >> 63) else -1.0
+
+
+class HashingEmbedder:
+    """Deterministic bag-of-words feature-hashing embedder."""
+
+    model_id = f"hashing-uni-bi-{EMBEDDING_DIM}-v1"
+    dim = EMBEDDING_DIM
+
+    def embed(self, texts):
+        """Return a (len(texts), dim) float32 matrix of unit-length rows."""
+        out = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = local_kb.tokenize(text)
+            counts = {}
+            for feature in tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]:
+                counts[feature] = counts.get(feature, 0) + 1
+            for feature, tf in counts.items():
+                dim, sign = _bucket(feature)
+                out[row, dim] += sign * (1.0 + math.log(tf))
+        norms = np.linalg.norm(out, axis=1, keepdims=True)
+        np.divide(out, norms, out=out, where=norms > 0)
+        return out
+
+
+def chunk_hash(model_id, text):
+    """Content address of a chunk's embedding."""
+    return hashlib.sha256(f"{model_id}\n{text}".encode("utf-8")).hexdigest()
+
+
+class VectorStore:
+    """Content-addressed, memory-mapped float32 embedding cache for one model."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, embedder=None):
+        if np is None:
+            raise RuntimeError("numpy is required for the local vector index: pip install numpy")
+        self.embedder = embedder or HashingEmbedder()
+        self.dir = os.path.join(cache_dir, self.embedder.model_id)
+        self.vectors_path = os.path.join(self.dir, VECTORS_FILE)
+        self.rows_path = os.path.join(self.dir, ROWS_FILE)
+        os.makedirs(self.dir, exist_ok=True)
+        try:
+            with open(self.rows_path, encoding="utf-8") as fh:
+                self.rows = json.load(fh)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.rows = {}
+        # Drop an index that does not match the vectors file (interrupted write).
+        if self._stored_rows() < len(self.rows):
+            self.rows = {}
+            open(self.vectors_path, "wb").close()
+        self.embedded = 0
+
+    def _stored_rows(self):
+        try:
+            size = os.path.getsize(self.vectors_path)
+        except FileNotFoundError:
+            return 0
+        return size // (4 * self.embedder.dim)
+
+    def _save_rows(self):
+        tmp = f"{self.rows_path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(self.rows, fh)
+        os.replace(tmp, self.rows_path)
+
+    def ensure(self, texts):
+        """Embed and append any texts not already cached; return their hashes."""
+        hashes = [chunk_hash(self.embedder.model_id, t) for t in texts]
+        missing = {}
+        for h, t in zip(hashes, texts):
+            if h not in self.rows and h not in missing:
+                missing[h] = t
+        if missing:
+            vectors = self.embedder.embed(list(missing.values()))
+            start = self._stored_rows()
+            with open(self.vectors_path, "ab") as fh:
+                fh.write(vectors.astype(np.float32).tobytes())
+            for offset, h in enumerate(missing):
+                self.rows[h] = start + offset
+            self._save_rows()
+            self.embedded += len(missing)
+        return hashes
+
+    def matrix(self):
+        """Memory-map every stored row as a read-only (rows, dim) float32 array."""
+        n = self._stored_rows()
+        if not n:
+            return np.zeros((0, self.embedder.dim), dtype=np.float32)
+        return np.memmap(self.vectors_path, dtype=np.float32, mode="r",
+                         shape=(n, self.embedder.dim))
+
+    def compact(self, live_hashes):
+        """Rewrite the cache keeping only live_hashes; return rows dropped."""
+        live = [h for h in dict.fromkeys(live_hashes) if h in self.rows]
+        dropped = len(self.rows) - len(live)
+        if not dropped:
+            return 0
+        kept = np.array(self.matrix()[[self.rows[h] for h in live]])
+        tmp = f"{self.vectors_path}.tmp"
+        with open(tmp, "wb") as fh:
+            fh.write(kept.tobytes())
+        os.replace(tmp, self.vectors_path)
+        self.rows = {h: i for i, h in enumerate(live)}
+        self._save_rows()
+        return dropped
+
+
+class VectorIndex:
+    """Brute-force cosine top-k over the cached embeddings of a chunk list."""
+
+    def __init__(self, chunks, store):
+        self.chunks = chunks
+        self.store = store
+        self.hashes = store.ensure([c["text"] for c in chunks])
+        rows = np.fromiter((store.rows[h] for h in self.hashes), dtype=np.int64,
+                           count=len(self.hashes))
+        matrix = store.matrix()
+        if len(rows) and np.array_equal(rows, np.arange(rows[0], rows[0] + len(rows))):
+            # Chunks map onto a contiguous run of rows: search the mapping itself.
+            self.vectors = matrix[rows[0] : rows[0] + len(rows)]
+        else:
+            self.vectors = matrix[rows]
+        self._masks = {}
+
+    def _mask(self, retrieval_filter):
+        key = json.dumps(retrieval_filter, sort_keys=True)
+        mask = self._masks.get(key)
+        if mask is None:
+            mask = np.fromiter(
+                (local_kb.matches_filter(c["metadata"], retrieval_filter) for c in self.chunks),
+                dtype=bool, count=len(self.chunks),
+            )
+            self._masks[key] = mask
+        return mask
+
+    def scores(self, queries):
+        """Return a (len(queries), len(chunks)) matrix of cosine similarities."""
+        q = self.store.embedder.embed(queries)
+        return q @ self.vectors.T
+
+    def search_many(self, queries, top_k, retrieval_filter=None):
+        """Top-k Retrieve-shaped results for each query, scored in one matmul."""
+        if not self.chunks:
+            return [[] for _ in queries]
+        sims = self.scores(queries)
+        if retrieval_filter:
+            sims[:, ~self._mask(retrieval_filter)] = -np.inf
+        k = min(top_k, sims.shape[1])
+        top = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+        results = []
+        for row, candidates in zip(sims, top):
+            # Highest score first; ties broken by chunk order (stable sort).
+            ordered = candidates[np.lexsort((candidates, -row[candidates]))]
+            results.append([
+                local_kb.to_retrieval_result(self.chunks[i], float(row[i]))
+                for i in ordered if row[i] != -np.inf
+            ])
+        return results
+
+    def search(self, query, top_k, retrieval_filter=None):
+        """Return the top_k Retrieve-shaped results for query."""
+        return self.search_many([query], top_k, retrieval_filter)[0]
+
+
+def build_vector_index(root=local_kb.DEFAULT_KB_DIR, cache_dir=DEFAULT_CACHE_DIR,
+                       chunker=local_kb.chunk_fixed):
+    """Load, chunk, embed (cache misses only) and index the local KB.
+
+    Rows of chunks that are no longer in the KB are compacted away first, so
+    the cache does not grow without bound as docs are edited.
+    """
+    chunks = local_kb.build_chunks(local_kb.load_documents(root), chunker)
+    store = VectorStore(cache_dir)
+    store.compact(store.ensure([c["text"] for c in chunks]))
+    return VectorIndex(chunks, store)
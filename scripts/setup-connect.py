@@ -11,8 +11,20 @@ import json
 import os
 import time
 import sys
+from concurrent.futures import ThreadPoolExecutor
 from botocore.exceptions import ClientError
 
+import waiters
+
+# Phone-number snapshot: describe calls in flight at once, and attempts per
+# number before its status is recorded as UNKNOWN.
+PHONE_LOOKUP_WORKERS = 8
+PHONE_LOOKUP_ATTEMPTS = 3
+PHONE_LOOKUP_BACKOFF = 1.0
+# Releases submitted at once, and how long to wait for them to take effect.
+PHONE_RELEASE_WORKERS = 8
+PHONE_RELEASE_TIMEOUT = 120
+
 
 def get_connect_client(region):
     """Create Connect client"""
@@ -59,10 +71,9 @@ def get_or_create_instance(client, instance_alias):
 def wait_for_instance_ready(client, instance_id, timeout=300):
     """Wait for Connect instance to be fully operational (able to list contact flows)"""
     print(f"  Waiting for Connect instance to be fully operational...")
-    start_time = time.time()
-    last_error = None
+    errors = []
 
-    while time.time() - start_time < timeout:
+    def probe():
         try:
             # Try to list contact flows - this is a good indicator that the instance is ready
             client.list_contact_flows(
@@ -70,68 +81,79 @@ def wait_for_instance_ready(client, instance_id, timeout=300):
                 ContactFlowTypes=['CONTACT_FLOW'],
                 MaxResults=1
             )
-            print(f"  Connect instance is ready")
-            return True
+            return 'READY'
         except ClientError as e:
             error_message = str(e)
             if 'inactive' in error_message.lower() or 'ResourceNotFoundException' in error_message:
-                last_error = e
+                errors.append(e)
                 print(f"  Instance not ready yet, waiting...")
-                time.sleep(15)
-            else:
-                print(f"  Error checking instance: {e}")
-                return False
-
-    print(f"  Timeout waiting for instance to be ready. Last error: {last_error}")
+                return 'NOT_READY'
+            print(f"  Error checking instance: {e}")
+            return 'ERROR'
+
+    result = waiters.Waiter(
+        f"instance {instance_id}", probe,
+        done=lambda state: state == 'READY',
+        failed=lambda state: state == 'ERROR',
+        timeout=timeout, delay=5, max_delay=30,
+    ).wait()
+    if result.outcome == waiters.DONE:
+        print(f"  Connect instance is ready")
+        return True
+    if result.outcome == waiters.TIMEOUT:
+        print(f"  Timeout waiting for instance to be ready. Last error: {errors[-1] if errors else None}")
     return False
 
 
+def phone_number_waiter(client, phone_number_id, timeout=180):
+    """Waiter for a claimed number settling in CLAIMED (FAILED/CANCELLED are terminal).
+
+    The probed state is (status, message).
+    """
+    def probe():
+        response = client.describe_phone_number(PhoneNumberId=phone_number_id)
+        status = response.get('ClaimedPhoneNumberSummary', {}).get('PhoneNumberStatus', {})
+        status_value = status.get('Status', 'UNKNOWN')
+        if status_value not in ('CLAIMED', 'FAILED', 'CANCELLED'):
+            print(f"  Status: {status_value}, waiting...")
+        return status_value, status.get('Message', '')
+
+    return waiters.Waiter(
+        f"phone number {phone_number_id}", probe,
+        done=lambda state: state[0] == 'CLAIMED',
+        failed=lambda state: state[0] in ('FAILED', 'CANCELLED'),
+        timeout=timeout, delay=5, max_delay=20, retry_on=(ClientError,))
+
+
 def wait_for_phone_number_ready(client, phone_number_id, timeout=180):
     """Wait for phone number to be in CLAIMED status (ready for use)"""
     print(f"  Waiting for phone number to be provisioned...")
-    start_time = time.time()
+    result = phone_number_waiter(client, phone_number_id, timeout).wait()
 
-    while time.time() - start_time < timeout:
-        try:
-            response = client.describe_phone_number(PhoneNumberId=phone_number_id)
-            status = response.get('ClaimedPhoneNumberSummary', {}).get('PhoneNumberStatus', {})
-            status_value = status.get('Status', 'UNKNOWN')
-            status_message = status.get('Message', '')
-
-            if status_value == 'CLAIMED':
-                print(f"  Phone number is ready (status: CLAIMED)")
-                return True
-            elif status_value in ['FAILED', 'CANCELLED']:
-                print(f"  Phone number provisioning failed: {status_value}")
-                if status_message:
-                    print(f"  Message: {status_message}")
-                if 'limit' in status_message.lower() or 'quota' in status_message.lower():
-                    print("")
-                    print("  ⚠️  PHONE NUMBER QUOTA ISSUE DETECTED")
-                    print("  This is a known AWS issue. Resolution requires AWS Support.")
-                    print("")
-                return False
-            elif status_value == 'IN_PROGRESS':
-                print(f"  Status: IN_PROGRESS, waiting...")
-                time.sleep(10)
-            else:
-                print(f"  Status: {status_value}, waiting...")
-                time.sleep(5)
-        except ClientError as e:
-            print(f"  Error checking status: {e}")
-            time.sleep(5)
+    if result.outcome == waiters.DONE:
+        print(f"  Phone number is ready (status: CLAIMED)")
+        return True
+    if result.outcome == waiters.FAILED:
+        status_value, status_message = result.state
+        print(f"  Phone number provisioning failed: {status_value}")
+        if status_message:
+            print(f"  Message: {status_message}")
+        if 'limit' in status_message.lower() or 'quota' in status_message.lower():
+            print("")
+            print("  ⚠️  PHONE NUMBER QUOTA ISSUE DETECTED")
+            print("  This is a known AWS issue. Resolution requires AWS Support.")
+            print("")
+        return False
 
     print(f"  Timeout waiting for phone number to be ready")
     return False
 
 
 def release_phone_number(client, phone_number_id):
-    """Release a phone number from Connect"""
+    """Release a phone number from Connect (returns once the release is accepted)"""
     try:
         client.release_phone_number(PhoneNumberId=phone_number_id)
         print(f"  Released phone number: {phone_number_id}")
-        # Wait for release to complete
-        time.sleep(5)
         return True
     except ClientError as e:
         if 'ResourceNotFoundException' in str(e):
@@ -141,61 +163,181 @@ def release_phone_number(client, phone_number_id):
         return False
 
 
-def get_phone_number_status(client, phone_number_id):
-    """Get the status of a phone number"""
-    try:
-        response = client.describe_phone_number(PhoneNumberId=phone_number_id)
+def release_waiter(client, phone_number_id, timeout=PHONE_RELEASE_TIMEOUT):
+    """Waiter for a released number disappearing from describe_phone_number."""
+    def probe():
+        try:
+            response = client.describe_phone_number(PhoneNumberId=phone_number_id)
+        except ClientError as e:
+            if 'ResourceNotFoundException' in str(e):
+                return 'RELEASED'
+            raise
         status = response.get('ClaimedPhoneNumberSummary', {}).get('PhoneNumberStatus', {})
         return status.get('Status', 'UNKNOWN')
-    except ClientError as e:
-        if 'ResourceNotFoundException' in str(e):
-            return 'NOT_FOUND'
-        print(f"  Error getting phone number status: {e}")
-        return 'ERROR'
 
+    return waiters.Waiter(
+        f"release {phone_number_id}", probe,
+        done=lambda status: status == 'RELEASED',
+        timeout=timeout, delay=2, max_delay=10, retry_on=(ClientError,))
 
-def find_and_cleanup_failed_phone_numbers(client, instance_id):
-    """Find and release any phone numbers in FAILED state"""
+
+def release_phone_numbers(client, records, max_workers=PHONE_RELEASE_WORKERS):
+    """
+    Release the given snapshot records concurrently, then wait for all of the
+    releases together. Returns the PhoneNumberIds whose release was accepted.
+
+    Per-number isolation: a failed (or raising) release is logged and skipped
+    without affecting the others. A release that has not propagated by the
+    deadline is still counted (Connect accepted it) but logged.
+    """
+    if not records:
+        return []
+
+    def release(rec):
+        try:
+            return release_phone_number(client, rec['PhoneNumberId'])
+        except Exception as e:
+            print(f"  Error releasing {rec.get('PhoneNumber', rec['PhoneNumberId'])}: {e} - skipping")
+            return False
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(records))) as pool:
+        accepted = [rec['PhoneNumberId'] for rec, ok in zip(records, pool.map(release, records)) if ok]
+    if not accepted:
+        return []
+
+    print(f"  Waiting for {len(accepted)} release(s) to propagate...")
+    results = waiters.wait_all([release_waiter(client, phone_id) for phone_id in accepted])
+    for phone_id in accepted:
+        result = results[f"release {phone_id}"]
+        if result.outcome != waiters.DONE:
+            print(f"  Warning: release of {phone_id} not yet visible after "
+                  f"{result.elapsed:.0f}s (last status: {result.state})")
+    return accepted
+
+
+def instance_target_arn(instance_id):
+    """The TargetArn for phone-number calls (instance_id may already be an ARN)."""
+    if instance_id.startswith('arn:'):
+        return instance_id
+    return f"arn:aws:connect:us-east-1:{get_account_id()}:instance/{instance_id}"
+
+
+def describe_phone_number_with_retry(client, phone_number_id, attempts=PHONE_LOOKUP_ATTEMPTS):
+    """Return the ClaimedPhoneNumberSummary, or None if the number is gone.
+
+    Any other error is retried with exponential backoff; the last one is
+    raised once the attempts are used up.
+    """
+    for attempt in range(attempts):
+        try:
+            response = client.describe_phone_number(PhoneNumberId=phone_number_id)
+            return response.get('ClaimedPhoneNumberSummary', {})
+        except ClientError as e:
+            if 'ResourceNotFoundException' in str(e):
+                return None
+            if attempt == attempts - 1:
+                raise
+            time.sleep(PHONE_LOOKUP_BACKOFF * 2 ** attempt)
+
+
+def load_phone_number_snapshot(client, instance_id, max_workers=PHONE_LOOKUP_WORKERS):
+    """
+    List every phone number on the instance once and describe them
+    concurrently (at most max_workers describe calls in flight).
+
+    Returns a list of dicts with: PhoneNumberId, PhoneNumber, PhoneNumberArn,
+    Status, StatusMessage and ContactFlowId (None if not associated). A number
+    that still cannot be described after PHONE_LOOKUP_ATTEMPTS has Status and
+    ContactFlowId 'UNKNOWN' (callers treat it as in use); one released between
+    the listing and the describe has Status 'NOT_FOUND'. Returns None if the
+    listing itself fails.
+
+    The snapshot is shared by the cleanup, reuse and release steps so the
+    numbers are listed and described once per run.
+    """
     try:
-        if instance_id.startswith('arn:'):
-            target_arn = instance_id
-        else:
-            target_arn = f"arn:aws:connect:us-east-1:{get_account_id()}:instance/{instance_id}"
-
-        response = client.list_phone_numbers_v2(TargetArn=target_arn)
-
-        released_count = 0
-        for phone in response.get('ListPhoneNumbersSummaryList', []):
-            phone_id = phone.get('PhoneNumberId')
-            if phone_id:
-                status = get_phone_number_status(client, phone_id)
-                if status in ['FAILED', 'CANCELLED']:
-                    print(f"  Found failed phone number: {phone.get('PhoneNumber')} (status: {status})")
-                    if release_phone_number(client, phone_id):
-                        released_count += 1
-
-        if released_count > 0:
-            print(f"  Released {released_count} failed phone number(s)")
-            # Wait for releases to fully propagate
-            print("  Waiting for releases to propagate...")
-            time.sleep(30)
-
-        return released_count
+        target_arn = instance_target_arn(instance_id)
+        listed = []
+        paginator_token = None
+        while True:
+            kwargs = {'TargetArn': target_arn, 'MaxResults': 100}
+            if paginator_token:
+                kwargs['NextToken'] = paginator_token
+            response = client.list_phone_numbers_v2(**kwargs)
+            listed.extend(item for item in response.get('ListPhoneNumbersSummaryList', [])
+                          if item.get('PhoneNumberId'))
+            paginator_token = response.get('NextToken')
+            if not paginator_token:
+                break
     except ClientError as e:
-        print(f"  Error cleaning up failed phone numbers: {e}")
+        print(f"Error listing instance phone numbers: {e}")
+        return None
+
+    def describe(item):
+        record = {
+            'PhoneNumberId': item['PhoneNumberId'],
+            'PhoneNumber': item.get('PhoneNumber'),
+            'PhoneNumberArn': item.get('PhoneNumberArn'),
+        }
+        try:
+            summary = describe_phone_number_with_retry(client, item['PhoneNumberId'])
+        except ClientError as e:
+            print(f"  Warning: could not describe phone number {item['PhoneNumberId']} "
+                  f"after {PHONE_LOOKUP_ATTEMPTS} attempts: {e}")
+            record.update(Status='UNKNOWN', StatusMessage='', ContactFlowId='UNKNOWN')
+            return record
+        if summary is None:
+            record.update(Status='NOT_FOUND', StatusMessage='', ContactFlowId=None)
+            return record
+        status = summary.get('PhoneNumberStatus', {})
+        status_value = status.get('Status', 'UNKNOWN')
+        # The ContactFlowId field is present when the number is associated. A
+        # number without a status is handled like a failed describe: its
+        # association is UNKNOWN too, so it is never re-pointed or released.
+        flow_id = 'UNKNOWN' if status_value == 'UNKNOWN' else summary.get('ContactFlowId')
+        record.update(Status=status_value,
+                      StatusMessage=status.get('Message', ''),
+                      ContactFlowId=flow_id)
+        return record
+
+    if not listed:
+        return []
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(listed))) as pool:
+        return list(pool.map(describe, listed))
+
+
+def find_and_cleanup_failed_phone_numbers(client, instance_id, snapshot=None):
+    """Find and release any phone numbers in FAILED state"""
+    if snapshot is None:
+        snapshot = load_phone_number_snapshot(client, instance_id)
+    if snapshot is None:
+        print("  Could not list phone numbers - skipping failed-number cleanup")
         return 0
 
+    failed = []
+    for rec in snapshot:
+        status = rec['Status']
+        if status in ['FAILED', 'CANCELLED']:
+            print(f"  Found failed phone number: {rec['PhoneNumber']} (status: {status})")
+            failed.append(rec)
+
+    released = set(release_phone_numbers(client, failed))
+    for rec in failed:
+        if rec['PhoneNumberId'] in released:
+            rec['Status'] = 'RELEASED'
+
+    if released:
+        print(f"  Released {len(released)} failed phone number(s)")
+
+    return len(released)
+
 
 def claim_phone_number(client, instance_id, country_code='US', phone_type='DID', description='', max_retries=3):
     """Claim a phone number for the Connect instance with retry logic"""
 
     for attempt in range(max_retries):
         try:
-            # Determine the target ARN - instance_id might already be an ARN
-            if instance_id.startswith('arn:'):
-                target_arn = instance_id
-            else:
-                target_arn = f"arn:aws:connect:us-east-1:{get_account_id()}:instance/{instance_id}"
+            target_arn = instance_target_arn(instance_id)
 
             # Search for available phone numbers
             response = client.search_available_phone_numbers(
@@ -402,97 +544,39 @@ def get_contact_flow_id_by_name(client, instance_id, flow_name):
     return None
 
 
-def verify_phone_number_exists(client, instance_id, phone_number):
+def verify_phone_number_exists(client, instance_id, phone_number, snapshot=None):
     """Verify if a phone number is claimed and active in Connect (not failed)"""
-    try:
-        # Get target ARN
-        if instance_id.startswith('arn:'):
-            target_arn = instance_id
-        else:
-            target_arn = f"arn:aws:connect:us-east-1:{get_account_id()}:instance/{instance_id}"
-
-        response = client.list_phone_numbers_v2(TargetArn=target_arn)
-
-        for phone in response.get('ListPhoneNumbersSummaryList', []):
-            if phone.get('PhoneNumber') == phone_number:
-                # Also check the phone number status
-                phone_id = phone.get('PhoneNumberId')
-                if phone_id:
-                    status = get_phone_number_status(client, phone_id)
-                    if status == 'CLAIMED':
-                        return True
-                    else:
-                        print(f"  Phone number exists but status is {status}")
-                        return False
-                return True
-        return False
-    except ClientError as e:
-        print(f"Error verifying phone number: {e}")
+    if snapshot is None:
+        snapshot = load_phone_number_snapshot(client, instance_id)
+    if snapshot is None:
         return False
 
+    for rec in snapshot:
+        if rec['PhoneNumber'] == phone_number:
+            if rec['Status'] == 'CLAIMED':
+                return True
+            print(f"  Phone number exists but status is {rec['Status']}")
+            return False
+    return False
+
 
-def list_all_instance_phone_numbers(client, instance_id):
+def list_all_instance_phone_numbers(client, instance_id, snapshot=None):
     """
     Return a list of dicts for every phone number claimed to this instance.
     Each dict has: PhoneNumberId, PhoneNumber, PhoneNumberArn, Status,
     and ContactFlowId (may be None if not associated with any flow).
-    Only returns numbers whose status is CLAIMED.
-    """
-    try:
-        if instance_id.startswith('arn:'):
-            target_arn = instance_id
-        else:
-            target_arn = f"arn:aws:connect:us-east-1:{get_account_id()}:instance/{instance_id}"
-
-        results = []
-        paginator_token = None
-        while True:
-            kwargs = {'TargetArn': target_arn, 'MaxResults': 100}
-            if paginator_token:
-                kwargs['NextToken'] = paginator_token
-            response = client.list_phone_numbers_v2(**kwargs)
-            for item in response.get('ListPhoneNumbersSummaryList', []):
-                phone_id = item.get('PhoneNumberId')
-                if not phone_id:
-                    continue
-                # Only care about CLAIMED numbers
-                status = get_phone_number_status(client, phone_id)
-                if status != 'CLAIMED':
-                    continue
-                # Determine associated contact flow (if any)
-                contact_flow_id = get_phone_number_contact_flow(client, phone_id)
-                results.append({
-                    'PhoneNumberId': phone_id,
-                    'PhoneNumber': item.get('PhoneNumber'),
-                    'PhoneNumberArn': item.get('PhoneNumberArn'),
-                    'Status': 'CLAIMED',
-                    'ContactFlowId': contact_flow_id,
-                })
-            paginator_token = response.get('NextToken')
-            if not paginator_token:
-                break
-        return results
-    except ClientError as e:
-        print(f"Error listing instance phone numbers: {e}")
-        return []
-
+    Returns numbers whose status is CLAIMED, plus numbers whose status could
+    not be determined after retries (Status and ContactFlowId 'UNKNOWN':
+    callers treat these as in use and never reuse or release them).
 
-def get_phone_number_contact_flow(client, phone_number_id):
+    The records are the snapshot's own dicts, so updates made by the caller
+    (e.g. ContactFlowId after re-association) are visible to later steps.
     """
-    Return the ContactFlowId that a phone number is associated with,
-    or None if it is not associated with any flow.
-    Returns the sentinel string 'UNKNOWN' if the association status
-    cannot be determined (caller should treat this as in-use / do not release).
-    """
-    try:
-        response = client.describe_phone_number(PhoneNumberId=phone_number_id)
-        summary = response.get('ClaimedPhoneNumberSummary', {})
-        # The ContactFlowId field is present when the number is associated
-        flow_id = summary.get('ContactFlowId')
-        return flow_id  # None means not associated
-    except ClientError as e:
-        print(f"  Warning: could not describe phone number {phone_number_id}: {e}")
-        return 'UNKNOWN'
+    if snapshot is None:
+        snapshot = load_phone_number_snapshot(client, instance_id)
+    if snapshot is None:
+        return []
+    return [rec for rec in snapshot if rec['Status'] in ('CLAIMED', 'UNKNOWN')]
 
 
 def resolve_phone_for_path(
@@ -638,6 +722,9 @@ def release_extra_phone_numbers(client, all_claimed_numbers, assigned_ids, neede
         we cannot determine their state).
       - Per-number try/except: one release failure does not abort the rest.
 
+    The releases that pass both gates are submitted concurrently and awaited
+    together (release_phone_numbers).
+
     Args:
         client:             boto3 Connect client
         all_claimed_numbers: snapshot list from list_all_instance_phone_numbers
@@ -659,7 +746,7 @@ def release_extra_phone_numbers(client, all_claimed_numbers, assigned_ids, neede
         return
 
     print(f"  {len(extras)} extra number(s) to release (keeping {needed_count} assigned number(s))")
-    released = 0
+    to_release = []
     for rec in extras:
         phone_id = rec['PhoneNumberId']
         phone_num = rec.get('PhoneNumber', phone_id)
@@ -671,11 +758,9 @@ def release_extra_phone_numbers(client, all_claimed_numbers, assigned_ids, neede
 
         flow_info = f"flow {current_flow}" if current_flow else "no flow"
         print(f"  Releasing extra number {phone_num} (ID: {phone_id}, currently on {flow_info}) - not needed by Lex or Nova Sonic")
-        try:
-            if release_phone_number(client, phone_id):
-                released += 1
-        except Exception as e:
-            print(f"  Error releasing {phone_num}: {e} - skipping")
+        to_release.append(rec)
+
+    released = len(release_phone_numbers(client, to_release))
 
     if released:
         print(f"  Released {released} extra phone number(s); {needed_count} number(s) remain assigned")
@@ -757,15 +842,21 @@ def main():
     if args.skip_phone_numbers:
         print("Skipping phone number claiming (--skip-phone-numbers)")
     else:
+        # List and describe every number on the instance once; the cleanup,
+        # reuse and orphan-release steps all work from this snapshot.
+        print("Loading all phone numbers for this instance...")
+        snapshot = load_phone_number_snapshot(connect_client, instance_id)
+
         # First, clean up any failed phone numbers from previous attempts
         print("Checking for failed phone numbers to clean up...")
-        find_and_cleanup_failed_phone_numbers(connect_client, instance_id)
-
-        # Build a single snapshot of all CLAIMED numbers on this instance.
-        # This is used for both the reuse logic and the orphan-release pass.
-        print("Loading all claimed phone numbers for this instance...")
-        all_claimed = list_all_instance_phone_numbers(connect_client, instance_id)
-        print(f"  Found {len(all_claimed)} CLAIMED phone number(s) on this instance")
+        find_and_cleanup_failed_phone_numbers(connect_client, instance_id, snapshot)
+
+        # The CLAIMED numbers on this instance, used for both the reuse logic
+        # and the orphan-release pass.
+        all_claimed = list_all_instance_phone_numbers(connect_client, instance_id, snapshot)
+        unknown = sum(1 for rec in all_claimed if rec['Status'] == 'UNKNOWN')
+        print(f"  Found {len(all_claimed) - unknown} CLAIMED phone number(s) on this instance"
+              + (f" (+{unknown} with UNKNOWN status)" if unknown else ""))
 
         # Track which phone number IDs we intentionally assign so the orphan
         # pass knows what to leave alone.
@@ -6,11 +6,62 @@ This script REPLACES the former bare `aws s3 sync` step in deploy.yml. It:
   1. Syncs the local knowledge-base/ tree to the KB docs S3 bucket
      (upload changed/new objects, delete objects no longer present locally),
      excluding VCS/OS cruft.
-  2. Starts a Bedrock Knowledge Base ingestion job against the S3 data source.
-  3. Polls the ingestion job until it reaches COMPLETE.
-
-It is idempotent: re-running with no doc changes simply re-ingests (Bedrock
-skips unchanged chunks) and the SSM-sourced identifiers are read fresh each run.
+  2. Starts a Bedrock Knowledge Base ingestion job against the S3 data source,
+     or — when only a few documents changed — ingests/deletes just those
+     documents through the direct document ingestion APIs.
+  3. Polls the ingestion job (or the individual documents) until COMPLETE.
+
+It is idempotent: re-running with no doc changes uploads nothing and skips
+ingestion (see "Targeted ingestion" below), and the SSM-sourced identifiers
+are read fresh each run.
+
+Sync manifest: one JSON object (MANIFEST_KEY) in the separate sync-state bucket
+records, for every synced doc, its size, mtime, content MD5 and the ETag it was uploaded
+with. When the manifest is present and current, the remote state is read from
+it with a single GET instead of paginating list_objects_v2, and local files
+whose size+mtime still match their entry are not re-hashed. The manifest is
+only rewritten when the sync actually changed the bucket (or had to rebuild it
+from a full listing), so a no-change run costs one GET. Use --full-listing to
+reconcile against the real bucket contents after out-of-band edits. The
+manifest is kept out of the docs bucket because the data source crawls that
+whole bucket; without a sync-state bucket every run uses a full listing.
+
+Transfers: uploads and delete_objects batches are submitted to one bounded
+thread pool (--max-workers) sharing a single S3 client whose connection pool
+is sized to match, so deletes overlap with uploads. Each object is retried
+with full-jitter exponential backoff on throttling/transient errors; anything
+still failing after TRANSFER_MAX_ATTEMPTS fails the step.
+
+Change detection is multipart-aware: uploads use an explicit TRANSFER_CONFIG,
+so the local ETag is rebuilt with the same part size (MD5 of the part MD5s
+plus "-<parts>") for files above the multipart threshold. Every upload also
+stores the whole-file MD5 as object metadata (CONTENT_MD5_METADATA_KEY); a
+multipart ETag that still disagrees (e.g. an object written with another part
+size) is settled with one head_object against that stored hash.
+
+Targeted ingestion: the sync emits a change set (added / modified / deleted
+keys, optionally written with --change-set-out). The change set is also kept
+in the manifest as "pending" until an ingestion succeeds, so a failed deploy
+does not lose track of what still needs ingesting. --ingestion picks the mode:
+  auto     (default) targeted when the affected document count is at most
+           --full-ingest-threshold, a full ingestion job otherwise;
+  targeted always ingest just the affected documents;
+  full     always run a full start_ingestion_job (the original behaviour).
+A change set is only trusted when it came from an existing manifest; after a
+rebuild (no manifest, --full-listing) or with --skip-sync a full job runs.
+An empty change set skips ingestion entirely.
+
+Content checks (scripts/kb_checks.py) run before anything is uploaded:
+  --sidecars         every doc's .metadata.json is validated against the
+                     controlled vocabulary the Lambda filters on (symptom =
+                     triage.AllSymptomClasses + general, brand/connection_type
+                     = the B-07 slot values + any); the per-value filter
+                     selectivity is printed. Default fail.
+  --near-duplicates  chunk pairs from different docs at or above
+                     --duplicate-threshold Jaccard (MinHash/LSH over the data
+                     source's chunking) are listed with paths and metadata.
+                     Default warn.
+Each takes warn (report only), fail (stop the step) or off.
 
 Fail-closed: ANY failure (missing config, sync error, ingestion FAILED/STOPPED,
 or poll timeout) exits non-zero so the GitHub Actions step fails. There is no
@@ -21,16 +72,27 @@ Resolution of KB identifiers:
                    actually resolved from --bucket or the kb-id's KB describe call.
   - kb-id:         SSM /headset-agent/<env>/kb-id            (written by CloudFormation)
   - data-source-id SSM /headset-agent/<env>/kb-data-source-id (written by CloudFormation)
+  - Manifest:      --manifest-bucket or SSM /headset-agent/<env>/kb-sync-state-bucket
+                   (written by CloudFormation)
 """
 
 import argparse
 import hashlib
+import json
 import os
+import random
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 import boto3
-from botocore.exceptions import ClientError
+from boto3.exceptions import S3UploadFailedError
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import BotoCoreError, ClientError
+from s3transfer.utils import ChunksizeAdjuster
+
+import kb_checks
 
 # Local doc tree relative to the repo root.
 KB_LOCAL_DIR = "knowledge-base"
@@ -41,7 +103,62 @@ EXCLUDE_DIR_PARTS = (".git",)
 
 # Ingestion job is normally quick for a small corpus; cap generously.
 POLL_TIMEOUT_SECONDS = 1800  # 30 minutes
-POLL_INTERVAL_SECONDS = 10
+# Adaptive polling: start fast (small jobs finish in seconds) and back off
+# geometrically to a cap. An IN_PROGRESS job whose status and statistics do
+# not move for the stall window is stopped and failed early instead of burning
+# the full timeout; the stall clock only runs while the job is IN_PROGRESS.
+POLL_INITIAL_SECONDS = 2
+POLL_BACKOFF_FACTOR = 1.5
+POLL_MAX_INTERVAL_SECONDS = 30
+DEFAULT_STALL_TIMEOUT_SECONDS = 300
+
+# Sync manifest object, stored in the sync-state bucket rather than the docs
+# bucket the data source crawls (see module docstring). Bump MANIFEST_VERSION
+# whenever the entry layout changes; an unknown version forces a full listing
+# rebuild.
+MANIFEST_KEY = "kb-sync-manifest.json"
+MANIFEST_VERSION = 2
+
+# Transfer engine. delete_objects accepts at most 1000 keys per call.
+DEFAULT_MAX_WORKERS = 8
+DELETE_BATCH_SIZE = 1000
+TRANSFER_MAX_ATTEMPTS = 4
+TRANSFER_BACKOFF_BASE_SECONDS = 0.5
+RETRYABLE_ERROR_CODES = {
+    "SlowDown",
+    "Throttling",
+    "ThrottlingException",
+    "RequestTimeout",
+    "RequestTimeTooSkewed",
+    "InternalError",
+    "ServiceUnavailable",
+    "500",
+    "503",
+}
+
+# Multipart settings are pinned (they match the boto3 defaults) because the
+# local ETag rebuild in file_digests() must use the exact same part size.
+MULTIPART_THRESHOLD = 8 * 1024 * 1024
+MULTIPART_CHUNKSIZE = 8 * 1024 * 1024
+TRANSFER_CONFIG = TransferConfig(
+    multipart_threshold=MULTIPART_THRESHOLD,
+    multipart_chunksize=MULTIPART_CHUNKSIZE,
+)
+# User metadata key (x-amz-meta-kb-content-md5) carrying the whole-file MD5.
+CONTENT_MD5_METADATA_KEY = "kb-content-md5"
+
+# Targeted ingestion. IngestKnowledgeBaseDocuments, DeleteKnowledgeBaseDocuments
+# and GetKnowledgeBaseDocuments accept at most 10 documents per call, so a
+# change set under the full-ingest threshold can still span several batches.
+INGESTION_MODES = ("auto", "targeted", "full")
+# Pre-upload content check modes (see "Content checks").
+CHECK_MODES = ("warn", "fail", "off")
+DEFAULT_FULL_INGEST_THRESHOLD = 20
+DOCUMENT_BATCH_SIZE = 10
+METADATA_SUFFIX = ".metadata.json"
+DOC_TERMINAL_OK = {"INDEXED", "PARTIALLY_INDEXED", "METADATA_PARTIALLY_INDEXED", "IGNORED"}
+DOC_TERMINAL_BAD = {"FAILED", "METADATA_UPDATE_FAILED"}
+DOC_DELETED = {"NOT_FOUND"}
 
 TERMINAL_OK = {"COMPLETE"}
 TERMINAL_BAD = {"FAILED", "STOPPED"}
@@ -91,6 +208,23 @@ def resolve_config(args, ssm, bedrock_agent):
     return bucket, kb_id, ds_id
 
 
+def resolve_manifest_bucket(args, ssm, bucket):
+    """Resolve the sync-state bucket holding the manifest, or None without one."""
+    manifest_bucket = args.manifest_bucket or ssm_get(
+        ssm, f"/headset-agent/{args.environment}/kb-sync-state-bucket"
+    )
+    if not manifest_bucket:
+        print("  WARNING: no sync-state bucket; the sync will use a full listing "
+              "and always run a full ingestion job")
+        return None
+    if manifest_bucket == bucket:
+        sys.exit(
+            f"ERROR: the sync manifest cannot live in the docs bucket {bucket}: "
+            f"the data source would ingest it. Use a separate --manifest-bucket."
+        )
+    return manifest_bucket
+
+
 def iter_local_docs(root):
     """Yield (absolute_path, s3_key) for every doc to upload."""
     for dirpath, dirnames, filenames in os.walk(root):
@@ -104,60 +238,508 @@ def iter_local_docs(root):
             yield abspath, rel
 
 
-def s3_etag_md5(path):
-    """Compute the MD5 hex digest used by S3 ETag for non-multipart objects."""
-    h = hashlib.md5()
+def file_digests(path, size):
+    """Return (content_md5, s3_etag) for a local file.
+
+    The ETag is what S3 reports after upload_file with TRANSFER_CONFIG: the
+    plain MD5 below the multipart threshold, otherwise the MD5 of the
+    concatenated per-part MD5 digests suffixed with "-<part count>". Both
+    digests come from a single read of the file.
+    """
+    whole = hashlib.md5()
+    if size < MULTIPART_THRESHOLD:
+        with open(path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(1024 * 1024), b""):
+                whole.update(chunk)
+        digest = whole.hexdigest()
+        return digest, digest
+
+    # s3transfer grows the part size for very large files (10,000 part cap);
+    # mirror that so the part boundaries line up.
+    part_size = ChunksizeAdjuster().adjust_chunksize(MULTIPART_CHUNKSIZE, size)
+    part_digests = []
     with open(path, "rb") as fh:
-        for chunk in iter(lambda: fh.read(1024 * 1024), b""):
-            h.update(chunk)
-    return h.hexdigest()
+        for part in iter(lambda: fh.read(part_size), b""):
+            whole.update(part)
+            part_digests.append(hashlib.md5(part).digest())
+    etag = hashlib.md5(b"".join(part_digests)).hexdigest()
+    return whole.hexdigest(), f"{etag}-{len(part_digests)}"
 
 
-def sync_docs(s3, bucket, root):
-    """Upload new/changed docs and delete S3 objects no longer present locally.
+def load_manifest(s3, bucket):
+    """Return the manifest dict from the sync-state bucket, or None when absent.
+
+    The dict always has "files" ({key: entry}) and "pending" ({key: kind},
+    kind being "added", "modified" or "deleted") populated.
 
-    Returns the number of objects uploaded. Raises on any S3 error so the
-    caller can fail the step.
+    A missing, unreadable or wrong-version manifest returns None so the caller
+    falls back to a full listing (and rewrites a fresh manifest).
     """
-    if not os.path.isdir(root):
-        sys.exit(f"ERROR: local knowledge-base directory not found: {root}")
+    try:
+        resp = s3.get_object(Bucket=bucket, Key=MANIFEST_KEY)
+    except ClientError as exc:
+        if exc.response["Error"]["Code"] in ("NoSuchKey", "404"):
+            return None
+        raise
+    try:
+        data = json.loads(resp["Body"].read())
+    except ValueError:
+        print(f"  WARNING: s3://{bucket}/{MANIFEST_KEY} is not valid JSON; ignoring it")
+        return None
+    if not isinstance(data, dict) or data.get("version") != MANIFEST_VERSION:
+        print(f"  manifest version {data.get('version') if isinstance(data, dict) else None!r} "
+              f"!= {MANIFEST_VERSION}; rebuilding from a full listing")
+        return None
+    data.setdefault("files", {})
+    data.setdefault("pending", {})
+    return data
+
+
+def save_manifest(s3, bucket, entries, pending):
+    """Write the manifest entries and pending change set as one JSON object."""
+    body = json.dumps(
+        {"version": MANIFEST_VERSION, "files": entries, "pending": pending},
+        indent=1,
+        sort_keys=True,
+    ).encode("utf-8")
+    s3.put_object(
+        Bucket=bucket,
+        Key=MANIFEST_KEY,
+        Body=body,
+        ContentType="application/json",
+    )
+
 
-    # Current remote objects -> ETag.
+def list_remote_etags(s3, bucket):
+    """Return {key: {"etag": ETag}} for every object in the docs bucket."""
     remote = {}
     paginator = s3.get_paginator("list_objects_v2")
     for page in paginator.paginate(Bucket=bucket):
         for obj in page.get("Contents", []):
-            remote[obj["Key"]] = obj["ETag"].strip('"')
+            remote[obj["Key"]] = {"etag": obj["ETag"].strip('"')}
+    return remote
+
 
-    local_keys = set()
-    uploaded = 0
+def scan_local_docs(root, previous):
+    """Return {key: entry} describing every local doc.
+
+    Each entry holds the absolute path, size, integer mtime, content MD5 and
+    expected S3 ETag. Both digests are reused from `previous` (the last
+    manifest) when size and mtime are unchanged, so only touched files are
+    re-hashed.
+    """
+    local = {}
     for abspath, key in iter_local_docs(root):
-        local_keys.add(key)
-        local_md5 = s3_etag_md5(abspath)
-        if remote.get(key) == local_md5:
-            continue  # unchanged
-        print(f"  upload: {key}")
-        s3.upload_file(abspath, bucket, key)
-        uploaded += 1
+        st = os.stat(abspath)
+        size, mtime = st.st_size, int(st.st_mtime)
+        prev = previous.get(key)
+        if prev and prev.get("size") == size and prev.get("mtime") == mtime:
+            md5, etag = prev["md5"], prev["etag"]
+        else:
+            md5, etag = file_digests(abspath, size)
+        local[key] = {
+            "path": abspath,
+            "size": size,
+            "mtime": mtime,
+            "md5": md5,
+            "etag": etag,
+        }
+    return local
+
+
+def is_unchanged(s3, bucket, key, entry, remote_entry):
+    """True when the remote object already holds the local content.
+
+    Manifest entries carry the content MD5 and are compared on it directly.
+    Listing entries only carry the ETag: a match is conclusive, and a
+    non-matching multipart ETag falls back to the content hash stored in the
+    object's metadata by upload_doc.
+    """
+    if remote_entry is None:
+        return False
+    if remote_entry.get("md5"):
+        return remote_entry["md5"] == entry["md5"]
+    etag = remote_entry.get("etag") or ""
+    if etag == entry["etag"]:
+        return True
+    if "-" not in etag:
+        return False
+    head = with_retry(f"head {key}", s3.head_object, Bucket=bucket, Key=key)
+    return head.get("Metadata", {}).get(CONTENT_MD5_METADATA_KEY) == entry["md5"]
+
+
+def is_retryable(exc):
+    """True for throttling / transient S3 failures worth another attempt."""
+    if isinstance(exc, (BotoCoreError, S3UploadFailedError)):
+        return True
+    if isinstance(exc, ClientError):
+        return exc.response.get("Error", {}).get("Code") in RETRYABLE_ERROR_CODES
+    return False
+
+
+def with_retry(label, fn, *args, **kwargs):
+    """Call fn, retrying retryable errors with full-jitter exponential backoff."""
+    for attempt in range(1, TRANSFER_MAX_ATTEMPTS + 1):
+        try:
+            return fn(*args, **kwargs)
+        except Exception as exc:
+            if attempt == TRANSFER_MAX_ATTEMPTS or not is_retryable(exc):
+                raise
+            delay = random.uniform(0, TRANSFER_BACKOFF_BASE_SECONDS * 2 ** attempt)
+            print(f"  retry {attempt}/{TRANSFER_MAX_ATTEMPTS - 1} for {label} "
+                  f"in {delay:.2f}s: {exc}")
+            time.sleep(delay)
+
+
+def upload_doc(s3, bucket, path, key, md5):
+    """Upload one doc (with retries); returns the number of bytes sent.
+
+    The content MD5 is stored as object metadata so multipart objects can be
+    recognised as unchanged even when their ETag cannot be reproduced.
+    """
+    with_retry(
+        f"upload {key}",
+        s3.upload_file,
+        path,
+        bucket,
+        key,
+        ExtraArgs={"Metadata": {CONTENT_MD5_METADATA_KEY: md5}},
+        Config=TRANSFER_CONFIG,
+    )
+    return os.path.getsize(path)
+
 
+def delete_batch(s3, bucket, keys):
+    """Delete up to DELETE_BATCH_SIZE keys, retrying keys S3 reports as failed."""
+    pending = list(keys)
+
+    def attempt():
+        resp = s3.delete_objects(
+            Bucket=bucket, Delete={"Objects": [{"Key": k} for k in pending]}
+        )
+        errors = resp.get("Errors", [])
+        if errors:
+            pending[:] = [e["Key"] for e in errors]
+            code = errors[0].get("Code", "InternalError")
+            raise ClientError(
+                {"Error": {"Code": code, "Message": f"{len(errors)} key(s) not deleted"}},
+                "DeleteObjects",
+            )
+
+    with_retry(f"delete batch of {len(keys)}", attempt)
+    return len(keys)
+
+
+def transfer(s3, bucket, uploads, stale, max_workers):
+    """Run uploads and delete batches concurrently on one bounded pool.
+
+    `uploads` is a list of (path, key, md5). Returns (objects, bytes, seconds).
+    Exits non-zero after the pool drains if any transfer ultimately failed.
+    """
+    started = time.monotonic()
+    objects = 0
+    sent = 0
+    failures = []
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {}
+        # Deletes first: there are few batches and they should not queue
+        # behind a large upload set.
+        for i in range(0, len(stale), DELETE_BATCH_SIZE):
+            batch = stale[i : i + DELETE_BATCH_SIZE]
+            futures[pool.submit(delete_batch, s3, bucket, batch)] = (
+                f"delete batch ({len(batch)} key(s))"
+            )
+        for path, key, md5 in uploads:
+            futures[pool.submit(upload_doc, s3, bucket, path, key, md5)] = (
+                f"upload: {key}"
+            )
+
+        for fut in as_completed(futures):
+            label = futures[fut]
+            try:
+                result = fut.result()
+            except Exception as exc:
+                failures.append((label, exc))
+                print(f"  FAILED {label}: {exc}")
+                continue
+            print(f"  {label}")
+            if label.startswith("upload"):
+                objects += 1
+                sent += result
+            else:
+                objects += result
+
+    elapsed = time.monotonic() - started
+    if failures:
+        sys.exit(
+            f"ERROR: {len(failures)} S3 transfer(s) failed: "
+            + "; ".join(label for label, _ in failures)
+        )
+    return objects, sent, elapsed
+
+
+def sync_docs(s3, bucket, root, manifest_bucket=None, use_manifest=True,
+              max_workers=DEFAULT_MAX_WORKERS):
+    """Upload new/changed docs and delete S3 objects no longer present locally.
+
+    Remote state comes from the sync manifest in manifest_bucket when one is
+    available (and use_manifest is set), otherwise from a full list_objects_v2
+    listing. Without a manifest_bucket no manifest is read or written.
+    Transfers run on a pool of max_workers threads.
+
+    Returns the change set still awaiting ingestion: a dict with sorted
+    "added", "modified" and "deleted" key lists (this run's changes merged
+    over any pending from earlier runs) and "complete", which is False when
+    the manifest had to be rebuilt and earlier pending changes are unknown.
+    Exits non-zero on any unrecoverable S3 error so the caller fails the step.
+    """
+    if not os.path.isdir(root):
+        sys.exit(f"ERROR: local knowledge-base directory not found: {root}")
+
+    manifest = load_manifest(s3, manifest_bucket) if use_manifest and manifest_bucket else None
+    if manifest is not None:
+        print(f"  remote state from manifest s3://{manifest_bucket}/{MANIFEST_KEY} "
+              f"({len(manifest['files'])} entries)")
+        remote = manifest["files"]
+        pending = dict(manifest["pending"])
+    else:
+        print(f"  remote state from full listing of s3://{bucket}/")
+        remote = list_remote_etags(s3, bucket)
+        pending = {}
+
+    local = scan_local_docs(root, remote if manifest is not None else {})
+    changed = [
+        k
+        for k in sorted(local)
+        if not is_unchanged(s3, bucket, k, local[k], remote.get(k))
+    ]
     # Delete remote objects that no longer exist locally (the old --delete).
-    stale = [k for k in remote if k not in local_keys]
+    stale = sorted(k for k in remote if k not in local)
     if stale:
         print(f"  deleting {len(stale)} stale object(s) from s3://{bucket}/")
-        # delete_objects handles up to 1000 keys per call.
-        for i in range(0, len(stale), 1000):
-            batch = [{"Key": k} for k in stale[i : i + 1000]]
-            s3.delete_objects(Bucket=bucket, Delete={"Objects": batch})
+
+    # Later changes to the same key supersede earlier pending ones.
+    for key in changed:
+        is_new = key not in remote or pending.get(key) == "added"
+        pending[key] = "added" if is_new else "modified"
+    for key in stale:
+        pending[key] = "deleted"
+
+    objects, sent, elapsed = 0, 0, 0.0
+    if changed or stale:
+        objects, sent, elapsed = transfer(
+            s3,
+            bucket,
+            [(local[k]["path"], k, local[k]["md5"]) for k in changed],
+            stale,
+            max_workers,
+        )
+
+    # Only rewrite the manifest when the bucket changed or it was rebuilt, so
+    # an unchanged run stays at a single GET.
+    if manifest_bucket and (changed or stale or manifest is None):
+        entries = {}
+        for key, entry in local.items():
+            entries[key] = {
+                "size": entry["size"],
+                "mtime": entry["mtime"],
+                "md5": entry["md5"],
+                "etag": entry["etag"],
+            }
+        save_manifest(s3, manifest_bucket, entries, pending)
+        print(f"  manifest updated: s3://{manifest_bucket}/{MANIFEST_KEY}")
 
     print(
-        f"Sync complete: {uploaded} uploaded, {len(stale)} deleted, "
-        f"{len(local_keys)} total local docs."
+        f"Sync complete: {len(changed)} uploaded, {len(stale)} deleted, "
+        f"{len(local)} total local docs."
     )
-    return uploaded
+    if objects:
+        rate = elapsed if elapsed > 0 else float("inf")
+        print(
+            f"  throughput: {objects} object(s) in {elapsed:.2f}s "
+            f"({objects / rate:.1f} objects/s, {sent / rate / 1024:.1f} KiB/s, "
+            f"workers={max_workers})"
+        )
+
+    change_set = {
+        kind: sorted(k for k, v in pending.items() if v == kind)
+        for kind in ("added", "modified", "deleted")
+    }
+    change_set["complete"] = manifest is not None
+    print(
+        f"  change set: {len(change_set['added'])} added, "
+        f"{len(change_set['modified'])} modified, "
+        f"{len(change_set['deleted'])} deleted"
+        + ("" if change_set["complete"] else " (manifest rebuilt; incomplete)")
+    )
+    return change_set
+
+
+def write_change_set(path, change_set):
+    """Write the change set as JSON (the --change-set-out file)."""
+    with open(path, "w", encoding="utf-8") as fh:
+        json.dump(change_set, fh, indent=2)
+    print(f"  change set written to {path}")
+
+
+def mark_ingested(s3, bucket):
+    """Clear the pending change set of the manifest in the sync-state bucket."""
+    manifest = load_manifest(s3, bucket)
+    if manifest is None or not manifest["pending"]:
+        return
+    save_manifest(s3, bucket, manifest["files"], {})
+    print(f"  cleared {len(manifest['pending'])} pending change(s) from the manifest")
+
+
+def documents_for_change_set(change_set, root):
+    """Map changed S3 keys to (upsert_docs, delete_docs) document keys.
+
+    A sidecar (<doc>.metadata.json) is not a document of its own: changing or
+    removing it re-ingests its parent doc when that doc still exists locally.
+    """
+    upserts, deletes = set(), set()
+    for key in change_set["added"] + change_set["modified"]:
+        doc = key[: -len(METADATA_SUFFIX)] if key.endswith(METADATA_SUFFIX) else key
+        if os.path.isfile(os.path.join(root, doc)):
+            upserts.add(doc)
+    for key in change_set["deleted"]:
+        if key.endswith(METADATA_SUFFIX):
+            doc = key[: -len(METADATA_SUFFIX)]
+            if os.path.isfile(os.path.join(root, doc)):
+                upserts.add(doc)
+        else:
+            deletes.add(key)
+    return sorted(upserts), sorted(deletes - upserts)
+
+
+def ingest_documents(bedrock_agent, kb_id, ds_id, bucket, root, upserts, deletes):
+    """Ingest/delete just the given documents and poll each to a final state.
+
+    Uses IngestKnowledgeBaseDocuments / DeleteKnowledgeBaseDocuments against
+    the S3 data source so only the affected documents are re-embedded. Exits
+    non-zero when any document fails or the poll times out.
+    """
+    def identifier(key):
+        return {"dataSourceType": "S3", "s3": {"uri": f"s3://{bucket}/{key}"}}
+
+    print(
+        f"Targeted ingestion (kb={kb_id}, dataSource={ds_id}): "
+        f"{len(upserts)} to ingest, {len(deletes)} to delete"
+    )
+    for i in range(0, len(upserts), DOCUMENT_BATCH_SIZE):
+        documents = []
+        for key in upserts[i : i + DOCUMENT_BATCH_SIZE]:
+            doc = {
+                "content": {
+                    "dataSourceType": "S3",
+                    "s3": {"s3Location": {"uri": f"s3://{bucket}/{key}"}},
+                }
+            }
+            if os.path.isfile(os.path.join(root, key + METADATA_SUFFIX)):
+                doc["metadata"] = {
+                    "type": "S3_LOCATION",
+                    "s3Location": {"uri": f"s3://{bucket}/{key}{METADATA_SUFFIX}"},
+                }
+            documents.append(doc)
+        bedrock_agent.ingest_knowledge_base_documents(
+            knowledgeBaseId=kb_id, dataSourceId=ds_id, documents=documents
+        )
+    for i in range(0, len(deletes), DOCUMENT_BATCH_SIZE):
+        bedrock_agent.delete_knowledge_base_documents(
+            knowledgeBaseId=kb_id,
+            dataSourceId=ds_id,
+            documentIdentifiers=[
+                identifier(k) for k in deletes[i : i + DOCUMENT_BATCH_SIZE]
+            ],
+        )
+
+    delays = poll_delays()
+    waiting = {k: "upsert" for k in upserts}
+    waiting.update({k: "delete" for k in deletes})
+    failed = []
+    deadline = time.time() + POLL_TIMEOUT_SECONDS
+    while waiting and time.time() < deadline:
+        keys = sorted(waiting)
+        for i in range(0, len(keys), DOCUMENT_BATCH_SIZE):
+            resp = bedrock_agent.get_knowledge_base_documents(
+                knowledgeBaseId=kb_id,
+                dataSourceId=ds_id,
+                documentIdentifiers=[
+                    identifier(k) for k in keys[i : i + DOCUMENT_BATCH_SIZE]
+                ],
+            )
+            for detail in resp.get("documentDetails", []):
+                uri = detail["identifier"]["s3"]["uri"]
+                key = uri.split(f"s3://{bucket}/", 1)[1]
+                status = detail["status"]
+                op = waiting.get(key)
+                if op is None:
+                    continue
+                if op == "delete" and status in DOC_DELETED:
+                    print(f"  deleted: {key}")
+                    del waiting[key]
+                elif op == "upsert" and status in DOC_TERMINAL_OK:
+                    print(f"  {status.lower()}: {key}")
+                    del waiting[key]
+                elif status in DOC_TERMINAL_BAD:
+                    print(f"  {status}: {key} ({detail.get('statusReason', '')})")
+                    failed.append(key)
+                    del waiting[key]
+        if waiting:
+            print(f"  {len(waiting)} document(s) still in progress...")
+            time.sleep(next(delays))
+
+    if failed:
+        sys.exit(f"ERROR: targeted ingestion failed for {len(failed)} document(s): {failed}")
+    if waiting:
+        sys.exit(
+            f"ERROR: {len(waiting)} document(s) did not finish ingesting within "
+            f"{POLL_TIMEOUT_SECONDS}s: {sorted(waiting)}"
+        )
+    print("Targeted ingestion COMPLETE.")
+
 
+def poll_delays():
+    """Yield poll delays: POLL_INITIAL_SECONDS growing geometrically to the cap."""
+    delay = POLL_INITIAL_SECONDS
+    while True:
+        yield delay
+        delay = min(delay * POLL_BACKOFF_FACTOR, POLL_MAX_INTERVAL_SECONDS)
 
-def start_and_wait(bedrock_agent, kb_id, ds_id):
-    """Start an ingestion job and poll until COMPLETE; fail otherwise."""
+
+def describe_progress(stats, elapsed, expected_docs):
+    """Summarise ingestion statistics as counts, docs/s and an ETA string.
+
+    Rate is documents scanned per second since the job started; the ETA is
+    only shown when the expected document count is known.
+    """
+    scanned = stats.get("numberOfDocumentsScanned", 0)
+    line = (
+        f"scanned {scanned}"
+        + (f"/{expected_docs}" if expected_docs else "")
+        + f", indexed {stats.get('numberOfNewDocumentsIndexed', 0)} new"
+        f" + {stats.get('numberOfModifiedDocumentsIndexed', 0)} modified"
+        f", metadata {stats.get('numberOfMetadataDocumentsModified', 0)} modified"
+        f", deleted {stats.get('numberOfDocumentsDeleted', 0)}"
+        f", failed {stats.get('numberOfDocumentsFailed', 0)}"
+    )
+    if scanned and elapsed > 0:
+        rate = scanned / elapsed
+        line += f" — {rate:.2f} docs/s"
+        if expected_docs and expected_docs > scanned:
+            line += f", ETA {(expected_docs - scanned) / rate:.0f}s"
+    return line
+
+
+def start_and_wait(bedrock_agent, kb_id, ds_id, expected_docs=None,
+                   stall_timeout=DEFAULT_STALL_TIMEOUT_SECONDS):
+    """Start an ingestion job and poll until COMPLETE; fail otherwise.
+
+    Polls adaptively (see poll_delays) and fails early — stopping the job so
+    the data source is free for the next run — when a job that is IN_PROGRESS
+    has not changed status or statistics for stall_timeout seconds. Time spent
+    STARTING (queued behind other jobs) does not count towards a stall.
+    """
     print(f"Starting ingestion job (kb={kb_id}, dataSource={ds_id})...")
     resp = bedrock_agent.start_ingestion_job(
         knowledgeBaseId=kb_id,
@@ -167,8 +749,12 @@ def start_and_wait(bedrock_agent, kb_id, ds_id):
     job_id = resp["ingestionJob"]["ingestionJobId"]
     print(f"  ingestionJobId: {job_id}")
 
-    deadline = time.time() + POLL_TIMEOUT_SECONDS
-    while time.time() < deadline:
+    started = time.monotonic()
+    deadline = started + POLL_TIMEOUT_SECONDS
+    last_progress = None
+    last_change = started
+    delays = poll_delays()
+    while time.monotonic() < deadline:
         job = bedrock_agent.get_ingestion_job(
             knowledgeBaseId=kb_id,
             dataSourceId=ds_id,
@@ -176,10 +762,11 @@ def start_and_wait(bedrock_agent, kb_id, ds_id):
         )["ingestionJob"]
         status = job["status"]
         stats = job.get("statistics", {})
-        print(f"  status: {status} stats: {stats}")
+        now = time.monotonic()
+        print(f"  status: {status} {describe_progress(stats, now - started, expected_docs)}")
 
         if status in TERMINAL_OK:
-            print("Ingestion COMPLETE.")
+            print(f"Ingestion COMPLETE in {now - started:.0f}s.")
             return
         if status in TERMINAL_BAD:
             reasons = job.get("failureReasons", [])
@@ -187,7 +774,23 @@ def start_and_wait(bedrock_agent, kb_id, ds_id):
                 f"ERROR: ingestion job {job_id} ended in {status}. "
                 f"Reasons: {reasons}"
             )
-        time.sleep(POLL_INTERVAL_SECONDS)
+
+        progress = (status, stats)
+        if status != "IN_PROGRESS" or progress != last_progress:
+            last_progress = progress
+            last_change = now
+        elif now - last_change >= stall_timeout:
+            try:
+                bedrock_agent.stop_ingestion_job(
+                    knowledgeBaseId=kb_id, dataSourceId=ds_id, ingestionJobId=job_id
+                )
+            except ClientError as exc:
+                print(f"  WARNING: could not stop stalled job {job_id}: {exc}")
+            sys.exit(
+                f"ERROR: ingestion job {job_id} made no progress for "
+                f"{now - last_change:.0f}s (status {status}); stopped it."
+            )
+        time.sleep(next(delays))
 
     sys.exit(
         f"ERROR: ingestion job {job_id} did not reach COMPLETE within "
@@ -195,16 +798,80 @@ def start_and_wait(bedrock_agent, kb_id, ds_id):
     )
 
 
-def main():
-    parser = argparse.ArgumentParser(
-        description="Sync KB docs to S3 and run a Bedrock ingestion job (WS-A-06)."
+def run_ingestion(bedrock_agent, kb_id, ds_id, bucket, args, change_set):
+    """Pick full vs targeted ingestion for this run and execute it."""
+    expected_docs = sum(
+        1
+        for _, key in iter_local_docs(args.local_dir)
+        if not key.endswith(METADATA_SUFFIX)
     )
+
+    def full_job():
+        start_and_wait(
+            bedrock_agent,
+            kb_id,
+            ds_id,
+            expected_docs=expected_docs,
+            stall_timeout=args.stall_timeout,
+        )
+
+    if args.ingestion == "full" or change_set is None:
+        full_job()
+        return
+    if not change_set["complete"]:
+        print("Change set is incomplete (manifest rebuilt) — running a full ingestion job.")
+        full_job()
+        return
+
+    upserts, deletes = documents_for_change_set(change_set, args.local_dir)
+    affected = len(upserts) + len(deletes)
+    if affected == 0:
+        print("No document changes pending — skipping ingestion.")
+        return
+    if args.ingestion == "auto" and affected > args.full_ingest_threshold:
+        print(
+            f"{affected} documents changed (> threshold {args.full_ingest_threshold}) "
+            f"— running a full ingestion job."
+        )
+        full_job()
+        return
+    ingest_documents(bedrock_agent, kb_id, ds_id, bucket, args.local_dir, upserts, deletes)
+
+
+def check_content(args):
+    """Run the pre-upload content checks; exit non-zero when one is set to fail."""
+    try:
+        errors = kb_checks.check_sidecars(args.local_dir) if args.sidecars != "off" else []
+        pairs = []
+        if args.near_duplicates != "off":
+            pairs = kb_checks.check_near_duplicates(args.local_dir, args.duplicate_threshold)
+    except FileNotFoundError as exc:
+        sys.exit(f"ERROR: {exc}")
+    if errors and args.sidecars == "fail":
+        sys.exit(
+            f"ERROR: {len(errors)} sidecar problem(s) (--sidecars fail); a bad value "
+            f"silently drops the doc from metadata-filtered retrieval."
+        )
+    if pairs and args.near_duplicates == "fail":
+        sys.exit(
+            f"ERROR: {len(pairs)} near-duplicate chunk pair(s) found "
+            f"(--near-duplicates fail); merge or trim the docs above before ingesting."
+        )
+
+
+def add_arguments(parser):
+    """Add the sync and ingestion flags to parser (also used by kb-pipeline.py)."""
     parser.add_argument("--environment", "-e", default="prod", choices=["prod"])
     parser.add_argument("--region", "-r", default="us-east-1")
     parser.add_argument(
         "--local-dir", default=KB_LOCAL_DIR, help="Local knowledge-base directory"
     )
     parser.add_argument("--bucket", default=None, help="Override KB docs bucket name")
+    parser.add_argument(
+        "--manifest-bucket",
+        default=None,
+        help="Override the sync-state bucket holding the sync manifest",
+    )
     parser.add_argument("--kb-id", default=None, help="Override knowledge base id")
     parser.add_argument(
         "--data-source-id", default=None, help="Override data source id"
@@ -214,23 +881,133 @@ def main():
         action="store_true",
         help="Skip the S3 sync and only run the ingestion job",
     )
+    parser.add_argument(
+        "--full-listing",
+        action="store_true",
+        help="Ignore the sync manifest and reconcile against a full bucket listing",
+    )
+    parser.add_argument(
+        "--ingestion",
+        choices=INGESTION_MODES,
+        default="auto",
+        help="auto: targeted up to --full-ingest-threshold docs, else full job (default: auto)",
+    )
+    parser.add_argument(
+        "--full-ingest-threshold",
+        type=int,
+        default=DEFAULT_FULL_INGEST_THRESHOLD,
+        help=(
+            "In auto mode, run a full ingestion job when more documents than this "
+            f"changed (default: {DEFAULT_FULL_INGEST_THRESHOLD})"
+        ),
+    )
+    parser.add_argument(
+        "--stall-timeout",
+        type=int,
+        default=DEFAULT_STALL_TIMEOUT_SECONDS,
+        help=(
+            "Stop and fail an IN_PROGRESS full ingestion job whose status and statistics "
+            f"have not changed for this many seconds (default: {DEFAULT_STALL_TIMEOUT_SECONDS})"
+        ),
+    )
+    parser.add_argument(
+        "--change-set-out",
+        default=None,
+        help="Write the sync change set (added/modified/deleted keys) to this JSON file",
+    )
+    parser.add_argument(
+        "--max-workers",
+        type=int,
+        default=DEFAULT_MAX_WORKERS,
+        help=f"Concurrent S3 transfers (default: {DEFAULT_MAX_WORKERS})",
+    )
+    parser.add_argument(
+        "--sidecars",
+        choices=CHECK_MODES,
+        default="fail",
+        help="Sidecar metadata validation before upload: fail the step, report, or skip (default: fail)",
+    )
+    parser.add_argument(
+        "--near-duplicates",
+        choices=CHECK_MODES,
+        default="warn",
+        help="Near-duplicate chunk scan before upload: report, fail the step, or skip (default: warn)",
+    )
+    parser.add_argument(
+        "--duplicate-threshold",
+        type=float,
+        default=kb_checks.DEFAULT_DUPLICATE_THRESHOLD,
+        help=(
+            "Chunk Jaccard similarity counted as a near-duplicate "
+            f"(default: {kb_checks.DEFAULT_DUPLICATE_THRESHOLD})"
+        ),
+    )
+
+
+def check_arguments(args):
+    """Exit non-zero when a parsed sync/ingestion flag is out of range."""
+    if args.max_workers < 1:
+        sys.exit(f"ERROR: --max-workers must be >= 1, got {args.max_workers}")
+    if args.stall_timeout < 1:
+        sys.exit(f"ERROR: --stall-timeout must be >= 1, got {args.stall_timeout}")
+    if args.full_ingest_threshold < 0:
+        sys.exit(
+            f"ERROR: --full-ingest-threshold must be >= 0, got {args.full_ingest_threshold}"
+        )
+    if not (0.0 < args.duplicate_threshold <= 1.0):
+        sys.exit(
+            f"ERROR: --duplicate-threshold must be in range (0, 1], got {args.duplicate_threshold}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Sync KB docs to S3 and run a Bedrock ingestion job (WS-A-06)."
+    )
+    add_arguments(parser)
     args = parser.parse_args()
+    check_arguments(args)
 
     print(f"WS-A-06 knowledge base sync — env={args.environment} region={args.region}")
 
+    if not args.skip_sync:
+        check_content(args)
+
     ssm = boto3.client("ssm", region_name=args.region)
-    s3 = boto3.client("s3", region_name=args.region)
+    # One S3 client shared by every transfer thread; its connection pool must
+    # be at least as large as the worker pool or threads queue on sockets.
+    s3 = boto3.client(
+        "s3",
+        region_name=args.region,
+        config=Config(max_pool_connections=max(10, args.max_workers)),
+    )
     bedrock_agent = boto3.client("bedrock-agent", region_name=args.region)
 
     bucket, kb_id, ds_id = resolve_config(args, ssm, bedrock_agent)
-    print(f"Resolved: bucket={bucket} kb_id={kb_id} data_source_id={ds_id}")
+    manifest_bucket = resolve_manifest_bucket(args, ssm, bucket)
+    print(f"Resolved: bucket={bucket} kb_id={kb_id} data_source_id={ds_id} "
+          f"manifest_bucket={manifest_bucket}")
 
+    change_set = None
     if args.skip_sync:
         print("Skipping S3 sync (--skip-sync).")
     else:
-        sync_docs(s3, bucket, args.local_dir)
-
-    start_and_wait(bedrock_agent, kb_id, ds_id)
+        change_set = sync_docs(
+            s3,
+            bucket,
+            args.local_dir,
+            manifest_bucket=manifest_bucket,
+            use_manifest=not args.full_listing,
+            max_workers=args.max_workers,
+        )
+        if args.change_set_out:
+            write_change_set(args.change_set_out, change_set)
+
+    run_ingestion(bedrock_agent, kb_id, ds_id, bucket, args, change_set)
+    if manifest_bucket and change_set and any(
+        change_set[k] for k in ("added", "modified", "deleted")
+    ):
+        mark_ingested(s3, manifest_bucket)
     print("=== Knowledge base sync + ingestion succeeded ===")
 
 
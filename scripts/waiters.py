@@ -0,0 +1,116 @@
+"""
+Polling waiters for the deploy scripts.
+
+A Waiter polls one resource until a terminal state or a deadline:
+
+  probe()          reads the resource and returns its current state (any value)
+  done(state)      True when the state is the one being waited for
+  failed(state)    True when the state is terminal but not the one wanted
+
+Between probes it sleeps with exponential backoff (delay, delay*backoff, ...
+capped at max_delay) and +/- jitter, never past the deadline; the last probe
+happens at the deadline, so a resource that settles during the final sleep is
+still reported as done. Exceptions listed in retry_on are printed and polled
+through; anything else propagates.
+
+wait_all() runs several waiters at once on threads, so a deploy step can wait
+on, say, an agent alias and its knowledge-base association together and pay
+for the slowest one rather than the sum. Each waiter runs in a copy of the
+caller's context, so context variables (such as create-agents.py's output
+prefix) carry over to its thread.
+
+The clock and sleep are read from this module at call time (the clock and
+sleep attributes) so tests can substitute a virtual clock.
+"""
+
+import contextvars
+import random
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+DONE = "done"
+FAILED = "failed"
+TIMEOUT = "timeout"
+
+DEFAULT_TIMEOUT = 120
+DEFAULT_DELAY = 2.0
+DEFAULT_MAX_DELAY = 15.0
+DEFAULT_BACKOFF = 1.5
+DEFAULT_JITTER = 0.2
+
+clock = time.monotonic
+sleep = time.sleep
+
+# outcome: DONE, FAILED or TIMEOUT; state: the last probed state (None if the
+# last probe raised); elapsed: seconds spent waiting; attempts: probes made.
+WaitResult = namedtuple("WaitResult", ["outcome", "state", "elapsed", "attempts"])
+
+
+def _never(state):
+    return False
+
+
+class Waiter:
+    """Poll probe() until done(state), failed(state) or the timeout."""
+
+    def __init__(self, name, probe, done, failed=None, timeout=DEFAULT_TIMEOUT,
+                 delay=DEFAULT_DELAY, max_delay=DEFAULT_MAX_DELAY,
+                 backoff=DEFAULT_BACKOFF, jitter=DEFAULT_JITTER, retry_on=()):
+        if delay <= 0 or max_delay < delay or backoff < 1 or not (0 <= jitter < 1):
+            raise ValueError(f"invalid backoff for waiter {name}: delay={delay} "
+                             f"max_delay={max_delay} backoff={backoff} jitter={jitter}")
+        self.name = name
+        self.probe = probe
+        self.done = done
+        self.failed = failed or _never
+        self.timeout = timeout
+        self.delay = delay
+        self.max_delay = max_delay
+        self.backoff = backoff
+        self.jitter = jitter
+        self.retry_on = tuple(retry_on)
+
+    def wait(self):
+        """Block until a terminal state or the deadline; return a WaitResult."""
+        started = clock()
+        deadline = started + self.timeout
+        delay = self.delay
+        attempts = 0
+        while True:
+            attempts += 1
+            try:
+                state = self.probe()
+            except self.retry_on as exc:
+                print(f"  {self.name}: {exc}")
+                state = None
+            else:
+                if self.done(state):
+                    return WaitResult(DONE, state, clock() - started, attempts)
+                if self.failed(state):
+                    return WaitResult(FAILED, state, clock() - started, attempts)
+            remaining = deadline - clock()
+            if remaining <= 0:
+                return WaitResult(TIMEOUT, state, clock() - started, attempts)
+            sleep(min(delay * random.uniform(1 - self.jitter, 1 + self.jitter), remaining))
+            delay = min(delay * self.backoff, self.max_delay)
+
+
+def wait_all(waiters, max_workers=None):
+    """Run waiters concurrently; return {waiter.name: WaitResult}.
+
+    Names must be unique. Each waiter keeps its own deadline; an exception
+    from any probe (outside its retry_on) is re-raised once all have finished.
+    """
+    waiters = list(waiters)
+    names = [w.name for w in waiters]
+    if len(set(names)) != len(names):
+        raise ValueError(f"waiter names must be unique, got {names}")
+    if not waiters:
+        return {}
+    if len(waiters) == 1:
+        return {waiters[0].name: waiters[0].wait()}
+    with ThreadPoolExecutor(max_workers=max_workers or len(waiters)) as pool:
+        futures = {w.name: pool.submit(contextvars.copy_context().run, w.wait)
+                   for w in waiters}
+    return {name: future.result() for name, future in futures.items()}
@@ -0,0 +1,366 @@
+"""In-process stand-in for the bedrock-agent control plane.
+
+Covers the calls scripts/create-agents.py makes — agents, agent aliases and
+DRAFT knowledge-base associations — with the same request/response shapes and
+ClientError codes as boto3. Resources move through their real status
+sequences (CREATING -> NOT_PREPARED, PREPARING -> PREPARED, ...) on a
+VirtualClock, so a provisioning run that takes minutes against AWS finishes in
+milliseconds:
+
+  * durations  seconds each transition takes (DEFAULT_DURATIONS)
+  * fail       transitions that end in FAILED instead ('prepare', 'alias')
+  * throttle() makes the next N calls of an operation raise ThrottlingException
+  * fail_next() makes the next call of an operation raise any error code
+
+Every call is counted in .calls (paginators count one call per page).
+"""
+
+import datetime
+import itertools
+import threading
+from collections import Counter
+
+from botocore.exceptions import ClientError
+
+EPOCH = datetime.datetime(2026, 1, 1, tzinfo=datetime.timezone.utc)
+
+DEFAULT_DURATIONS = {
+    "create": 5,
+    "update": 2,
+    "prepare": 20,
+    "delete": 10,
+    "alias": 8,
+    # A new KB association only shows up in listings after this long.
+    "associate": 0,
+}
+
+# Statuses in which the agent rejects another mutation with ConflictException.
+BUSY_STATUSES = ("CREATING", "UPDATING", "PREPARING", "DELETING")
+
+
+class VirtualClock:
+    """Monotonic seconds that only advance when something sleeps."""
+
+    def __init__(self):
+        self.now = 0.0
+        self.lock = threading.Lock()
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        with self.lock:
+            self.now += max(0.0, seconds)
+
+    def datetime(self):
+        return EPOCH + datetime.timedelta(seconds=self.now)
+
+
+def client_error(code, operation, message=""):
+    return ClientError({"Error": {"Code": code, "Message": message or code}}, operation)
+
+
+class _Resource:
+    """A status that becomes `target` once the clock reaches `ready_at`."""
+
+    def __init__(self, clock, status):
+        self.clock = clock
+        self.status = status
+        self.target = None
+        self.ready_at = None
+        self.on_ready = None
+
+    def transition(self, interim, target, duration, on_ready=None):
+        self.status = interim
+        self.target = target
+        self.ready_at = self.clock.time() + duration
+        self.on_ready = on_ready
+
+    def settle(self):
+        if self.target is not None and self.clock.time() >= self.ready_at:
+            self.status, self.target = self.target, None
+            if self.on_ready:
+                self.on_ready()
+        return self.status
+
+
+class _Paginator:
+    """Serves a listing page_size items at a time, one counted call per page."""
+
+    def __init__(self, fake, operation, key, items, page_size):
+        self.fake = fake
+        self.operation = operation
+        self.key = key
+        self.items = items
+        self.page_size = page_size
+
+    def paginate(self, **kwargs):
+        start = 0
+        while True:
+            with self.fake._lock:
+                self.fake._call(self.operation)
+                items = self.items(**kwargs)
+            yield {self.key: items[start:start + self.page_size]}
+            start += self.page_size
+            if start >= len(items):
+                return
+
+
+class FakeBedrockAgent:
+    """Fake bedrock-agent client: agents, aliases and KB associations."""
+
+    def __init__(self, clock=None, durations=None, fail=(), page_size=2):
+        self.clock = clock or VirtualClock()
+        self.durations = dict(DEFAULT_DURATIONS, **(durations or {}))
+        self.fail = set(fail)
+        self.page_size = page_size
+        self.calls = Counter()
+        self.agents = {}
+        self.knowledge_bases = {}
+        self._kb_listed_at = {}
+        self.aliases = {}
+        self._errors = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.RLock()
+
+    # -- test controls -----------------------------------------------------
+
+    def throttle(self, operation, count=1):
+        """Make the next `count` calls of operation raise ThrottlingException."""
+        self.fail_next(operation, "ThrottlingException", count)
+
+    def fail_next(self, operation, code, count=1):
+        """Make the next `count` calls of operation raise ClientError(code)."""
+        self._errors.setdefault(operation, []).extend([code] * count)
+
+    def seed_agent(self, name, status="PREPARED"):
+        """Create an agent directly in a settled status; return its ID."""
+        agent_id = self._new_id("AGENT")
+        self.agents[agent_id] = {
+            "agentName": name, "resource": _Resource(self.clock, status),
+            "fields": {"agentName": name},
+            "preparedAt": self.clock.datetime() if status == "PREPARED" else None,
+            "updatedAt": self.clock.datetime(),
+        }
+        return agent_id
+
+    def status(self, agent_id):
+        """Current (settled) status of an agent, or None once deleted."""
+        with self._lock:
+            self._settle()
+            agent = self.agents.get(agent_id)
+            return agent["resource"].status if agent else None
+
+    # -- internals -----------------------------------------------------------
+
+    def _new_id(self, prefix):
+        return f"{prefix}{next(self._ids):04d}"
+
+    def _call(self, operation):
+        self.calls[operation] += 1
+        queued = self._errors.get(operation)
+        if queued:
+            raise client_error(queued.pop(0), operation)
+
+    def _settle(self):
+        for agent_id, agent in list(self.agents.items()):
+            if agent["resource"].settle() == "DELETED":
+                del self.agents[agent_id]
+                self.knowledge_bases.pop(agent_id, None)
+                self.aliases.pop(agent_id, None)
+        for aliases in self.aliases.values():
+            for alias in aliases.values():
+                alias["resource"].settle()
+
+    def _agent(self, agent_id, operation):
+        self._settle()
+        agent = self.agents.get(agent_id)
+        if agent is None:
+            raise client_error("ResourceNotFoundException", operation, f"agent {agent_id}")
+        return agent
+
+    def _mutable_agent(self, agent_id, operation):
+        agent = self._agent(agent_id, operation)
+        if agent["resource"].status in BUSY_STATUSES:
+            raise client_error("ConflictException", operation,
+                               f"agent {agent_id} is {agent['resource'].status}")
+        return agent
+
+    def _agent_view(self, agent_id, agent):
+        view = dict(agent["fields"], agentId=agent_id,
+                    agentStatus=agent["resource"].status, updatedAt=agent["updatedAt"])
+        if agent["preparedAt"]:
+            view["preparedAt"] = agent["preparedAt"]
+        if view["agentStatus"] == "FAILED":
+            view["failureReasons"] = ["injected failure"]
+        return view
+
+    def _alias_view(self, agent_id, alias_id, alias):
+        view = {"agentAliasId": alias_id, "agentAliasName": alias["name"],
+                "agentAliasStatus": alias["resource"].status,
+                "updatedAt": alias["updatedAt"],
+                "routingConfiguration": [{"agentVersion": str(alias["version"])}]}
+        if view["agentAliasStatus"] == "FAILED":
+            view["failureReasons"] = ["injected failure"]
+        return view
+
+    # -- agents ------------------------------------------------------------
+
+    def get_paginator(self, operation):
+        listers = {
+            "list_agents": ("agentSummaries", self._list_agents),
+            "list_agent_aliases": ("agentAliasSummaries", self._list_agent_aliases),
+            "list_agent_knowledge_bases": ("agentKnowledgeBaseSummaries",
+                                           self._list_agent_knowledge_bases),
+        }
+        key, items = listers[operation]
+        return _Paginator(self, operation, key, items, self.page_size)
+
+    def _list_agents(self):
+        self._settle()
+        return [{"agentId": agent_id, "agentName": agent["agentName"],
+                 "agentStatus": agent["resource"].status}
+                for agent_id, agent in self.agents.items()]
+
+    def create_agent(self, agentName, **fields):
+        with self._lock:
+            self._call("create_agent")
+            self._settle()
+            if any(a["agentName"] == agentName for a in self.agents.values()):
+                raise client_error("ConflictException", "CreateAgent", f"{agentName} exists")
+            agent_id = self.seed_agent(agentName, status="CREATING")
+            agent = self.agents[agent_id]
+            agent["fields"].update(fields)
+            agent["resource"].transition("CREATING", "NOT_PREPARED", self.durations["create"])
+            return {"agent": self._agent_view(agent_id, agent)}
+
+    def update_agent(self, agentId, agentName, **fields):
+        with self._lock:
+            self._call("update_agent")
+            agent = self._mutable_agent(agentId, "UpdateAgent")
+            agent["fields"] = dict(fields, agentName=agentName)
+            agent["updatedAt"] = self.clock.datetime()
+            agent["resource"].transition("UPDATING", "NOT_PREPARED", self.durations["update"])
+            return {"agent": self._agent_view(agentId, agent)}
+
+    def get_agent(self, agentId):
+        with self._lock:
+            self._call("get_agent")
+            agent = self._agent(agentId, "GetAgent")
+            return {"agent": self._agent_view(agentId, agent)}
+
+    def prepare_agent(self, agentId):
+        with self._lock:
+            self._call("prepare_agent")
+            agent = self._mutable_agent(agentId, "PrepareAgent")
+            target = "FAILED" if "prepare" in self.fail else "PREPARED"
+
+            def prepared():
+                if target == "PREPARED":
+                    agent["preparedAt"] = self.clock.datetime()
+
+            agent["resource"].transition("PREPARING", target, self.durations["prepare"], prepared)
+            return {"agentId": agentId, "agentStatus": "PREPARING"}
+
+    def delete_agent(self, agentId, skipResourceInUseCheck=False):
+        with self._lock:
+            self._call("delete_agent")
+            agent = self._agent(agentId, "DeleteAgent")
+            agent["resource"].transition("DELETING", "DELETED", self.durations["delete"])
+            return {"agentId": agentId, "agentStatus": "DELETING"}
+
+    # -- knowledge-base associations ---------------------------------------
+
+    def _list_agent_knowledge_bases(self, agentId, agentVersion):
+        self._agent(agentId, "ListAgentKnowledgeBases")
+        return [{"knowledgeBaseId": kb_id, "knowledgeBaseState": state}
+                for kb_id, state in self.knowledge_bases.get(agentId, {}).items()
+                if self._kb_listed_at.get((agentId, kb_id), 0) <= self.clock.time()]
+
+    def associate_agent_knowledge_base(self, agentId, agentVersion, knowledgeBaseId,
+                                       description, knowledgeBaseState='ENABLED'):
+        with self._lock:
+            self._call("associate_agent_knowledge_base")
+            self._mutable_agent(agentId, "AssociateAgentKnowledgeBase")
+            kbs = self.knowledge_bases.setdefault(agentId, {})
+            if knowledgeBaseId in kbs:
+                raise client_error("ConflictException", "AssociateAgentKnowledgeBase")
+            kbs[knowledgeBaseId] = knowledgeBaseState
+            self._kb_listed_at[(agentId, knowledgeBaseId)] = (
+                self.clock.time() + self.durations["associate"])
+            self.agents[agentId]["resource"].status = "NOT_PREPARED"
+            return {}
+
+    def update_agent_knowledge_base(self, agentId, agentVersion, knowledgeBaseId,
+                                    description, knowledgeBaseState):
+        with self._lock:
+            self._call("update_agent_knowledge_base")
+            self._mutable_agent(agentId, "UpdateAgentKnowledgeBase")
+            kbs = self.knowledge_bases.get(agentId, {})
+            if knowledgeBaseId not in kbs:
+                raise client_error("ResourceNotFoundException", "UpdateAgentKnowledgeBase")
+            kbs[knowledgeBaseId] = knowledgeBaseState
+            self.agents[agentId]["resource"].status = "NOT_PREPARED"
+            return {}
+
+    def disassociate_agent_knowledge_base(self, agentId, agentVersion, knowledgeBaseId):
+        with self._lock:
+            self._call("disassociate_agent_knowledge_base")
+            self._mutable_agent(agentId, "DisassociateAgentKnowledgeBase")
+            if self.knowledge_bases.get(agentId, {}).pop(knowledgeBaseId, None) is None:
+                raise client_error("ResourceNotFoundException", "DisassociateAgentKnowledgeBase")
+            self.agents[agentId]["resource"].status = "NOT_PREPARED"
+            return {}
+
+    # -- aliases -----------------------------------------------------------
+
+    def _list_agent_aliases(self, agentId):
+        self._agent(agentId, "ListAgentAliases")
+        return [self._alias_view(agentId, alias_id, alias)
+                for alias_id, alias in self.aliases.get(agentId, {}).items()]
+
+    def _publish(self, agent_id, alias):
+        agent = self.agents[agent_id]
+        if agent["resource"].status != "PREPARED":
+            raise client_error("ValidationException", "CreateAgentAlias",
+                               f"agent {agent_id} is {agent['resource'].status}, not PREPARED")
+        alias["version"] += 1
+        alias["updatedAt"] = self.clock.datetime()
+        target = "FAILED" if "alias" in self.fail else "PREPARED"
+        alias["resource"].transition("UPDATING", target, self.durations["alias"])
+
+    def create_agent_alias(self, agentId, agentAliasName):
+        with self._lock:
+            self._call("create_agent_alias")
+            self._agent(agentId, "CreateAgentAlias")
+            aliases = self.aliases.setdefault(agentId, {})
+            if any(a["name"] == agentAliasName for a in aliases.values()):
+                raise client_error("ConflictException", "CreateAgentAlias")
+            alias_id = self._new_id("ALIAS")
+            alias = {"name": agentAliasName, "version": 0,
+                     "resource": _Resource(self.clock, "CREATING"),
+                     "updatedAt": self.clock.datetime()}
+            self._publish(agentId, alias)
+            alias["resource"].status = "CREATING"
+            aliases[alias_id] = alias
+            return {"agentAlias": self._alias_view(agentId, alias_id, alias)}
+
+    def update_agent_alias(self, agentId, agentAliasId, agentAliasName):
+        with self._lock:
+            self._call("update_agent_alias")
+            self._agent(agentId, "UpdateAgentAlias")
+            alias = self.aliases.get(agentId, {}).get(agentAliasId)
+            if alias is None:
+                raise client_error("ResourceNotFoundException", "UpdateAgentAlias")
+            alias["name"] = agentAliasName
+            self._publish(agentId, alias)
+            return {"agentAlias": self._alias_view(agentId, agentAliasId, alias)}
+
+    def get_agent_alias(self, agentId, agentAliasId):
+        with self._lock:
+            self._call("get_agent_alias")
+            self._agent(agentId, "GetAgentAlias")
+            alias = self.aliases.get(agentId, {}).get(agentAliasId)
+            if alias is None:
+                raise client_error("ResourceNotFoundException", "GetAgentAlias")
+            return {"agentAlias": self._alias_view(agentId, agentAliasId, alias)}
@@ -0,0 +1,285 @@
+"""Provisioning tests for scripts/create-agents.py against FakeBedrockAgent.
+
+No AWS access: the bedrock-agent control plane is the in-process fake and
+scripts/waiters.py polls on the fake's virtual clock, so waits that take
+minutes live (PREPARING, alias publishing, deletions) finish instantly.
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+
+import pytest
+
+from fake_bedrock_agent import FakeBedrockAgent, VirtualClock, client_error
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "scripts")
+sys.path.insert(0, SCRIPTS_DIR)
+
+import waiters  # noqa: E402
+
+
+def load_create_agents():
+    spec = importlib.util.spec_from_file_location(
+        "create_agents", os.path.join(SCRIPTS_DIR, "create-agents.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+ca = load_create_agents()
+
+ENV = "prod"
+KB_ID = "KB0001"
+ROLE_ARN = "arn:aws:iam::123456789012:role/BedrockAgentRole-prod"
+MODEL_ID = ca.MODELS["anthropic"]["supervisor"]
+AGENT_NAME = f"{ca.SUPERVISOR_AGENT['name']}-{ENV}"
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = VirtualClock()
+    monkeypatch.setattr(waiters, "clock", clock.time)
+    monkeypatch.setattr(waiters, "sleep", clock.sleep)
+    return clock
+
+
+@pytest.fixture
+def bedrock(clock):
+    return FakeBedrockAgent(clock)
+
+
+def provision(client, inventory=None, plan=None):
+    """The provisioning sequence of create-agents.py main(); returns (agent, alias)."""
+    agent_id = ca.create_or_update_agent(
+        client, ca.SUPERVISOR_AGENT, ROLE_ARN, MODEL_ID, ENV, plan=plan, inventory=inventory)
+    assert agent_id
+    assert ca.wait_for_agent_ready(client, agent_id, ["NOT_PREPARED", "PREPARED"]) is not None
+    assert ca.associate_knowledge_base(client, agent_id, KB_ID, inventory)
+    status = ca.prepare_agent(client, agent_id, force=plan["prepare"] if plan else True)
+    assert status == "PREPARED"
+    alias_id, published = ca.publish_agent_alias(
+        client, agent_id, "live", ENV,
+        publish=plan["publish"] if plan else True, inventory=inventory)
+    assert alias_id
+    ca.wait_for_alias_and_knowledge_base(client, agent_id, alias_id, KB_ID, published, inventory)
+    return agent_id, alias_id
+
+
+def plan_for(client, inventory=None):
+    desired = ca.desired_agent_fields(ca.SUPERVISOR_AGENT, ROLE_ARN, MODEL_ID, ENV)
+    return ca.plan_agent(client, desired, KB_ID, "live", ENV, inventory)
+
+
+def test_fresh_account_provisions_and_passes_assertion(bedrock, clock):
+    agent_id, alias_id = provision(bedrock)
+
+    assert bedrock.status(agent_id) == "PREPARED"
+    assert alias_id in bedrock.aliases[agent_id]
+    assert ca.assert_single_prepared_agent(bedrock, agent_id, KB_ID, ENV, [])
+    # Create, prepare and alias publish all had to be waited out.
+    assert clock.now >= sum(bedrock.durations[k] for k in ("create", "prepare", "alias"))
+
+
+def test_second_run_plans_and_makes_no_mutations(bedrock):
+    provision(bedrock)
+    before = dict(bedrock.calls)
+
+    inventory = ca.AgentInventory(bedrock)
+    plan = plan_for(bedrock, inventory)
+    assert plan["agent_changes"] == {}
+    assert not (plan["update_agent"] or plan["update_kb"] or plan["prepare"] or plan["publish"])
+    provision(bedrock, inventory, plan)
+
+    mutations = {"create_agent", "update_agent", "prepare_agent", "create_agent_alias",
+                 "update_agent_alias", "associate_agent_knowledge_base"}
+    assert {op: n - before.get(op, 0) for op, n in bedrock.calls.items()
+            if op in mutations and n != before.get(op, 0)} == {}
+
+
+def test_changed_instruction_updates_prepares_and_publishes(bedrock, monkeypatch):
+    agent_id, alias_id = provision(bedrock)
+    version = bedrock.aliases[agent_id][alias_id]["version"]
+    monkeypatch.setitem(ca.SUPERVISOR_AGENT, "instruction", "Be brief.")
+
+    plan = plan_for(bedrock)
+    assert set(plan["agent_changes"]) == {"instruction"}
+    assert plan["prepare"] and plan["publish"]
+    provision(bedrock, plan=plan)
+
+    assert bedrock.agents[agent_id]["fields"]["instruction"] == "Be brief."
+    assert bedrock.aliases[agent_id][alias_id]["version"] == version + 1
+
+
+def test_prepare_failure_is_reported(clock):
+    bedrock = FakeBedrockAgent(clock, fail={"prepare"})
+    agent_id = ca.create_or_update_agent(bedrock, ca.SUPERVISOR_AGENT, ROLE_ARN, MODEL_ID, ENV)
+
+    assert ca.prepare_agent(bedrock, agent_id) == "FAILED"
+    assert not ca.assert_single_prepared_agent(bedrock, agent_id, KB_ID, ENV, [])
+
+
+def test_prepare_timeout_returns_none(clock):
+    bedrock = FakeBedrockAgent(clock, durations={"prepare": 600})
+    agent_id = ca.create_or_update_agent(bedrock, ca.SUPERVISOR_AGENT, ROLE_ARN, MODEL_ID, ENV)
+
+    assert ca.prepare_agent(bedrock, agent_id) is None
+    # The wait gives up at its deadline instead of sleeping past it.
+    assert clock.now < 600
+
+
+def test_failed_alias_returns_its_id(clock):
+    bedrock = FakeBedrockAgent(clock, fail={"alias"})
+    agent_id = ca.create_or_update_agent(bedrock, ca.SUPERVISOR_AGENT, ROLE_ARN, MODEL_ID, ENV)
+    ca.wait_for_agent_ready(bedrock, agent_id, ["NOT_PREPARED"])
+    assert ca.associate_knowledge_base(bedrock, agent_id, KB_ID)
+    ca.prepare_agent(bedrock, agent_id)
+
+    alias_id, published = ca.publish_agent_alias(bedrock, agent_id, "live", ENV)
+    results = ca.wait_for_alias_and_knowledge_base(bedrock, agent_id, alias_id, KB_ID, published)
+
+    assert results[f"alias {alias_id}"].outcome == waiters.FAILED
+    assert bedrock.get_agent_alias(agentId=agent_id, agentAliasId=alias_id)[
+        "agentAlias"]["agentAliasStatus"] == "FAILED"
+    assert clock.now < 2 * 120
+
+
+def test_alias_and_kb_association_are_waited_together(clock, monkeypatch):
+    # The association only shows up in listings after the alias publish starts.
+    bedrock = FakeBedrockAgent(clock, durations={"associate": 60})
+    agent_id = ca.create_or_update_agent(bedrock, ca.SUPERVISOR_AGENT, ROLE_ARN, MODEL_ID, ENV)
+    ca.wait_for_agent_ready(bedrock, agent_id, ["NOT_PREPARED"])
+    assert ca.associate_knowledge_base(bedrock, agent_id, KB_ID)
+    listed_at = clock.now + 60
+    assert ca.prepare_agent(bedrock, agent_id) == "PREPARED"
+    batches = []
+    wait_all = waiters.wait_all
+    monkeypatch.setattr(waiters, "wait_all",
+                        lambda ws: batches.append([w.name for w in ws]) or wait_all(ws))
+
+    alias_id, published = ca.publish_agent_alias(bedrock, agent_id, "live", ENV)
+    assert clock.now < listed_at
+    results = ca.wait_for_alias_and_knowledge_base(bedrock, agent_id, alias_id, KB_ID, published)
+
+    assert batches == [[f"knowledge base {KB_ID}", f"alias {alias_id}"]]
+    assert {r.outcome for r in results.values()} == {waiters.DONE}
+    assert clock.now >= listed_at
+
+
+def test_throttled_status_polls_are_retried(bedrock):
+    agent_id = ca.create_or_update_agent(bedrock, ca.SUPERVISOR_AGENT, ROLE_ARN, MODEL_ID, ENV)
+    bedrock.throttle("get_agent", 3)
+
+    assert ca.wait_for_agent_ready(bedrock, agent_id, ["NOT_PREPARED"]) == "NOT_PREPARED"
+    assert bedrock.calls["get_agent"] >= 4
+
+
+def test_throttled_listing_is_not_cached(bedrock):
+    inventory = ca.AgentInventory(bedrock)
+    bedrock.seed_agent(AGENT_NAME)
+    bedrock.throttle("list_agents")
+
+    assert ca.check_agent_exists(bedrock, AGENT_NAME, inventory) is None
+    assert ca.check_agent_exists(bedrock, AGENT_NAME, inventory) is not None
+
+
+def test_orphans_deleted_concurrently_with_shared_listing(bedrock, clock):
+    for base_name in ca.ORPHANED_AGENT_NAMES:
+        bedrock.seed_agent(f"{base_name}-{ENV}")
+    for i in range(5):
+        bedrock.seed_agent(f"Unrelated{i}")
+
+    assert ca.delete_orphaned_agents(bedrock, ENV) == []
+    assert bedrock.calls["delete_agent"] == len(ca.ORPHANED_AGENT_NAMES)
+    assert not any(a["agentName"].endswith(f"-{ENV}") for a in bedrock.agents.values())
+    # All deletes were issued at once, so they finish together.
+    assert clock.now < 2 * bedrock.durations["delete"]
+
+
+def test_orphan_delete_error_is_reported_remaining(bedrock):
+    agent_id = bedrock.seed_agent(f"{ca.ORPHANED_AGENT_NAMES[0]}-{ENV}")
+    bedrock.fail_next("delete_agent", "AccessDeniedException")
+
+    remaining = ca.delete_orphaned_agents(bedrock, ENV)
+
+    assert remaining == [f"{ca.ORPHANED_AGENT_NAMES[0]}-{ENV}"]
+    assert bedrock.status(agent_id) == "PREPARED"
+    supervisor_id, _ = provision(bedrock)
+    assert not ca.assert_single_prepared_agent(bedrock, supervisor_id, KB_ID, ENV, remaining)
+
+
+def test_stale_knowledge_base_is_replaced(bedrock):
+    agent_id, _ = provision(bedrock)
+    bedrock.knowledge_bases[agent_id] = {"KB-OLD": "ENABLED"}
+
+    plan = plan_for(bedrock)
+    assert plan["stale_kb_ids"] == ["KB-OLD"] and plan["prepare"]
+    provision(bedrock, plan=plan)
+
+    assert bedrock.knowledge_bases[agent_id] == {KB_ID: "ENABLED"}
+    assert ca.assert_single_prepared_agent(bedrock, agent_id, KB_ID, ENV, [])
+
+
+class FakeSsm:
+    """get_parameter/put_parameter over a dict; no guardrail is configured."""
+
+    def __init__(self):
+        self.parameters = {f"/headset-agent/{ENV}/kb-id": KB_ID}
+
+    def get_parameter(self, Name):
+        if Name not in self.parameters:
+            raise client_error("ParameterNotFound", "GetParameter")
+        return {"Parameter": {"Value": self.parameters[Name]}}
+
+    def put_parameter(self, Name, Value, Type, Description, Overwrite):
+        self.parameters[Name] = Value
+
+
+class FakeIam:
+    def get_role(self, RoleName):
+        return {"Role": {"Arn": ROLE_ARN}}
+
+
+def test_parse_targets():
+    assert ca.parse_targets("prod:us-east-1, prod:us-west-2,") == [
+        ("prod", "us-east-1"), ("prod", "us-west-2")]
+    for value in ("prod", "dev:us-east-1", "prod:eu-west-1",
+                  "prod:us-east-1,prod:us-east-1", " , "):
+        with pytest.raises(SystemExit):
+            ca.parse_targets(value)
+
+
+def test_provision_all_prefixes_every_line(clock, monkeypatch, capsys):
+    targets = ca.parse_targets("prod:us-east-1,prod:us-west-2")
+    fakes = {region: FakeBedrockAgent(clock) for _, region in targets}
+    ssm = {region: FakeSsm() for _, region in targets}
+    for fake in fakes.values():
+        for base_name in ca.ORPHANED_AGENT_NAMES:
+            fake.seed_agent(f"{base_name}-{ENV}")
+    monkeypatch.setattr(ca, "get_bedrock_client", lambda region, session: fakes[region])
+    monkeypatch.setattr(ca, "get_ssm_client", lambda region, session: ssm[region])
+    monkeypatch.setattr(ca, "get_iam_client", lambda region, session: FakeIam())
+    args = argparse.Namespace(model_provider="anthropic", dry_run=False, plan=False,
+                              force=False, max_parallel=2)
+
+    results = ca.provision_all(args, targets)
+
+    assert [summary["result"] for summary in results.values()] == ["OK", "OK"]
+    lines = [line for line in capsys.readouterr().out.splitlines() if line]
+    prefixes = {f"[{environment}/{region}] " for environment, region in targets}
+    assert [line for line in lines if line[:line.find("] ") + 2] not in prefixes] == []
+    # Output from the waiter and orphan-delete threads carries its target too.
+    for prefix in prefixes:
+        assert any(line.startswith(prefix + "  Alias status:") for line in lines)
+        assert any(line.startswith(prefix + "  Knowledge base") for line in lines)
+        assert any(line.startswith(prefix + "  Deleted ") for line in lines)
+    for environment, region in targets:
+        ssm_params = ssm[region].parameters
+        assert ssm_params[f"/headset-agent/{ENV}/supervisor-agent-id"] == \
+            results[(environment, region)]["agent_id"]
+
+    ca.print_results(results)
+    table = capsys.readouterr().out
+    assert "prod/us-east-1" in table and "prod/us-west-2" in table
+    assert table.count(" OK ") == 2
@@ -0,0 +1,141 @@
+"""Ingestion tests for scripts/sync-knowledge-base.py.
+
+No AWS access: the document ingestion APIs are a small in-process fake that
+records the size of every batch, and full ingestion jobs follow a scripted
+status timeline on a fake clock.
+"""
+
+import importlib.util
+import os
+import sys
+
+import pytest
+
+SCRIPTS_DIR = os.path.join(os.path.dirname(__file__), "..", "..", "scripts")
+sys.path.insert(0, SCRIPTS_DIR)
+
+
+def load_sync_knowledge_base():
+    spec = importlib.util.spec_from_file_location(
+        "sync_knowledge_base", os.path.join(SCRIPTS_DIR, "sync-knowledge-base.py"))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+skb = load_sync_knowledge_base()
+
+BUCKET = "kb-docs"
+# The API rejects larger documents / documentIdentifiers lists outright.
+API_MAX_DOCUMENTS = 10
+
+
+class FakeDocumentApi:
+    """IngestKnowledgeBaseDocuments / Delete... / Get... with batch recording."""
+
+    def __init__(self):
+        self.batches = {"ingest": [], "delete": [], "get": []}
+        self.deleted = set()
+
+    def ingest_knowledge_base_documents(self, knowledgeBaseId, dataSourceId, documents):
+        self.batches["ingest"].append(len(documents))
+
+    def delete_knowledge_base_documents(self, knowledgeBaseId, dataSourceId,
+                                        documentIdentifiers):
+        self.batches["delete"].append(len(documentIdentifiers))
+        self.deleted.update(d["s3"]["uri"] for d in documentIdentifiers)
+
+    def get_knowledge_base_documents(self, knowledgeBaseId, dataSourceId,
+                                     documentIdentifiers):
+        self.batches["get"].append(len(documentIdentifiers))
+        return {"documentDetails": [
+            {"identifier": d,
+             "status": "NOT_FOUND" if d["s3"]["uri"] in self.deleted else "INDEXED"}
+            for d in documentIdentifiers
+        ]}
+
+
+def write_docs(root, names):
+    for name in names:
+        path = root / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(f"# {name}\n")
+
+
+def test_change_set_over_ten_documents_is_split_into_batches_of_ten(tmp_path):
+    upserts = [f"brands/doc-{i:02d}.md" for i in range(17)]
+    deletes = [f"brands/old-{i:02d}.md" for i in range(12)]
+    write_docs(tmp_path, upserts)
+    # Still under the full-ingest threshold, so this takes the targeted path.
+    assert len(upserts) < skb.DEFAULT_FULL_INGEST_THRESHOLD
+    api = FakeDocumentApi()
+
+    skb.ingest_documents(api, "KB0001", "DS0001", BUCKET, str(tmp_path), upserts, deletes)
+
+    assert api.batches["ingest"] == [10, 7]
+    assert api.batches["delete"] == [10, 2]
+    assert api.batches["get"] == [10, 10, 9]
+    assert max(n for sizes in api.batches.values() for n in sizes) <= API_MAX_DOCUMENTS
+
+
+class FakeClock:
+    """Stands in for the time module: monotonic() only advances on sleep()."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class FakeIngestionJob:
+    """An ingestion job that walks through a scripted (until, status, stats) timeline."""
+
+    def __init__(self, clock, timeline):
+        self.clock = clock
+        self.timeline = timeline
+        self.stopped = False
+
+    def start_ingestion_job(self, knowledgeBaseId, dataSourceId, description):
+        return {"ingestionJob": {"ingestionJobId": "JOB1"}}
+
+    def get_ingestion_job(self, knowledgeBaseId, dataSourceId, ingestionJobId):
+        for until, status, stats in self.timeline:
+            if self.clock.now < until:
+                break
+        return {"ingestionJob": {"status": status, "statistics": stats}}
+
+    def stop_ingestion_job(self, knowledgeBaseId, dataSourceId, ingestionJobId):
+        self.stopped = True
+
+
+def test_job_queued_in_starting_is_not_treated_as_stalled(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(skb, "time", clock)
+    job = FakeIngestionJob(clock, [
+        (600, "STARTING", {}),
+        (700, "IN_PROGRESS", {"numberOfDocumentsScanned": 40}),
+        (float("inf"), "COMPLETE", {"numberOfDocumentsScanned": 80}),
+    ])
+
+    skb.start_and_wait(job, "KB0001", "DS0001", stall_timeout=300)
+
+    assert not job.stopped
+    assert clock.now >= 700
+
+
+def test_in_progress_job_without_progress_is_stopped(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(skb, "time", clock)
+    job = FakeIngestionJob(clock, [
+        (float("inf"), "IN_PROGRESS", {"numberOfDocumentsScanned": 40}),
+    ])
+
+    with pytest.raises(SystemExit):
+        skb.start_and_wait(job, "KB0001", "DS0001", stall_timeout=300)
+
+    assert job.stopped
+    assert clock.now < skb.POLL_TIMEOUT_SECONDS